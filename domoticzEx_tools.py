@@ -7,15 +7,17 @@ This module provides a collection of utility functions for Domoticz plugins.
 These functions handle common tasks such as device management, configuration,
 location calculations, and API communication.
 
-Version: 2.0.0
+Version: 2.1.0
 License: MIT
 """
 
 # Standard library imports
+import heapq
+import time
 from datetime import datetime
 from enum import IntEnum
 from math import radians, sin, cos, atan2, sqrt
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 # Try to import Domoticz module
 try:
@@ -33,6 +35,213 @@ class DomoticzConstants(IntEnum):
 DeviceCollection = Dict[str, Any]
 UnitCollection = Dict[int, Any]
 
+
+class Lazy:
+    """
+    Log argument that is only evaluated when the message is written.
+    
+    Wraps a callable (and its arguments), e.g. log.debug('Stats: %s', Lazy(queue.stats)).
+    Other callables passed to the logger (functions, classes, bound methods) are formatted as is.
+    """
+    __slots__ = ('function', 'args')
+
+    def __init__(self, function: Callable[..., Any], *args: Any) -> None:
+        self.function = function
+        self.args = args
+
+    def __call__(self) -> Any:
+        return self.function(*self.args)
+
+
+class DomoticzLogger:
+    """
+    Logging facade on top of the Domoticz log functions.
+    
+    Messages take %-style arguments that are only formatted when the message is actually
+    written; Lazy arguments are only evaluated at that moment. Debug
+    messages cost nothing when Python debugging is not active. Status and error messages
+    can be rate limited per message site.
+    """
+    # Debug levels (Mode6) that activate Domoticz.Debug: 'All' (1) and 'Python' (2)
+    DEBUG_MASK = 0b11
+
+    def __init__(self) -> None:
+        self.debug_level: int = 0
+        self._last_emitted: Dict[str, float] = {}
+        self._suppressed: Dict[str, int] = {}
+
+    def set_debug_level(self, level: int) -> None:
+        """
+        Set the active debug level (the Mode6 value passed to Domoticz.Debugging).
+        
+        Args:
+            level: Debug level bit mask (-1 for all)
+        """
+        self.debug_level = level
+
+    @property
+    def debug_enabled(self) -> bool:
+        """Return True if debug messages are written to the log."""
+        return bool(self.debug_level & self.DEBUG_MASK)
+
+    def debug(self, msg: str, *args: Any) -> None:
+        """
+        Write a debug message; formatting is skipped when debugging is not active.
+        
+        Args:
+            msg: Message with %-style placeholders
+            *args: Values for the placeholders (Lazy arguments are evaluated when written)
+        """
+        if self.debug_level & self.DEBUG_MASK:
+            Domoticz.Debug(self._format(msg, args))
+
+    def status(self, msg: str, *args: Any, site: Optional[str] = None, interval: float = 0) -> None:
+        """
+        Write a status message, at most once per interval for the given message site.
+        
+        Args:
+            msg: Message with %-style placeholders
+            *args: Values for the placeholders (Lazy arguments are evaluated when written)
+            site: Identifier of the message site used for rate limiting (None: no rate limiting)
+            interval: Minimum number of seconds between two messages of the same site
+        """
+        if (text := self._rate_limited(msg, args, site, interval)) is not None:
+            Domoticz.Status(text)
+
+    def error(self, msg: str, *args: Any, site: Optional[str] = None, interval: float = 0) -> None:
+        """
+        Write an error message, at most once per interval for the given message site.
+        
+        Args:
+            msg: Message with %-style placeholders
+            *args: Values for the placeholders (Lazy arguments are evaluated when written)
+            site: Identifier of the message site used for rate limiting (None: no rate limiting)
+            interval: Minimum number of seconds between two messages of the same site
+        """
+        if (text := self._rate_limited(msg, args, site, interval)) is not None:
+            Domoticz.Error(text)
+
+    def _rate_limited(self, msg: str, args: Tuple[Any, ...], site: Optional[str], interval: float) -> Optional[str]:
+        """Return the formatted message if the site may log now, otherwise None (message suppressed)."""
+        if site is None:
+            return self._format(msg, args)
+        now = time.monotonic()
+        last = self._last_emitted.get(site)
+        if last is not None and now - last < interval:
+            self._suppressed[site] = self._suppressed.get(site, 0) + 1
+            return None
+        self._last_emitted[site] = now
+        text = self._format(msg, args)
+        if suppressed := self._suppressed.pop(site, 0):
+            text += f' ({suppressed} similar message(s) suppressed)'
+        return text
+
+    @staticmethod
+    def _format(msg: str, args: Tuple[Any, ...]) -> str:
+        """Format the message with its (lazily evaluated) arguments."""
+        if not args:
+            return msg
+        return msg % tuple(arg() if isinstance(arg, Lazy) else arg for arg in args)
+
+
+# Shared logger instance
+log = DomoticzLogger()
+
+
+class StalenessTracker:
+    """
+    Track the expiry deadline of every unit in a min-heap.
+    
+    update_device and touch_device refresh the deadline of a unit (now + TTL of the unit),
+    so a check only has to pop the units whose deadline passed (O(log n) each) instead of
+    parsing the LastUpdate of every unit. Refreshing a unit leaves its previous heap entry
+    behind; such stale entries are skipped when popped and compacted when they pile up.
+    """
+
+    def __init__(self, default_ttl: float = 7200) -> None:
+        self.default_ttl: float = default_ttl
+        self._ttl: Dict[Tuple[str, int], float] = {}
+        self._deadline: Dict[Tuple[str, int], float] = {}
+        self._last_seen: Dict[Tuple[str, int], float] = {}
+        self._heap: List[Tuple[float, str, int]] = []
+
+    def set_ttl(self, device_id: str, unit: int, ttl: Optional[float]) -> None:
+        """
+        Set the time-to-live of a unit (applied from its next refresh).
+        
+        Args:
+            device_id: ID of the device
+            unit: Unit number within the device
+            ttl: Seconds without update before the unit is stale (None: default TTL)
+        """
+        if ttl is None:
+            self._ttl.pop((device_id, unit), None)
+        else:
+            self._ttl[(device_id, unit)] = ttl
+
+    def refresh(self, device_id: str, unit: int) -> None:
+        """
+        Register activity of a unit and move its deadline.
+        
+        Args:
+            device_id: ID of the device
+            unit: Unit number within the device
+        """
+        key = (device_id, unit)
+        now = time.monotonic()
+        deadline = now + self._ttl.get(key, self.default_ttl)
+        self._deadline[key] = deadline
+        self._last_seen[key] = now
+        heapq.heappush(self._heap, (deadline, device_id, unit))
+        # Drop the superseded entries once they outnumber the live ones
+        if len(self._heap) > 4 * len(self._deadline) + 64:
+            self._heap = [(deadline, key[0], key[1]) for key, deadline in self._deadline.items()]
+            heapq.heapify(self._heap)
+
+    def forget(self, device_id: str, unit: int) -> None:
+        """
+        Stop tracking a unit (e.g. unused unit); its heap entries are skipped when popped.
+        
+        Args:
+            device_id: ID of the device
+            unit: Unit number within the device
+        """
+        self._deadline.pop((device_id, unit), None)
+        self._last_seen.pop((device_id, unit), None)
+
+    def pop_expired(self, device_id: Optional[str] = None) -> List[Tuple[str, int, float]]:
+        """
+        Pop the units whose deadline passed; they are tracked again at their next refresh.
+        
+        Args:
+            device_id: Only pop the units of this device, or None for all devices
+        
+        Returns:
+            List[Tuple[str, int, float]]: (device ID, unit, seconds since last activity) per expired unit
+        """
+        expired = []
+        skipped = []
+        now = time.monotonic()
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            deadline, entry_device_id, unit = entry
+            key = (entry_device_id, unit)
+            # Skip entries superseded by a later refresh
+            if self._deadline.get(key) != deadline:
+                continue
+            if device_id is not None and entry_device_id != device_id:
+                skipped.append(entry)
+                continue
+            del self._deadline[key]
+            expired.append((entry_device_id, unit, now - self._last_seen.pop(key)))
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+        return expired
+
+
+# Shared staleness tracker fed by update_device and touch_device
+staleness_tracker = StalenessTracker()
+
 def dump_config_to_log(parameters: Dict[str, str], devices: DeviceCollection) -> None:
     """
     Dump plugin parameters and device information to the debug log.
@@ -93,7 +302,7 @@ def update_device(
     
     # Get device and unit if they exist
     if not (device := devices.get(device_id)) or not (unit_obj := device.Units.get(unit)):
-        Domoticz.Debug(f'Device with DeviceID/Unit {device_id}/{unit} does not exist... No update done...')
+        log.debug('Device with DeviceID/Unit %s/%s does not exist... No update done...', device_id, unit)
         return False
 
     # Use current values if new ones not provided
@@ -133,8 +342,18 @@ def update_device(
     # Clear timeout status if device was in timeout
     if device.TimedOut:
         device.TimedOut = 0
+    if getattr(unit_obj, 'TimedOut', 0):
+        unit_obj.TimedOut = 0
+
+    # Move the staleness deadline of the unit (unused units are not monitored)
+    if unit_obj.Used:
+        staleness_tracker.refresh(device_id, unit)
+    else:
+        staleness_tracker.forget(device_id, unit)
 
-    Domoticz.Debug(f'Request to update device with AlwaysUpdate={always_update}; DeviceID={device_id}; Unit={unit}; nValue={n_value}; sValue={s_value}; others={kwargs}. Updates done: standard={_update_standard}, properties={_update_properties}, options={_update_options}. Seconds since last update: {seconds_since_last_update(devices, device_id, unit)}')
+    log.debug('Request to update device with AlwaysUpdate=%s; DeviceID=%s; Unit=%s; nValue=%s; sValue=%s; others=%s. Updates done: standard=%s, properties=%s, options=%s. Seconds since last update: %s',
+              always_update, device_id, unit, n_value, s_value, kwargs, _update_standard, _update_properties, _update_options,
+              Lazy(seconds_since_last_update, devices, device_id, unit))
         
     return _update_standard or _update_properties or _update_options
 
@@ -160,39 +379,53 @@ def timeout_device(devices: DeviceCollection, device_id: Optional[str] = None, t
             Domoticz.Debug(f'Device ID {device_id} set to timeout {bool(timed_out)}.')
 
 
+def timeout_unit(devices: DeviceCollection, device_id: str, unit: int, timed_out: int = DomoticzConstants.TIMEDOUT) -> None:
+    """
+    Set a single unit to timed-out status (the whole device if units have no timeout status).
+    
+    Args:
+        devices: Dictionary of devices
+        device_id: ID of the device
+        unit: Unit number within the device
+        timed_out: Timeout value to set (default: TIMEDOUT constant)
+    """
+    if (device := devices.get(device_id)) and (unit_obj := device.Units.get(unit)):
+        if hasattr(unit_obj, 'TimedOut'):
+            if unit_obj.TimedOut != timed_out:
+                unit_obj.TimedOut = timed_out
+                log.debug('Unit %s/%s set to timeout %s.', device_id, unit, bool(timed_out))
+        else:
+            timeout_device(devices, device_id=device_id, timed_out=timed_out)
+
+
 def check_activity_units_and_timeout(
     devices: DeviceCollection, 
     seconds_last_update_required: int, 
     device_id: Optional[str] = None
-) -> List[str]:
+) -> List[Dict[str, Any]]:
     """
-    Check all devices of a hardware if there was recent activity and timeout if not.
+    Time out the units without recent activity.
+    
+    Only the units whose staleness deadline expired are visited (see StalenessTracker);
+    units without specific TTL use seconds_last_update_required from their next update.
     
     Args:
         devices: Dictionary of devices
-        seconds_last_update_required: Maximum seconds since last update before timing out
+        seconds_last_update_required: Default maximum seconds since last update before timing out
         device_id: Specific device ID to check, or None for all devices
     
     Returns:
-        List[str]: Names of timed out devices
+        List[Dict[str, Any]]: Name and seconds since last update of the timed out units
     """
-    timed_out_devices = []
-    
-    if device_id is None:
-        # Check all devices
-        for device_name, device in devices.items():
-            for unit_number, unit in device.Units.items():
-                if unit.Used and (sec := seconds_since_last_update(devices, device.DeviceID, unit_number)) > seconds_last_update_required:
-                    timeout_device(devices, device_id=device.DeviceID)
-                    timed_out_devices.append({'Name': unit.Name, 'Seconds': sec})
-    elif device := devices.get(device_id):
-        # Check specified device
-        for unit_number, unit in device.Units.items():
-            if unit.Used and (sec := seconds_since_last_update(devices, device_id, unit_number)) > seconds_last_update_required:
-                timeout_device(devices, device_id=device_id)
-                timed_out_devices.append({'Name': unit.Name, 'Seconds': sec})
-                
-    return timed_out_devices
+    timed_out_units = []
+    staleness_tracker.default_ttl = seconds_last_update_required
+
+    for expired_device_id, unit, seconds in staleness_tracker.pop_expired(device_id):
+        if (unit_obj := get_unit(devices, expired_device_id, unit)) and unit_obj.Used:
+            timeout_unit(devices, expired_device_id, unit)
+            timed_out_units.append({'Name': unit_obj.Name, 'Seconds': seconds})
+
+    return timed_out_units
 
 
 def touch_device(devices: DeviceCollection, device_id: str, unit: int) -> None:
@@ -206,6 +439,8 @@ def touch_device(devices: DeviceCollection, device_id: str, unit: int) -> None:
     """
     if (device := devices.get(device_id)) and (unit_obj := device.Units.get(unit)):
         unit_obj.Touch()
+        if unit_obj.Used:
+            staleness_tracker.refresh(device_id, unit)
 
 
 def get_device_s_value(devices: DeviceCollection, device_id: str, unit: int) -> Optional[str]:
@@ -553,8 +788,9 @@ DomoticzAPI = domoticz_api
 
 # Define the module's public API for better IDE support
 __all__ = [
-    'DomoticzConstants', 'TIMEDOUT', 'MINUTE',
-    'dump_config_to_log', 'update_device', 'timeout_device',
+    'DomoticzConstants', 'TIMEDOUT', 'MINUTE', 'DomoticzLogger', 'log',
+    'StalenessTracker', 'staleness_tracker',
+    'dump_config_to_log', 'update_device', 'timeout_device', 'timeout_unit',
     'check_activity_units_and_timeout', 'touch_device', 'get_device_s_value',
     'get_device_n_value', 'get_unit', 'seconds_since_last_update',
     'date_string_to_datetime', 'get_config_item_db', 'set_config_item_db',
@@ -33,7 +33,9 @@ License: MIT
         <p>The following parameters are required for initial plugin setup:</p>
         <ul>
             <li><b>BMW CarData Client_id</b>: The unique value obtained from the MyBMW portal after creating the CarData Client.</li>
-            <li><b>Vehicle Identification Number (VIN)</b>: The full, 17-character VIN of your BMW vehicle, used to identify the specific car to monitor.</li>
+            <li><b>Vehicle Identification Number (VIN)</b>: The full, 17-character VIN of your BMW vehicle, used to identify the specific car to monitor. Several vehicles of the same BMW account are monitored by one hardware instance when their VINs are separated by a comma.</li>
+            <li><b>Device Update Delay (ms)</b>: Time window used to collect data received together before the Domoticz devices are updated.</li>
+            <li><b>Token Storage</b>: Tokens stored in the Domoticz database. When the short-lived tokens are stored as well, a restart of the plugin connects to BMW CarData immediately without a new authentication round trip.</li>
             <li><b>Update Interval (Minutes)</b>: Defines the maximum frequency (in minutes) at which the plugin will check for new data, provided information is made available by the BMW CarData service.</li>
             <li><b>Debug Level</b>: Sets the logging verbosity. Higher levels provide more diagnostic information for troubleshooting purposes.</li>
         </ul>
@@ -41,7 +43,15 @@ License: MIT
     </description>
     <params>
         <param field="Mode1" label="BMW CarData Client_id" width="200px" required="true" default=""/>
-        <param field="Mode2" label="Vehicle Identification Number (VIN)" width="200px" required="true" default=""/>
+        <param field="Mode2" label="Vehicle Identification Number (VIN)" width="400px" required="true" default=""/>
+        <param field="Mode3" label="Device Update Delay (ms)" width="120px" required="false" default="500"/>
+        <param field="Mode4" label="Token Storage" width="250px">
+            <options>
+                <option label="Refresh token only" value="0"/>
+                <option label="All tokens (fast restart)" value="1"/>
+                <option label="All tokens, obfuscated (fast restart)" value="2" default="true"/>
+            </options>
+        </param>
         <param field="Mode5" label="Min. Update Interval (Minutes)" width="120px" required="true" default="30"/>
         <param field="Mode6" label="Debug Level" width="120px">
             <options>
@@ -62,21 +72,37 @@ import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
 from enum import IntEnum, Enum, auto
 import base64
+import bisect
+import gzip
 import hashlib
+import lzma
 import secrets
 import urllib.parse
 import json
+import random
+import statistics
+import threading
 import time
-from typing import Any, Dict, List, Type, Union, Tuple
-from datetime import datetime, timedelta
+from collections import deque
+from typing import Any, Callable, Deque, Dict, FrozenSet, Iterable, List, Set, Type, Union, Tuple
+from datetime import date, datetime, timedelta
 import paho.mqtt.client as mqtt
+# Optional fast JSON decoders (the standard library is used if none is installed)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ujson
+except ImportError:
+    ujson = None
 
 import DomoticzEx as Domoticz
 from domoticzEx_tools import (
-    DomoticzConstants, dump_config_to_log, update_device, get_unit,
+    dump_config_to_log, update_device, get_unit,
     get_config_item_db, set_config_item_db, erase_config_item_db,
     get_device_n_value, smart_convert_string, timeout_device,
-    get_distance, check_activity_units_and_timeout, touch_device
+    get_distance, check_activity_units_and_timeout, log, Lazy, staleness_tracker
 )
 
 class UnitIdentifiers(IntEnum):
@@ -125,7 +151,8 @@ class AuthenticationData:
     """Store Authentication data (shared state)"""
     state_machine: int = Authenticate.INIT
     client_id: str = None
-    vin: str = None
+    vin: str = None # First vehicle of the fleet
+    vins: List[str] = []
     code_verifier: str = None
     device_code: str = None
     expires_in: int = None
@@ -136,13 +163,19 @@ class API(IntEnum):
     CREATE_CONTAINER = auto()
     DELETE_CONTAINER = auto()
     GET_CONTAINER = auto()
-    LIST_CONTAINER = auto()
     ERROR = auto()
 
 class APIData:
     """Store API data (shared state)"""
     state_machine: int = API.GET_CONTAINER
-    container_id: Dict[str, Any] = None
+
+class MqttState(IntEnum):
+    """State machine of the MQTT connection (teardown runs in the background)"""
+    IDLE = auto()
+    CONNECTING = auto()
+    CONNECTED = auto()
+    DISCONNECTING = auto()
+    RECONNECT_PENDING = auto()
 
 # Default image for devices
 _IMAGE = 'Bmw'
@@ -153,6 +186,210 @@ _STREAMING_KEY_FILE = 'Bmw_keys_streaming.json'
 # Filename to indicate to reset quota
 _RESET_FILE = 'hardware_reset.txt'
 
+# Filename to activate the adaptive polling policy (experimental)
+_ADAPTIVE_POLLING_FILE = 'adaptive_polling.txt'
+
+# Filename to activate the recording of the MQTT messages (content: gzip or lzma) and name of the trace file
+_RECORD_FILE = 'mqtt_record.txt'
+_TRACE_FILE = 'mqtt_trace.jsonl'
+
+# Token storage (Mode4): which tokens are stored in the Domoticz database
+_TOKEN_STORAGE_REFRESH_ONLY = '0'
+_TOKEN_STORAGE_ALL = '1'
+_TOKEN_STORAGE_ALL_OBFUSCATED = '2'
+_TOKEN_OBFUSCATION_PREFIX = 'obf1:'
+
+# Heartbeat interval (seconds): kept short so MQTT data reaches the devices without waiting for the periodic update
+_HEARTBEAT_SEC = 1
+_MINUTE = 60 // _HEARTBEAT_SEC
+
+# Seconds without update before a unit is timed out; the lock status is only sent sporadically and times out after a day without data
+_UNIT_TIMEOUT_SEC = 7200
+_UNIT_TIMEOUT_SEC_SPECIFIC = {
+    UnitIdentifiers.CAR: 86400,
+}
+
+# Device groups of the configuration file, in the order the devices are updated
+_DEVICE_GROUPS = ('Mileage', 'Doors', 'Windows', 'Locked', 'Location', 'Driving',
+                  'RemainingRangeTotal', 'RemainingRangeElec', 'BatteryLevel', 'Charging', 'ChargingTime')
+
+# Expected values of the streaming keys of each device group: a type or the set of allowed values
+_GROUP_VALUES: Dict[str, Union[Type, FrozenSet[Any]]] = {
+    'Mileage': int,
+    'Doors': frozenset({'OPEN', 'CLOSED', True, False}),
+    'Windows': frozenset({'OPEN', 'INTERMEDIATE', 'CLOSED'}),
+    'Locked': frozenset({'SECURED', 'LOCKED', 'UNLOCKED', 'SELECTIVELOCKED'}),
+    'Location': float,
+    'Driving': bool,
+    'RemainingRangeTotal': int,
+    'RemainingRangeElec': int,
+    'BatteryLevel': int,
+    'Charging': frozenset({'NOCHARGING', 'INITIALIZATION', 'CHARGINGACTIVE', 'CHARGINGPAUSED', 'CHARGINGENDED', 'CHARGINGERROR'}),
+    'ChargingTime': int,
+}
+
+# Default coalescing window (milliseconds) between the arrival of new data and the device update
+_DEVICE_UPDATE_WINDOW_MS = 500
+
+class ValueConverter:
+    """
+    Typed converter and validator of the values of a device group (compiled once with the configuration).
+    The received value is converted to the expected type with a single conversion, and values of an enumeration
+    are checked with O(1) set membership. An invalid value raises ValueError.
+    """
+    __slots__ = ('expected', '_convert', '_allowed')
+
+    def __init__(self, expected: Union[Type, FrozenSet[Any]]) -> None:
+        self.expected: Union[Type, FrozenSet[Any]] = expected
+        self._allowed: Union[FrozenSet[Any], None] = expected if isinstance(expected, frozenset) else None
+        self._convert: Callable[[Any], Any] = self._to_enum if self._allowed is not None else {
+            int: self._to_int, float: self._to_float, bool: self._to_bool}[expected]
+
+    def __call__(self, value: Any) -> Any:
+        """Returns the typed value (a missing value stays None)."""
+        if value is None:
+            return None
+        value = self._convert(value)
+        try:
+            if self._allowed is not None and value not in self._allowed:
+                raise ValueError(f'{value!r} not in {sorted(map(str, self._allowed))}')
+        except TypeError:
+            raise ValueError(f'{value!r} is not a valid value')
+        return value
+
+    @staticmethod
+    def _to_int(value: Any) -> int:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        if isinstance(value, str):
+            try:
+                return int(value)
+            except ValueError:
+                pass
+            try:
+                value = float(value)
+            except ValueError:
+                pass
+        # Numbers with a fraction are not truncated
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        raise ValueError(f'{value!r} is not an integer')
+
+    @staticmethod
+    def _to_float(value: Any) -> float:
+        if isinstance(value, (int, float, str)) and not isinstance(value, bool):
+            return float(value)
+        raise ValueError(f'{value!r} is not a number')
+
+    @staticmethod
+    def _to_bool(value: Any) -> bool:
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.lower() in ('true', 'false'):
+            return value.lower() == 'true'
+        raise ValueError(f'{value!r} is not a boolean')
+
+    @staticmethod
+    def _to_enum(value: Any) -> Any:
+        if isinstance(value, str) and value.lower() in ('true', 'false'):
+            return value.lower() == 'true'
+        return value
+
+class StreamingKeyIndex:
+    """
+    Compiled form of the streaming keys of one vehicle in the configuration file.
+    Exact keys are kept in a hash map; wildcard keys (prefix*suffix) in a trie on their prefix, with the suffix
+    checked at the trie node. A received key is routed to its device group(s) in O(key length), once.
+    Each device group gets the typed converter of its values.
+    """
+    MAX_CACHED_ROUTES = 4096
+
+    def __init__(self, streaming_keys: Dict[str, Union[str, List[str]]]) -> None:
+        """Compiles the streaming keys (device group -> key or list of keys) into the index."""
+        self._exact: Dict[str, List[Tuple[str, int]]] = {}
+        self._trie: Dict[Any, Any] = {}
+        self._routes: Dict[str, Tuple[Tuple[str, int], ...]] = {}
+        # Device groups configured with wildcard keys only (no exact key tells if data of the group was received)
+        self.wildcard_groups: Set[str] = set()
+        self.converters: Dict[str, ValueConverter] = {
+            group: ValueConverter(_GROUP_VALUES[group]) for group in streaming_keys if group in _GROUP_VALUES
+        }
+
+        for group, keys in streaming_keys.items():
+            if isinstance(keys, str):
+                keys = [keys]
+            elif not isinstance(keys, list):
+                continue
+            # The position of the key in the configuration determines the order of the values of a device group
+            for position, key in enumerate(keys):
+                if '*' in key:
+                    prefix, suffix = key.split('*', 1)
+                    node: Dict[Any, Any] = self._trie
+                    for char in prefix:
+                        node = node.setdefault(char, {})
+                    # None is used as marker for the wildcard keys ending at this node
+                    node.setdefault(None, []).append((suffix, group, position))
+                else:
+                    self._exact.setdefault(key, []).append((group, position))
+            if keys and all('*' in key for key in keys):
+                self.wildcard_groups.add(group)
+
+    @property
+    def exact_keys(self) -> Iterable[str]:
+        """Returns the configured exact (non-wildcard) keys."""
+        return self._exact.keys()
+
+    def route(self, key: str) -> Tuple[Tuple[str, int], ...]:
+        """Returns the (device group, position) pairs the key belongs to; empty if the key is not configured."""
+        if (routes := self._routes.get(key)) is not None:
+            return routes
+
+        matches: List[Tuple[str, int]] = list(self._exact.get(key, ()))
+        node: Union[Dict[Any, Any], None] = self._trie
+        for char in key:
+            for suffix, group, position in node.get(None, ()):
+                if key.endswith(suffix):
+                    matches.append((group, position))
+            if (node := node.get(char)) is None:
+                break
+        else:
+            for suffix, group, position in node.get(None, ()):
+                if key.endswith(suffix):
+                    matches.append((group, position))
+
+        routes = tuple(matches)
+        if len(self._routes) >= self.MAX_CACHED_ROUTES:
+            self._routes.clear()
+        self._routes[key] = routes
+        return routes
+
+class TelemetryRecord:
+    """
+    Compact record of the most recent value of a CarData key: the value is converted to its typed form once at ingest,
+    the unit string is interned (shared by all records with the same unit).
+    """
+    __slots__ = ('value', 'unit', 'timestamp')
+
+    def __init__(self, value: Any, unit: Union[str, None], timestamp: float) -> None:
+        self.value: Any = value
+        self.unit: Union[str, None] = unit
+        self.timestamp: float = timestamp
+
+    @classmethod
+    def from_entry(cls, entry: Any, timestamp: float, converter: Union[ValueConverter, None] = None) -> 'TelemetryRecord':
+        """
+        Creates the record of a decoded CarData entry ({'value': ..., 'unit': ..., 'timestamp': ...}) with the typed
+        converter of the key (raises ValueError for an invalid value); without converter the type is guessed.
+        """
+        convert: Callable[[Any], Any] = converter or smart_convert_string
+        if not isinstance(entry, dict):
+            return cls(convert(entry), None, timestamp)
+        unit: Any = entry.get('unit', None)
+        return cls(convert(entry.get('value', None)), sys.intern(unit) if isinstance(unit, str) else None, timestamp)
+
+    def __repr__(self) -> str:
+        return f"{self.value!r}{' ' + self.unit if self.unit else ''}@{self.timestamp:.0f}"
+
 class CarMovementHandler:
     """Detects if the car is currently moving based on location and time stamps."""
     VELOCITY_THRESHOLD_MPS = 2
@@ -192,12 +429,12 @@ class CarMovementHandler:
         # Prevent division by zero if timestamps are identical (or too close)
         if delta_t < 2: 
             return "MOVEMENT_STATUS_SAME" # Not enough time passed to measure movement
-        Domoticz.Debug(f'Calculate distance with last location {self.last_coord} and current location {location}')
+        log.debug('Calculate distance with last location %s and current location %s', self.last_coord, location)
         delta_d: float = get_distance(self.last_coord, location, unit='m')
 
         # Calculate Velocity
         self.velocity = delta_d / delta_t # Meters per second (MPS)
-        Domoticz.Debug(f'delta_t={delta_t}; delta_d={delta_d}; self.velocity={self.velocity}')
+        log.debug('delta_t=%s; delta_d=%s; self.velocity=%s', delta_t, delta_d, self.velocity)
 
         # Update state for the next cycle
         self.last_coord = location
@@ -229,32 +466,257 @@ class CarMovementHandler:
                     self.is_currently_moving = True
                     return "MOVING (Traffic Jam/Long Red Light)"
 
+class Vehicle:
+    """
+    State shard of one vehicle of the fleet: streaming key configuration, routed keys, device groups
+    with pending data, source timestamps of the keys (merge order and freshness), movement detection and the
+    Domoticz device it is shown on. Only the configured keys are accepted at ingest; the retained records are capped
+    (least recently updated keys are evicted first).
+    """
+    MAX_RETAINED_KEYS = 256
+
+    def __init__(self, vin: str, device_id: str, name: str) -> None:
+        """Initializes the shard of the vehicle without streaming keys."""
+        self.vin: str = vin
+        self.device_id: str = device_id
+        self.name: str = name
+        self.streaming_keys: Dict[str, Any] = {}
+        self.key_index: StreamingKeyIndex = StreamingKeyIndex({})
+        # Received keys per device group (key -> position in the configuration), filled at ingest
+        self.routed_keys: Dict[str, Dict[str, int]] = {}
+        # Device groups with data not yet pushed to the devices
+        self.dirty: Set[str] = set()
+        self.full_update: bool = True
+        self.last_data_received: float = 0
+        # Most recent record of each key, shared with the values not yet consumed by a device update: its source timestamp
+        # is the merge order and freshness index, its unit the last known unit (least recently updated key first)
+        self.latest: Dict[str, TelemetryRecord] = {}
+        # Received values discarded by the merge (older than the known value, or already merged)
+        self.discarded_older: int = 0
+        self.discarded_duplicates: int = 0
+        # Received keys not in the configuration (dropped at ingest) and retained keys evicted because of the cap
+        self.dropped_keys: int = 0
+        self.evicted_keys: int = 0
+        # Values rejected by the converter of their device group (device group -> count)
+        self.rejected_values: Dict[str, int] = {}
+        self.mov_handler: CarMovementHandler = CarMovementHandler()
+
+    def configure(self, streaming_keys: Dict[str, Any]) -> None:
+        """Compiles the streaming keys of the vehicle; all devices are updated at the next device update."""
+        self.streaming_keys = streaming_keys
+        self.key_index = StreamingKeyIndex(streaming_keys)
+        self.routed_keys = {}
+        self.full_update = True
+
+    def route(self, keys: Any) -> None:
+        """Registers the keys with the device groups they belong to and marks these groups dirty."""
+        for key in keys:
+            for group, position in self.key_index.route(key):
+                self.routed_keys.setdefault(group, {})[key] = position
+                self.dirty.add(group)
+
+    def merge(self, values: Dict[str, TelemetryRecord], data: Dict[str, Any]) -> Dict[str, TelemetryRecord]:
+        """
+        Merges received values into the values of the vehicle in the order of their source timestamp. Values older than
+        the known value and duplicates (QoS 1 redeliveries, API data already streamed) are discarded.
+        Values without a (valid) timestamp cannot be ordered and are always accepted. The values are stored as typed
+        TelemetryRecords under the interned key string. Returns the accepted records.
+        """
+        accepted: Dict[str, TelemetryRecord] = {}
+        for key, entry in data.items():
+            if not (routes := self.key_index.route(key)):
+                self.dropped_keys += 1
+                continue
+            timestamp: float = self.parse_timestamp(entry.get('timestamp') if isinstance(entry, dict) else None)
+            known: Union[TelemetryRecord, None] = self.latest.get(key)
+            if timestamp and known is not None:
+                if timestamp < known.timestamp:
+                    self.discarded_older += 1
+                    continue
+                if timestamp == known.timestamp:
+                    self.discarded_duplicates += 1
+                    continue
+            # Converted and validated once, with the converter of the (first) device group of the key
+            group: str = routes[0][0]
+            try:
+                record: TelemetryRecord = TelemetryRecord.from_entry(entry, timestamp, self.key_index.converters.get(group))
+            except ValueError as e:
+                self.rejected_values[group] = self.rejected_values.get(group, 0) + 1
+                log.error('%s: Streaming key %s defined in %s for %s gives an invalid value (%s).', self.vin, key, _STREAMING_KEY_FILE, group, e,
+                          site=f'invalid-{group}', interval=3600)
+                continue
+            if known is not None:
+                # A value without timestamp or unit keeps the ones of the known value (merge order, unit of the device)
+                record.timestamp = record.timestamp or known.timestamp
+                record.unit = record.unit or known.unit
+            # One string object per key for all vehicles and messages (the decoded key is a new string every time)
+            key = sys.intern(key)
+            # Reinserted: the order of the dictionaries is the order of the last update (eviction order)
+            self.latest.pop(key, None)
+            self.latest[key] = record
+            values.pop(key, None)
+            values[key] = record
+            accepted[key] = record
+        if accepted:
+            self._evict(values)
+        return accepted
+
+    def _evict(self, values: Dict[str, TelemetryRecord]) -> None:
+        """Evicts the least recently updated keys above MAX_RETAINED_KEYS (with their value if not consumed yet)."""
+        while len(self.latest) > self.MAX_RETAINED_KEYS:
+            key: str = next(iter(self.latest))
+            del self.latest[key]
+            values.pop(key, None)
+            self.evicted_keys += 1
+
+    def unit_of(self, key: str, default: str) -> str:
+        """Returns the last known unit of the key (kept when the value is consumed by a device update)."""
+        record: Union[TelemetryRecord, None] = self.latest.get(key)
+        return record.unit if record is not None and record.unit else default
+
+    def memory_bytes(self, values: Dict[str, TelemetryRecord]) -> int:
+        """Returns the approximate memory (bytes) held for the vehicle: the retained records and the values not yet consumed."""
+        # The values share the records of the latest values; keys and units are interned (shared): counted once
+        size: int = sys.getsizeof(values) + sys.getsizeof(self.latest)
+        size += sum(sys.getsizeof(key) + sys.getsizeof(record) + sys.getsizeof(record.value) + sys.getsizeof(record.timestamp)
+                    for key, record in self.latest.items())
+        return size
+
+    @staticmethod
+    def parse_timestamp(value: Any) -> float:
+        """Converts a CarData timestamp (ISO 8601, eg. '2025-01-01T12:00:00.000Z') to epoch; 0 if invalid."""
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+        except (AttributeError, ValueError):
+            return 0
+
+    @property
+    def stalest_key_timestamp(self) -> float:
+        """
+        Returns the timestamp of the configured key with the oldest value. A configured key without value (never received
+        or evicted) and a wildcard-only device group without any received key count as stale (0).
+        """
+        if any(key not in self.latest for key in self.key_index.exact_keys):
+            return 0
+        received_groups: Set[str] = set()
+        stalest: float = float('inf')
+        for key, record in self.latest.items():
+            if routes := self.key_index.route(key):
+                received_groups.update(group for group, _ in routes)
+                stalest = min(stalest, record.timestamp)
+        if stalest == float('inf') or not self.key_index.wildcard_groups <= received_groups:
+            return 0
+        return stalest
+
+class ArrivalHistogram:
+    """
+    Time-of-day profile of the MQTT activity of one vehicle, separately for workdays and weekends.
+    Per 30-minute bin it keeps the (exponentially averaged) fraction of days with MQTT messages in that bin.
+    """
+    BINS = 48
+    SMOOTHING = 0.25 # Weight of the most recent day
+    MAX_CATCH_UP_DAYS = 30
+
+    def __init__(self, state: Union[Dict[str, Any], None] = None) -> None:
+        """Initializes the histogram, optionally from its persisted state."""
+        state = state or {}
+        self.probability: List[List[float]] = [[float(p) for p in row] for row in state.get('p', [])]
+        if len(self.probability) != 2 or any(len(row) != self.BINS for row in self.probability):
+            self.probability = [[0.0] * self.BINS, [0.0] * self.BINS]
+        self.day: int = state.get('day', 0)
+        self.hits: Set[int] = set(state.get('hits', []))
+        self.changed: bool = False
+
+    @classmethod
+    def bin_of(cls, moment: datetime) -> int:
+        """Returns the bin of the time of day."""
+        return (moment.hour * 60 + moment.minute) * cls.BINS // 1440
+
+    @staticmethod
+    def _row_of(day: int) -> int:
+        """Returns the profile of the day: 0 = workday, 1 = weekend."""
+        return int(date.fromordinal(day).weekday() >= 5)
+
+    def record(self, moment: datetime) -> None:
+        """Registers MQTT activity at the given moment."""
+        self._roll(moment.toordinal())
+        if (index := self.bin_of(moment)) not in self.hits:
+            self.hits.add(index)
+            self.changed = True
+
+    def _roll(self, day: int) -> None:
+        """Folds the activity of the previous day(s) into the averages when a new day starts."""
+        if day == self.day:
+            return
+        if self.day:
+            for past_day in range(max(self.day, day - self.MAX_CATCH_UP_DAYS), day):
+                # Only the first day has activity, the others (no MQTT messages received) were silent
+                hits: Set[int] = self.hits if past_day == self.day else set()
+                row: int = self._row_of(past_day)
+                self.probability[row] = [(1 - self.SMOOTHING) * p + self.SMOOTHING * (index in hits)
+                                         for index, p in enumerate(self.probability[row])]
+        self.day = day
+        self.hits = set()
+        self.changed = True
+
+    def activity(self, moment: datetime) -> float:
+        """Returns the predicted probability of MQTT activity at the given moment."""
+        return self.probability[self._row_of(moment.toordinal())][self.bin_of(moment)]
+
+    @property
+    def state(self) -> Dict[str, Any]:
+        """Returns the compact state to persist."""
+        return {'p': [[round(p, 3) for p in row] for row in self.probability], 'day': self.day, 'hits': sorted(self.hits)}
+
 class PollingHandler:
     """Manages the API polling quota using a sliding 24-hour window."""
     DAILY_QUOTA = 50
     RESERVED_CALLS = 5
     # The sliding window duration in seconds (24 hours)
     WINDOW_SIZE_SEC = 86400 
-
-    def __init__(self, parent_plugin: Any) -> None:
-        """Initializes the Polling Manager."""
+    # Minimum time between two checkpoints of the quota ledger to the Domoticz database
+    CHECKPOINT_INTERVAL_SEC = 60
+    # Predicted probability of MQTT activity above which a period is considered active
+    ACTIVE_THRESHOLD = 0.3
+    # Maximum postponement of a call planned in a period with predicted MQTT activity
+    MAX_DEFERRAL_SEC = 7200
+
+    def __init__(self, parent_plugin: Any, clock: Callable[[], float] = time.time) -> None:
+        """Initializes the Polling Manager (the clock can be replaced, e.g. for simulations)."""
         self.parent = parent_plugin
-        # Store timestamps of calls made in the last 24 hours
-        self._timestamps: List[float] = []
-        self._next_api_call_time: datetime = datetime.now()
+        self._clock: Callable[[], float] = clock
+        # Minimum interval between API calls defined by the user (Mode5)
+        self.min_interval_sec: int = 3600
+        # Store timestamps of calls made in the last 24 hours (sorted, oldest first)
+        self._timestamps: Deque[float] = deque()
+        self._next_api_call_time: datetime = self._now()
+        # Checkpointing of the ledger (survives a crash of Domoticz)
+        self._ledger_changed: bool = False
+        self._last_checkpoint: float = 0
+        # Adaptive polling: plan API calls in periods without predicted MQTT activity (experimental; off by default as the
+        # postponed calls leave the data older in the worst case when the predicted activity does not come, see tool_quota_simulator.py)
+        self.adaptive: bool = False
+        self._histograms: Dict[str, ArrivalHistogram] = {}
+        # Due calls skipped because all configured keys were still fresh
+        self.calls_skipped_fresh: int = 0
         
+    def _now(self) -> datetime:
+        """Returns the current time of the clock as datetime."""
+        return datetime.fromtimestamp(self._clock())
+
     def load_state(self, force_cold: bool = False) -> None:
         """Loads persistent state. If empty, estimates today's usage to prevent API bans."""
 
         if not force_cold:
             state = get_config_item_db(key='polling_handler', default={})
-            self._timestamps = state.get('timestamps', [])
+            self._timestamps = deque(sorted(state.get('timestamps', [])))
+            self._histograms = {vin: ArrivalHistogram(histogram) for vin, histogram in state.get('histograms', {}).items()}
 
         if not self._timestamps:
             # COLD START: We have no history. Let's estimate usage to be safe.
             # We assume we already used the 'fair share' for the time passed today.
-            now = time.time()
-            seconds_since_midnight = (datetime.now() - datetime.now().replace(hour=0, minute=0, second=0)).total_seconds()
+            now = self._clock()
+            seconds_since_midnight = (self._now() - self._now().replace(hour=0, minute=0, second=0)).total_seconds()
             
             # Calculate how many calls 'should' have been made by now
             fair_share_count = int((seconds_since_midnight / 86400) * (self.DAILY_QUOTA - self.RESERVED_CALLS))
@@ -263,7 +725,8 @@ class PollingHandler:
             for i in range(fair_share_count):
                 # Spread them backwards from now
                 offset = (i + 1) * (seconds_since_midnight / max(1, fair_share_count))
-                self._timestamps.append(now - offset)
+                self._timestamps.appendleft(now - offset)
+            self._ledger_changed = True
             
             Domoticz.Status(f"Cold plugin start: estimated {fair_share_count} API calls already made today to stay safe.")
 
@@ -281,23 +744,44 @@ class PollingHandler:
 
     def _save_state(self) -> None:
         """Internal method to save timestamps to the Domoticz database."""
-        set_config_item_db(key='polling_handler', value={'timestamps': self._timestamps})
+        set_config_item_db(key='polling_handler', value={
+            'timestamps': list(self._timestamps),
+            'histograms': {vin: histogram.state for vin, histogram in self._histograms.items()}
+        })
+        self._ledger_changed = False
+        for histogram in self._histograms.values():
+            histogram.changed = False
+        self._last_checkpoint = self._clock()
 
     def save_state(self) -> None:
         """Public method to save state on plugin stop."""
         self._save_state()
 
+    def checkpoint(self, force: bool = False) -> None:
+        """Saves the ledger if it changed since the last checkpoint (at most once per CHECKPOINT_INTERVAL_SEC unless forced)."""
+        changed: bool = self._ledger_changed or any(histogram.changed for histogram in self._histograms.values())
+        if changed and (force or self._clock() - self._last_checkpoint >= self.CHECKPOINT_INTERVAL_SEC):
+            self._save_state()
+
     def force_cold_start(self) -> None:
         """Public method to ignore the data in the hardware settings."""
-        self._timestamps = []
+        self._timestamps = deque()
         self.load_state(force_cold=True)
 
+    def _add_timestamp(self, timestamp: float) -> None:
+        """Adds a timestamp to the ledger, keeping it sorted (appending in the normal case)."""
+        if not self._timestamps or timestamp >= self._timestamps[-1]:
+            self._timestamps.append(timestamp)
+        else:
+            self._timestamps.insert(bisect.bisect_right(self._timestamps, timestamp), timestamp)
+        self._ledger_changed = True
+
     def set_quota_exhausted(self) -> None:
         """
         Force the internal state to 'exhausted' if the BMW API returns a quota error.
         This syncs our plugin with the actual server state.
         """
-        now = time.time()
+        now = self._clock()
         current_count = len(self._timestamps)
         needed_to_fill = self.DAILY_QUOTA - current_count
         
@@ -305,33 +789,52 @@ class PollingHandler:
             # Fill the list with timestamps from 'now'
             # This ensures we wait until these dummy timestamps start dropping out of the 24h window
             for _ in range(needed_to_fill):
-                self._timestamps.append(now)
-            self._timestamps.sort() # Ensure they are in order
+                self._add_timestamp(now)
             self._calculate_next_time_call(force_update=True)
+            self.checkpoint(force=True)
 
             Domoticz.Debug("BMW API reported quota exhausted. Internal state synchronized to MAX. "
                            f"Next call attempt at: {self._next_api_call_time}")
 
     def _prune_old_timestamps(self) -> None:
-        """Removes timestamps that are older than the 24-hour window."""
-        cutoff = time.time() - self.WINDOW_SIZE_SEC
-        self._timestamps = sorted([ts for ts in self._timestamps if ts > cutoff])
+        """Removes timestamps that are older than the 24-hour window (oldest first, amortised O(1))."""
+        cutoff = self._clock() - self.WINDOW_SIZE_SEC
+        while self._timestamps and self._timestamps[0] <= cutoff:
+            self._timestamps.popleft()
 
     def register_api_call(self) -> None:
         """Registers a new API call and updates the schedule."""
         self._prune_old_timestamps()
-        self._timestamps.append(time.time())
+        self._add_timestamp(self._clock())
         self._calculate_next_time_call(force_update=True)
 
-        Domoticz.Debug(f"API call registered. {len(self._timestamps)} calls in window. "
-                       f"Next call: {self._next_api_call_time}")
+        log.debug('API call registered. %s calls in window. Next call: %s', len(self._timestamps), self._next_api_call_time)
 
-    def register_mqtt_update(self) -> None:
-        """Postpones the next call because fresh data was received via MQTT."""
+    def register_mqtt_update(self, vins: Iterable[str] = ()) -> None:
+        """Postpones the next call because fresh data was received via MQTT (and learns the activity pattern of the vehicles)."""
+        now: datetime = self._now()
+        for vin in vins:
+            if vin not in self._histograms:
+                self._histograms[vin] = ArrivalHistogram()
+            self._histograms[vin].record(now)
         self._prune_old_timestamps()
         self._calculate_next_time_call(force_update=True)
 
-        Domoticz.Debug(f"MQTT update received. Next API call postponed to {self._next_api_call_time}")
+        log.debug('MQTT update received. Next API call postponed to %s', self._next_api_call_time)
+
+    def defer_while_fresh(self, stalest_key_ts: float) -> bool:
+        """
+        Skips a due call when the values of all configured keys are newer than the minimum interval (Mode5): the call is
+        postponed to the moment the stalest key goes stale. Returns True if the call is deferred.
+        """
+        now: float = self._clock()
+        stale_at: float = min(stalest_key_ts, now) + self.min_interval_sec
+        if stale_at <= now:
+            return False
+        self._next_api_call_time = datetime.fromtimestamp(stale_at)
+        self.calls_skipped_fresh += 1
+        log.debug('All configured keys are fresh. API call deferred to %s (%s calls skipped).', self._next_api_call_time, self.calls_skipped_fresh)
+        return True
 
     @property
     def next_call_time(self) -> datetime:
@@ -366,7 +869,7 @@ class PollingHandler:
         force_update=True: Always resets the timer (use after API call or MQTT).
         force_update=False: Only updates if a new slot opens up earlier (use in Heartbeat).
         """
-        now_ts = time.time()
+        now_ts = self._clock()
 
         # --- SAFETY LOCK ---
         # If we are in a regular update (not forced) and the timer has already 
@@ -381,7 +884,7 @@ class PollingHandler:
         to_spread = max(0, available - self.RESERVED_CALLS)
 
         # Minimum interval defined by user (e.g., 5 or 10 minutes)
-        min_interval_sec = int(Parameters.get('Mode5', 60)) * 60
+        min_interval_sec = self.min_interval_sec
         
         if to_spread > 0:
             # 1. Determine the 'active' period. 
@@ -410,7 +913,11 @@ class PollingHandler:
             # This allows the interval to shrink (go faster) if we have many calls left,
             # but never faster than the user-defined min_interval_sec.
             interval_sec = max(min_interval_sec, dynamic_interval)
-            potential_time = datetime.now() + timedelta(seconds=interval_sec)
+            potential_time = self._now() + timedelta(seconds=interval_sec)
+
+            # 4. Streamed data is likely fresh in periods with predicted MQTT activity: postpone the call to a silent period
+            if self.adaptive:
+                potential_time = self._avoid_predicted_activity(potential_time)
         
         elif self._timestamps:
             # AUTOMATIC BUDGET EXHAUSTED: Even if available > 0, we are at the reserve limit.
@@ -419,41 +926,313 @@ class PollingHandler:
             potential_time = datetime.fromtimestamp(reset_at_ts)
             
             # Safety: If for some reason the reset time is in the past, don't stall
-            if potential_time <= datetime.now():
-                potential_time = datetime.now() + timedelta(seconds=min_interval_sec)            
+            if potential_time <= self._now():
+                potential_time = self._now() + timedelta(seconds=min_interval_sec)            
 
         else:
             # Should not happen with sliding window, but as a safety fallback:
             interval_sec = max(min_interval_sec, 3600)
-            potential_time = datetime.now() + timedelta(seconds=interval_sec)
+            potential_time = self._now() + timedelta(seconds=interval_sec)
 
         # Apply update logic to prevent time drifting
         if ( force_update or 
-             self._next_api_call_time <= datetime.now() or 
+             self._next_api_call_time <= self._now() or 
              potential_time < self._next_api_call_time ):
             self._next_api_call_time = potential_time
+
+    def _is_predicted_active(self, moment: datetime) -> bool:
+        """Checks if MQTT activity is predicted for any vehicle at the moment (or just after it)."""
+        # Data of a call just before the activity starts is superseded soon as well: look ahead one bin
+        lookahead: datetime = moment + timedelta(seconds=86400 // ArrivalHistogram.BINS)
+        return any(max(histogram.activity(moment), histogram.activity(lookahead)) >= self.ACTIVE_THRESHOLD
+                   for histogram in self._histograms.values())
+
+    def _avoid_predicted_activity(self, planned: datetime) -> datetime:
+        """
+        Postpones a call planned in a period with predicted MQTT activity to the start of the next silent period.
+        The call is never advanced (quota safe) and postponed by at most MAX_DEFERRAL_SEC.
+        """
+        if not self._histograms:
+            return planned
+
+        bin_sec: int = 86400 // ArrivalHistogram.BINS
+        limit: datetime = planned + timedelta(seconds=self.MAX_DEFERRAL_SEC)
+        candidate: datetime = planned
+        while candidate <= limit:
+            if not self._is_predicted_active(candidate):
+                return candidate
+            # Continue at the start of the next bin
+            seconds_of_day: int = candidate.hour * 3600 + candidate.minute * 60 + candidate.second
+            candidate += timedelta(seconds=bin_sec - seconds_of_day % bin_sec, microseconds=-candidate.microsecond)
+        return planned
         
+class IngestQueue:
+    """
+    Bounded single-producer/single-consumer queue between the paho network thread and the Domoticz thread.
+    The MQTT thread only appends decoded messages; the heartbeat drains them in one batch. Appending to and
+    popping from a deque are atomic operations, so no lock is required. When the queue is full, the oldest
+    message is dropped (most recent telemetry wins) and counted.
+    """
+    MAX_DEPTH = 1000
+
+    def __init__(self, max_depth: int = MAX_DEPTH) -> None:
+        self.max_depth: int = max_depth
+        self._queue: Deque[Tuple[float, str, Dict[str, Any]]] = deque(maxlen=max_depth)
+        # Counters written by the producer (MQTT thread) only
+        self.enqueued: int = 0
+        self.dropped: int = 0
+        self.high_water: int = 0
+        # Counter written by the consumer (Domoticz thread) only
+        self.drained: int = 0
+
+    def put(self, received_at: float, vin: str, data: Dict[str, Any]) -> None:
+        """Producer side: enqueue a decoded message (called from the MQTT thread)."""
+        depth: int = len(self._queue)
+        if depth >= self.max_depth:
+            self.dropped += 1
+        self._queue.append((received_at, vin, data))
+        self.enqueued += 1
+        if depth + 1 > self.high_water:
+            self.high_water = depth + 1
+
+    def drain(self) -> List[Tuple[float, str, Dict[str, Any]]]:
+        """Consumer side: take all messages queued so far in one batch (called from the Domoticz thread)."""
+        batch: List[Tuple[float, str, Dict[str, Any]]] = []
+        # Only take what is queued now; messages arriving during the drain are for the next batch
+        for _ in range(len(self._queue)):
+            try:
+                batch.append(self._queue.popleft())
+            except IndexError:
+                break
+        self.drained += len(batch)
+        return batch
+
+    @property
+    def depth(self) -> int:
+        """Returns the number of messages waiting to be drained."""
+        return len(self._queue)
+
+    @property
+    def stats(self) -> str:
+        """Returns the queue counters as string for logging purpose."""
+        return (f'depth={self.depth}/{self.max_depth}; high_water={self.high_water}; '
+                f'enqueued={self.enqueued}; drained={self.drained}; dropped={self.dropped}')
+
+class PayloadDecoder:
+    """
+    Pluggable JSON decoder of the MQTT payloads and API responses: orjson or ujson when installed, otherwise the
+    standard library. orjson and ujson decode the bytes directly (no intermediate str); the standard library gets
+    the UTF-8 decoded str (faster than letting json.loads detect the encoding). Invalid JSON raises ValueError.
+    """
+    BACKENDS = ('orjson', 'ujson', 'json')
+
+    def __init__(self, backend: Union[str, None] = None) -> None:
+        """Selects the given backend, or the fastest one available."""
+        self.name: str = backend or self.available()[0]
+        if self.name not in self.available():
+            raise ValueError(f'JSON decoder {self.name} is not available')
+        self.loads: Callable[[Union[bytes, str]], Any] = {
+            'orjson': orjson.loads if orjson else None,
+            'ujson': ujson.loads if ujson else None,
+            'json': self._json_loads,
+        }[self.name]
+
+    @staticmethod
+    def _json_loads(payload: Union[bytes, str]) -> Any:
+        return json.loads(payload.decode() if isinstance(payload, (bytes, bytearray)) else payload)
+
+    @classmethod
+    def available(cls) -> List[str]:
+        """Returns the installed backends, fastest first."""
+        installed: Dict[str, Any] = {'orjson': orjson, 'ujson': ujson, 'json': json}
+        return [backend for backend in cls.BACKENDS if installed[backend] is not None]
+
+    def decode_message(self, payload: bytes) -> Tuple[Union[str, None], Dict[str, Any]]:
+        """Decodes an MQTT payload and extracts only the VIN and the CarData keys ('data')."""
+        message: Any = self.loads(payload)
+        if not isinstance(message, dict):
+            raise ValueError('payload is not a JSON object')
+        return message.get('vin', None), message.get('data', None) or {}
+
+class TraceRecorder:
+    """
+    Append-only recorder of the raw MQTT messages (receive time, topic and payload) in a compressed trace file, to
+    reproduce incidents and benchmark the ingest path offline (tool_replay_trace.py). The trace holds one JSON object
+    per line; it is rotated after MAX_BYTES (uncompressed), keeping BACKUPS older files. Payloads that are not UTF-8
+    are stored base64 encoded. Thread safe: messages are recorded by the paho network thread(s).
+    """
+    MAX_BYTES = 20 * 1024 * 1024
+    BACKUPS = 3
+    COMPRESSIONS: Dict[str, Tuple[str, Callable[..., Any]]] = {'gzip': ('.gz', gzip.open), 'lzma': ('.xz', lzma.open)}
+
+    def __init__(self) -> None:
+        self._lock: threading.Lock = threading.Lock()
+        self._file: Any = None
+        self._opener: Callable[..., Any] = gzip.open
+        self.path: Union[str, None] = None
+        self.written: int = 0
+        self.recorded: int = 0
+
+    @property
+    def active(self) -> bool:
+        """Returns True if messages are recorded."""
+        return self._file is not None
+
+    def start(self, folder: str, compression: str = 'gzip') -> None:
+        """Starts recording to the trace file in the folder (appended to an existing trace)."""
+        extension, opener = self.COMPRESSIONS.get(compression, self.COMPRESSIONS['gzip'])
+        with self._lock:
+            if self._file is not None:
+                return
+            self.path = f'{folder}{_TRACE_FILE}{extension}'
+            self._opener = opener
+            # The uncompressed size of an existing trace is unknown: its compressed size is a lower bound
+            self.written = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            self._file = opener(self.path, 'ab')
+
+    def stop(self) -> None:
+        """Stops recording and closes the trace file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def flush(self) -> None:
+        """Writes the buffered messages to the trace file (limits the loss on a crash)."""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def record(self, received_at: float, topic: str, payload: bytes) -> None:
+        """Appends a message to the trace file."""
+        record: Dict[str, Any] = {'t': received_at, 'topic': topic}
+        try:
+            record['payload'] = payload.decode('utf-8')
+        except UnicodeDecodeError:
+            record['payload64'] = base64.b64encode(payload).decode('ascii')
+        line: bytes = (json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8')
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line)
+            self.written += len(line)
+            self.recorded += 1
+            if self.written >= self.MAX_BYTES:
+                self._rotate()
+
+    def _rotate(self) -> None:
+        """Closes the trace file, shifts the older files (.1 is the most recent) and starts a new one (lock held)."""
+        self._file.close()
+        for index in range(self.BACKUPS - 1, 0, -1):
+            if os.path.exists(f'{self.path}.{index}'):
+                os.replace(f'{self.path}.{index}', f'{self.path}.{index + 1}')
+        os.replace(self.path, f'{self.path}.1')
+        self._file = self._opener(self.path, 'ab')
+        self.written = 0
+
+class SubscriptionPlanner:
+    """
+    Plans a minimal set of non-overlapping MQTT subscriptions for the vehicles of the fleet: one topic per VIN, or the
+    wildcard topic only if no VIN is configured. With MQTT 5 a message matching several subscriptions can be delivered
+    once per subscription; the planner counts the deliveries prevented compared to the legacy subscriptions (the
+    topic per VIN and the wildcard topic).
+    """
+
+    def __init__(self) -> None:
+        self.topics: List[str] = []
+        self.legacy: List[str] = []
+        # Topics subscribed in the broker session (None if unknown, eg. a session kept from before a restart)
+        self.subscribed: Union[Set[str], None] = None
+        # Written by the MQTT thread only
+        self.prevented_duplicates: int = 0
+        self._prevented_per_topic: Dict[str, int] = {}
+
+    @staticmethod
+    def matches(subscription: str, topic: str) -> bool:
+        """Checks if a topic matches a subscription (with the MQTT wildcards + and #)."""
+        levels: List[str] = topic.split('/')
+        for index, level in enumerate(subscription.split('/')):
+            if level == '#':
+                return True
+            if index >= len(levels) or (level != '+' and level != levels[index]):
+                return False
+        return len(levels) == len(subscription.split('/'))
+
+    def plan(self, username: str, vins: List[str]) -> List[str]:
+        """Plans the topics for the username (GCID) and the VINs of the fleet."""
+        self.topics = [f'{username}/{vin}' for vin in vins] or [f'{username}/+']
+        self.legacy = [f'{username}/{vin}' for vin in vins] + [f'{username}/+']
+        self._prevented_per_topic = {}
+        return self.topics
+
+    def changes(self, session_present: bool) -> Tuple[List[str], List[str]]:
+        """
+        Returns the topics to subscribe and to unsubscribe for a new connection. A kept session whose subscriptions
+        are unknown may still hold the legacy subscriptions: all planned topics are (re)subscribed, which is idempotent.
+        """
+        if not session_present:
+            return list(self.topics), []
+        if self.subscribed is None:
+            return list(self.topics), [topic for topic in self.legacy if topic not in self.topics]
+        return ([topic for topic in self.topics if topic not in self.subscribed],
+                [topic for topic in self.subscribed if topic not in self.topics])
+
+    def register_delivery(self, topic: str) -> None:
+        """Counts the duplicate deliveries of a received message prevented by the plan (called from the MQTT thread)."""
+        if (prevented := self._prevented_per_topic.get(topic)) is None:
+            planned: int = sum(self.matches(subscription, topic) for subscription in self.topics)
+            # A topic outside the plan (eg. delivered by subscriptions of an old session) prevents nothing
+            prevented = max(0, sum(self.matches(subscription, topic) for subscription in self.legacy) - planned) if planned else 0
+            self._prevented_per_topic[topic] = prevented
+        self.prevented_duplicates += prevented
+
 class MqttClientHandler:
     """
     Handles all MQTT logic for connecting to the BMW CarData streaming service.
     Requires access to parent's state variables for tokens, data storage, and control flow.
     """
     MQTT_KEEP_ALIVE = 45 # I found out by testing that BMW disconnects after 60 seconds if no keep_alive received.
-    THROTTLE_INTERVAL_SEC = 10 # Throttle timer from mqtt messages
     RECONNECTION_PAUSE_TIME_MIN = 15
     MQTT_MAX_INTERVAL_EXPECTED_MESSAGES = 3600*24
     MQTT_LOG = {16:'DEBUG', 1:'INFO', 2:'NOTICE', 8:'ERROR', 4:'WARNING'}
+    RECONNECT_DELAY_SEC = 1
+    ROTATION_TIMEOUT_SEC = 30
     
     def __init__(
         self, 
-        parent_plugin: Any
+        parent_plugin: Any,
+        decoder: PayloadDecoder,
+        clock: Callable[[], float] = time.time
         ) -> None:
-        """Initializes the MQTT handler with a reference to the main plugin."""
+        """
+        Initializes the MQTT handler with a reference to the main plugin and the JSON decoder of the payloads
+        (the clock of the receive times can be replaced, e.g. to replay a trace).
+        """
         self.parent = parent_plugin
+        self.decoder: PayloadDecoder = decoder
+        self._clock: Callable[[], float] = clock
         self.mqtt_client: Union[mqtt.Client, None] = None
-        self.time_last_message_received: datetime = datetime(1, 1, 1, 0, 0, 0) # Used for throttling
+        self.time_last_message_received: datetime = datetime(1, 1, 1, 0, 0, 0)
         self.time_next_connect_after_critical_disconnect = None
         self.connection_errors: int = 0
+        # Only channel between the paho network thread and the Domoticz thread
+        self.ingest_queue: IngestQueue = IngestQueue()
+        self.dropped_reported: int = 0
+        self.subscriptions: SubscriptionPlanner = SubscriptionPlanner()
+        self.recorder: TraceRecorder = TraceRecorder()
+        # Connection state machine; the teardown of a client (joining its network thread) never blocks the Domoticz thread
+        self.state: int = MqttState.IDLE
+        self._state_lock: threading.Lock = threading.Lock()
+        self._teardown_thread: Union[threading.Thread, None] = None
+        self._reconnect_at: float = 0
+        self._reconnect_requested_at: Union[float, None] = None
+        self.reconnect_durations: Deque[float] = deque(maxlen=100)
+        # Make-before-break rotation: the previous client stays connected until the new session is confirmed
+        self._retiring_client: Union[mqtt.Client, None] = None
+        self._retire_thread: Union[threading.Thread, None] = None
+        self._rotation_started: Union[float, None] = None
+        self._dark_since: Union[float, None] = None
+        self.rotation_gaps: Deque[float] = deque(maxlen=100)
 
     def is_mqtt_active(self) -> bool:
         """ Check if there was MQTT activity during the last time period """
@@ -461,9 +1240,10 @@ class MqttClientHandler:
         delta: int = (now - self.time_last_message_received).total_seconds()
         if delta < self.MQTT_MAX_INTERVAL_EXPECTED_MESSAGES:
             return True
-        if 0 < delta % self.MQTT_MAX_INTERVAL_EXPECTED_MESSAGES < 60:
-            if self.time_last_message_received > datetime(1, 1, 1, 0, 0, 0):
-                Domoticz.Status(f'No BMW MQTT CarData information was received since {self.time_last_message_received} (OAUTH2 internal state={AuthenticationData.state_machine}; MQTT Connected: {self.is_mqtt_connected()})!')
+        if self.time_last_message_received > datetime(1, 1, 1, 0, 0, 0):
+            log.status('No BMW MQTT CarData information was received since %s (OAUTH2 internal state=%s; MQTT Connected: %s)!',
+                       self.time_last_message_received, AuthenticationData.state_machine, self.is_mqtt_connected(),
+                       site='mqtt-inactive', interval=self.MQTT_MAX_INTERVAL_EXPECTED_MESSAGES)
         return False
 
     def is_mqtt_connected(self) -> bool:
@@ -489,30 +1269,31 @@ class MqttClientHandler:
             Domoticz.Debug("MQTT connection attempt already in progress, skipping this heartbeat cycle.")
             return False
 
+        # The previous client is still being torn down; the reconnect is scheduled by the heartbeat
+        if self.state == MqttState.DISCONNECTING:
+            Domoticz.Debug("MQTT teardown of previous connection still in progress, skipping this heartbeat cycle.")
+            return False
+
         # No MQTT credentials available; finish first authentication process
         if AuthenticationData.state_machine != Authenticate.DONE:
             Domoticz.Debug('MQTT cannot start because of none-complete authentication.')
             return False
 
         # Wait a period of time to make new connections if necessary.
-        Domoticz.Debug(f'self.time_next_connect_after_critical_disconnect={self.time_next_connect_after_critical_disconnect}.')
+        log.debug('self.time_next_connect_after_critical_disconnect=%s.', self.time_next_connect_after_critical_disconnect)
         if self.time_next_connect_after_critical_disconnect:
             if datetime.now() < self.time_next_connect_after_critical_disconnect:
                 Domoticz.Debug(f'Wait to connect to MQTT due to errors. Next connection at {self.time_next_connect_after_critical_disconnect}.')
                 # Safety check: stop loop if client exists during cooldown
-                client = getattr(self, 'mqtt_client', None)
-                if client:
-                    try:
-                        client.loop_stop()
-                    except:
-                        pass
+                if self.mqtt_client is not None:
+                    self.disconnect_mqtt()
                 return False
             else:
                 self.time_next_connect_after_critical_disconnect = None
 
         # Get username and password
         try:
-            Domoticz.Debug(f"Getting mqtt password from id_token {self.parent.tokens['id_token']}.")
+            log.debug('Getting mqtt password from id_token %s.', Lazy(lambda: self.parent.tokens['id_token']))
             id_token: str = self.parent.tokens['id_token']['token']
             username: str = self.parent.auth_handler.mqtt_username
         except (ValueError, KeyError) as e:
@@ -546,7 +1327,10 @@ class MqttClientHandler:
         try:
             connect_properties = mqtt.Properties(mqtt.PacketTypes.CONNECT)
             connect_properties.SessionExpiryInterval = 3600
-            Domoticz.Debug(f'Set up connection to MQTT broker with username {username} and password {id_token} (keep_alive={self.MQTT_KEEP_ALIVE}s)...')
+            log.debug('Set up connection to MQTT broker with username %s and password %s (keep_alive=%ss)...', username, id_token, self.MQTT_KEEP_ALIVE)
+            # Before the network thread starts: a fast CONNACK (onMqttConnect) must not be overwritten
+            with self._state_lock:
+                self.state = MqttState.CONNECTING
             self.mqtt_client.connect_async(CarDataURLs.MQTT_HOST, int(CarDataURLs.MQTT_PORT), keepalive=self.MQTT_KEEP_ALIVE, clean_start=False, properties=connect_properties)
             Domoticz.Debug('Start MQTT client loop...')
             self.mqtt_client.loop_start()
@@ -554,6 +1338,9 @@ class MqttClientHandler:
             return True
 
         except Exception as e:
+            with self._state_lock:
+                if self.state == MqttState.CONNECTING:
+                    self.state = MqttState.IDLE
             self.connection_errors += 1
             if self.connection_errors > 3:
                 self.time_next_connect_after_critical_disconnect = datetime.now() + timedelta(minutes=self.RECONNECTION_PAUSE_TIME_MIN)
@@ -564,40 +1351,116 @@ class MqttClientHandler:
         self, 
         reconnect: bool=False
         ) -> None:
-        """Disconnects from the MQTT broker and optionally attempts an immediate reconnect."""
+        """
+        Requests the disconnection from the MQTT broker and optionally a reconnect.
+        The client is torn down in a background thread; the heartbeat schedules the reconnect (see process_state).
+        """
 
         Domoticz.Debug(f'Call disconnect_mqtt() with reconnect={reconnect}...')
 
-        # Create a local reference to the client object.
-        # This prevents the object from becoming None mid-execution if another thread 
-        # (like an error handler) clears self.mqtt_client.
-        client = getattr(self, 'mqtt_client', None)
-        
-        if client is not None:
-            try:
-                # If the client is in a reconnection loop (e.g., bad credentials),
-                # loop_stop() is mandatory to kill the background thread.
-                if not client.is_connected():
-                    Domoticz.Debug("MQTT not connected, forcing loop_stop to kill background threads.")
-                    client.loop_stop()
-                else:
-                    # There is an active connection
-                    client.disconnect()         # 1. Initiate disconnect first. This signals the network thread to send the DISCONNECT packet and start running the onMqttDisconnect callback.
-                    time.sleep(0.2)             # 2. Wait briefly. This gives the background thread time to process the disconnect and fire the onMqttDisconnect callback
-                    client.loop_stop()          # 3. Explicitly stop the background loop thread. This call blocks and waits for the thread to fully exit (join), ensuring synchronous cleanup and preventing the Python interpreter shutdown race condition.
-                
-                # Crucial: Give Python interpreter time to free up thread resources
-                time.sleep(0.5)
-            except Exception as e:
-                Domoticz.Error(f"Error during MQTT disconnect: {e}")
-            finally:
-                # Safely clear the global reference
-                self.mqtt_client = None
+        with self._state_lock:
+            # Detach the client: from now on the callbacks of this client are not handled anymore
+            client: Union[mqtt.Client, None] = self.mqtt_client
+            self.mqtt_client = None
+            if not reconnect:
+                self._reconnect_requested_at = None
+            elif self._reconnect_requested_at is None:
+                self._reconnect_requested_at = time.monotonic()
+
+            if client is not None:
+                self.state = MqttState.DISCONNECTING
+                self._teardown_thread = threading.Thread(target=self._teardown, args=(client,), name='BMW-MQTT-teardown', daemon=True)
+                self._teardown_thread.start()
+            elif self.state != MqttState.DISCONNECTING:
+                self.state = MqttState.IDLE
+
+            if reconnect:
+                self._reconnect_at = time.monotonic() + self.RECONNECT_DELAY_SEC
+                if self.state == MqttState.IDLE:
+                    self.state = MqttState.RECONNECT_PENDING
+
+    def rotate_mqtt(
+        self
+        ) -> None:
+        """
+        Rotates the MQTT session after a token refresh (make-before-break): a new client with the same client id
+        resumes the persistent session (clean_start=False) and the previous client is only retired once the new
+        session is confirmed in onMqttConnect. Falls back to a disconnect/reconnect if no session is active.
+        """
+        if self.state != MqttState.CONNECTED or not self.is_mqtt_connected() or self._retiring_client is not None:
+            self.disconnect_mqtt(reconnect=True)
+            return
 
+        Domoticz.Debug('Rotating MQTT session (make-before-break)...')
+        with self._state_lock:
+            self._retiring_client = self.mqtt_client
+            self.mqtt_client = None
+            self._rotation_started = time.monotonic()
+            self._dark_since = None
+        if not self.connect_mqtt():
+            # New client could not be started: keep the current session
+            with self._state_lock:
+                self.mqtt_client = self._retiring_client
+                self._retiring_client = None
+                self._rotation_started = None
+                self.state = MqttState.CONNECTED
+
+    def _retire_client(
+        self
+        ) -> None:
+        """Tears down the previous client of a rotation in the background."""
+        with self._state_lock:
+            client: Union[mqtt.Client, None] = self._retiring_client
+            self._retiring_client = None
+            if client is not None:
+                self._retire_thread = threading.Thread(target=self._teardown, args=(client,), name='BMW-MQTT-retire', daemon=True)
+                self._retire_thread.start()
+
+    def _teardown(
+        self,
+        client: mqtt.Client
+        ) -> None:
+        """Disconnects the client and joins its network thread (background thread)."""
+        started: float = time.monotonic()
+        try:
+            # If the client is in a reconnection loop (e.g., bad credentials),
+            # loop_stop() is mandatory to kill the background thread.
+            if client.is_connected():
+                client.disconnect()         # 1. Initiate disconnect first. This signals the network thread to send the DISCONNECT packet.
+                time.sleep(0.2)             # 2. Give the network thread time to send the packet (only this background thread waits)
+            client.loop_stop()              # 3. Stop the network thread and wait for it to exit (join)
+        except Exception as e:
+            Domoticz.Error(f"Error during MQTT disconnect: {e}")
+        log.debug('MQTT client torn down in %.2fs.', time.monotonic() - started)
+
+    def is_tearing_down(self) -> bool:
+        """Checks if a client is still being torn down in the background."""
+        return any(thread is not None and thread.is_alive() for thread in (self._teardown_thread, self._retire_thread))
+
+    def process_state(self) -> None:
+        """Progresses the connection state machine (called every heartbeat on the Domoticz thread)."""
+        # New session of a rotation not confirmed in time: abandon it and keep the previous session
+        if self._rotation_started is not None and time.monotonic() - self._rotation_started > self.ROTATION_TIMEOUT_SEC:
+            Domoticz.Status(f'New BMW CarData MQTT session not confirmed within {self.ROTATION_TIMEOUT_SEC}s; keeping the current session.')
+            with self._state_lock:
+                self._rotation_started = None
+                abandoned: Union[mqtt.Client, None] = self.mqtt_client
+                self.mqtt_client, self._retiring_client = self._retiring_client, abandoned
+                # If the previous session is gone as well, the regular heartbeat connects again
+                self.state = MqttState.CONNECTED if self.is_mqtt_connected() else MqttState.IDLE
+            self._retire_client()
+
+        with self._state_lock:
+            if self.state == MqttState.DISCONNECTING and not self.is_tearing_down():
+                self._teardown_thread = None
+                self.state = MqttState.RECONNECT_PENDING if self._reconnect_requested_at is not None else MqttState.IDLE
+            reconnect: bool = self.state == MqttState.RECONNECT_PENDING and time.monotonic() >= self._reconnect_at
+            if reconnect:
+                self.state = MqttState.IDLE
         if reconnect:
-            # Short pause
-            time.sleep(1.0)
-            self.connect_mqtt()
+            if not self.connect_mqtt():
+                # Not possible yet (e.g. authentication or cooldown); the regular heartbeat connects later
+                self._reconnect_requested_at = None
 
     def onMqttConnect(
         self, 
@@ -609,25 +1472,47 @@ class MqttClientHandler:
         ) -> None:
         """MQTT connection callback. Subscribes to necessary topics upon successful connection."""
 
+        # Callback of a client that is not the current one (retired or abandoned)
+        with self._state_lock:
+            current: bool = client is self.mqtt_client
+            if current and rc == 0:
+                self.state = MqttState.CONNECTED
+        if not current:
+            Domoticz.Debug(f'Connect callback ({rc}) of previous MQTT client ignored.')
+            return
+
         # Success
         if rc == 0:
             #Domoticz.Status(f'Connected to MQTT broker successfully with userdata: {userdata} - flags: {flags} - rc: {rc} - properties: {properties}')
-            Domoticz.Debug(f'Connected to MQTT broker successfully with userdata: {userdata} - flags: {flags} - rc: {rc} - properties: {properties}')
-
-            if hasattr(flags, 'session_present') and flags.session_present:
+            log.debug('Connected to MQTT broker successfully with userdata: %s - flags: %s - rc: %s - properties: %s', userdata, flags, rc, properties)
+            if (requested_at := self._reconnect_requested_at) is not None:
+                self._reconnect_requested_at = None
+                self.reconnect_durations.append(time.monotonic() - requested_at)
+                log.debug('MQTT reconnected in %.2fs (disconnect requested -> connected).', self.reconnect_durations[-1])
+            if (rotation_started := self._rotation_started) is not None:
+                # Rotation confirmed: only now the previous session is retired
+                now: float = time.monotonic()
+                self._rotation_started = None
+                self.rotation_gaps.append(max(0.0, now - self._dark_since) if self._dark_since is not None else 0.0)
+                self._retire_client()
+                log.debug('MQTT session rotated in %.2fs; data gap %.2fs (session present: %s).', now - rotation_started,
+                          self.rotation_gaps[-1], getattr(flags, 'session_present', None))
+
+            # Non-overlapping subscriptions: a message is delivered once (no per-VIN topic next to the wildcard topic)
+            session_present: bool = bool(getattr(flags, 'session_present', False))
+            self.subscriptions.plan(self.parent.auth_handler.mqtt_username, AuthenticationData.vins)
+            subscribe, unsubscribe = self.subscriptions.changes(session_present)
+            if session_present and not (subscribe or unsubscribe):
                 Domoticz.Debug(f'Subscriptions were kept by BMW CarData MQTT broker: no need to resubscribe!')
-            else:
-                topic: str = f'{self.parent.auth_handler.mqtt_username}/{AuthenticationData.vin}'
+            for topic in unsubscribe:
+                client.unsubscribe(topic)
+                Domoticz.Debug(f'Request to unsubscribe from overlapping topic: {topic}')
+            for topic in subscribe:
                 client.subscribe(topic, qos=1)
                 Domoticz.Debug(f'Request to subscribe to topic: {topic} with QoS 1')
+            self.subscriptions.subscribed = set(self.subscriptions.topics)
 
-                wildcard_topic: str = f'{self.parent.auth_handler.mqtt_username}/+'
-                client.subscribe(wildcard_topic, qos=1)
-                Domoticz.Debug(f'Request to subscribe to wildcard topic: {wildcard_topic} with QoS 1')
-
-            expires_at: datetime = datetime.fromisoformat(self.parent.tokens['id_token']['expires_at'])
-            time_until_expiry: timedelta = expires_at - datetime.now()
-            Domoticz.Debug(f'ID token expires in: {time_until_expiry}')
+            log.debug('ID token expires in: %s', Lazy(lambda: timedelta(seconds=round(self.parent.auth_handler._expires_ts('id_token') - time.time()))))
 
         # Bad username/password, Not authorized, Quota exceeded
         elif rc in (134, 135, 151):
@@ -641,7 +1526,11 @@ class MqttClientHandler:
             # Clean up our own handler and set the error state
             self.disconnect_mqtt()
             Domoticz.Error(f'BMW CarData MQTT connection error ({rc}): refreshing tokens to reconnect...')
-            AuthenticationData.state_machine = Authenticate.ERROR
+            if rc in (134, 135):
+                # Handled by the token refresh coordinator on the Domoticz thread
+                self.parent.auth_handler.refresh_requested = f'MQTT connect rc={rc}'
+            else:
+                AuthenticationData.state_machine = Authenticate.ERROR
             
         else:
             self.time_next_connect_after_critical_disconnect = datetime.now() + timedelta(minutes=self.RECONNECTION_PAUSE_TIME_MIN)
@@ -661,29 +1550,25 @@ class MqttClientHandler:
         userdata: Dict[str, Any], 
         msg: mqtt.MQTTMessage
         ) -> None:
-        """MQTT message callback. Parses and stores received data into the plugin's state."""
+        """
+        MQTT message callback (paho network thread). Parses the message and hands it over to the ingest queue.
+        No plugin state is touched here: the queue is drained by the heartbeat on the Domoticz thread.
+        """
 
+        received_at: float = self._clock()
         try:
-            data: Dict[str, Any] = json.loads(msg.payload.decode())
-            Domoticz.Debug(f'Received message on {msg.topic}: {data}')
+            if self.recorder.active:
+                self.recorder.record(received_at, msg.topic, msg.payload)
+
+            vin, data = self.decoder.decode_message(msg.payload)
+            log.debug('Received message on %s for %s: %s', msg.topic, vin, data)
             
-            # Populate BMW Data structure with received information
-            vin: str = data.get('vin')
+            self.subscriptions.register_delivery(msg.topic)
             if vin:
-                if vin not in self.parent.bmwData:
-                    self.parent.bmwData[vin] = {}
-                for key, value in data.get('data', {}).items(): 
-                    self.parent.bmwData[vin][key] = value 
-
-            # Throttled Registration of MQTT update
-            now = datetime.now()
-            if (now - self.time_last_message_received).total_seconds() > self.THROTTLE_INTERVAL_SEC:
-                self.time_last_message_received = now
-                self.parent.polling_handler.register_mqtt_update()
-                #Domoticz.Status('BMW CarData MQTT data received (throttling!)...')
-
-        except json.JSONDecodeError:
-            Domoticz.Debug(f'Received non-JSON message: {msg.payload.decode()}')
+                self.ingest_queue.put(received_at, vin, data)
+
+        except ValueError:
+            log.debug('Received non-JSON message: %s', msg.payload)
         except Exception as e:
             Domoticz.Debug(f'Error processing message: {e}')
 
@@ -710,6 +1595,18 @@ class MqttClientHandler:
         ) -> None:
         """MQTT disconnect callback. Handles clean disconnects and token expiration detection."""
 
+        # The broker hands the session over to the new client of a rotation: retire the previous client
+        if client is self._retiring_client:
+            Domoticz.Debug(f'Previous MQTT session taken over by the new client ({rc}).')
+            self._dark_since = time.monotonic()
+            self._retire_client()
+            return
+
+        # Disconnect of a client that was already detached (torn down in the background)
+        if client is not self.mqtt_client:
+            Domoticz.Debug(f'Disconnection of previous MQTT client ({rc}).')
+            return
+
         # Check for clean disconnect (rc=0) 
         if rc == 0:
             #Domoticz.Status(f'Normal disconnection from MQTT broker ({rc})')
@@ -726,7 +1623,9 @@ class MqttClientHandler:
             #Domoticz.Status(f'Disconnection from MQTT broker ({rc}): possible token expiration - checking token validity...')
             Domoticz.Debug(f'Disconnection from MQTT broker ({rc}): possible token expiration - checking token validity...')
             if self.parent.auth_handler._is_token_expired('id_token'):
-                Domoticz.Debug('ID token has expired, will refresh on next connection attempt')
+                Domoticz.Debug('ID token has expired, requesting a token refresh')
+                self.parent.auth_handler.refresh_requested = f'MQTT disconnect rc={rc}'
+
         else:
             ReasonString = None
             ServerReference = None
@@ -751,14 +1650,67 @@ class MqttClientHandler:
         ) -> None:
         """MQTT Log callback. Handles the logging at MQTT level."""
 
-        Domoticz.Debug(f"*** MQTT-LOG - Level {self.MQTT_LOG.get(level, 'UNKNOWN')} *** - {buf}")
+        log.debug('*** MQTT-LOG - Level %s *** - %s', self.MQTT_LOG.get(level, 'UNKNOWN'), buf)
 
 class OAuth2Handler:
     """Handles the entire OAuth2 Device Code Flow, token management, and authentication state."""
-
-    def __init__(self, parent_plugin: Any) -> None:
-        """Initializes the OAuth2 handler with a reference to the main plugin."""
+    # The refresh is scheduled this long (plus a random jitter) before the ID token expires
+    REFRESH_LEAD_SEC = 600
+    REFRESH_JITTER_SEC = 120
+    # Safety net: a token this close to its expiry is considered expired
+    EXPIRY_MARGIN_SEC = 300
+    # A refresh without answer within this period is not joined anymore by new triggers
+    REFRESH_TIMEOUT_SEC = 60
+
+    def __init__(self, parent_plugin: Any, decoder: PayloadDecoder) -> None:
+        """Initializes the OAuth2 handler with a reference to the main plugin and the JSON decoder of the responses."""
         self.parent = parent_plugin
+        self.decoder: PayloadDecoder = decoder
+        self.refresh_at: float = 0 # Deadline (epoch) of the scheduled token refresh; 0 if none
+        # Single-flight refresh: triggers during a refresh join it and their follow-up actions run once it succeeds
+        self.refresh_requested: Union[str, None] = None # Set by the MQTT thread, handled by the heartbeat
+        self._refresh_started: Union[float, None] = None
+        self._refresh_waiters: List[Callable[[], None]] = []
+        self.refreshes: int = 0
+        self.refreshes_coalesced: int = 0
+        self.token_storage: str = _TOKEN_STORAGE_ALL_OBFUSCATED
+
+    @property
+    def refresh_in_flight(self) -> bool:
+        """Checks if a token refresh round trip is in progress."""
+        return ( self._refresh_started is not None and
+                 AuthenticationData.state_machine == Authenticate.REFRESH_TOKEN and
+                 time.time() - self._refresh_started < self.REFRESH_TIMEOUT_SEC )
+
+    def request_refresh(self, reason: str, on_done: Union[Callable[[], None], None] = None) -> None:
+        """
+        Requests a token refresh; concurrent requests are coalesced into the refresh in flight.
+        on_done is called after the refresh succeeded (eg. to replay a request).
+        """
+        if self.refresh_in_flight:
+            self.refreshes_coalesced += 1
+            if on_done:
+                self._refresh_waiters.append(on_done)
+            log.debug('Token refresh requested (%s): joining the refresh in flight.', reason)
+            return
+
+        # Follow-up actions of a failed refresh are dropped
+        self._refresh_waiters = [on_done] if on_done else []
+        self._refresh_started = time.time()
+        self.refreshes += 1
+        Domoticz.Debug(f'Token refresh requested ({reason}).')
+        self._start_refresh()
+
+    def _finish_refresh(self, success: bool) -> None:
+        """Ends the refresh in flight and runs the follow-up actions if successful."""
+        waiters: List[Callable[[], None]] = self._refresh_waiters
+        self._refresh_waiters = []
+        self._refresh_started = None
+        if success:
+            for waiter in waiters:
+                waiter()
+        elif waiters:
+            Domoticz.Debug(f'Token refresh failed: {len(waiters)} follow-up action(s) dropped.')
     
     def on_connect(self) -> None:
         """Callback from BasePlugin when the OAuth2 connection is established."""
@@ -770,8 +1722,8 @@ class OAuth2Handler:
         
         status: Union[str, None] = data.get('Status', None)
         try:
-            response_data: Dict[str, Any] = json.loads(data['Data'])
-        except (KeyError, json.JSONDecodeError):
+            response_data: Dict[str, Any] = self.decoder.loads(data['Data'])
+        except (KeyError, ValueError):
             Domoticz.Status(f"OAuth2 (internal state={AuthenticationData.state_machine}) response data invalid and neglected ({data}).")
             AuthenticationData.state_machine = Authenticate.ERROR
             return
@@ -796,13 +1748,13 @@ class OAuth2Handler:
                 else:
                     Domoticz.Debug('Not yet connected to BMW CarData MQTT... Start new connection!')
                     self.parent.mqtt_handler.connect_mqtt()
-                self.parent.runAgainOAuth = DomoticzConstants.MINUTE
+                self.parent.runAgainOAuth = _MINUTE
             elif status in ['400', '401', '403']:
                 error: str = response_data.get('error', '')
                 if error == 'authorization_pending':
                     self.parent.runAgainOAuth = AuthenticationData.interval // Domoticz.Heartbeat()
                 elif error == 'slow_down':
-                    AuthenticationData.interval += Domoticz.Heartbeat()
+                    AuthenticationData.interval += 5 # RFC 8628: increase the polling interval by 5 seconds
                     Domoticz.Debug('Request to slow down polling!')
                     self.parent.runAgainOAuth = AuthenticationData.interval // Domoticz.Heartbeat()
                 elif error == 'expired_token':
@@ -825,14 +1777,16 @@ class OAuth2Handler:
                 self._store_tokens(response_data)
                 Domoticz.Debug(f'Tokens refreshed successfully; reconnect MQTT... - tokens info: {self.tokens_expiry}')
                 if self.parent.mqtt_handler.is_mqtt_connected():
-                    Domoticz.Debug('Already connected to BMW CarData MQTT... Disconnect and reconnect!')
-                    self.parent.mqtt_handler.disconnect_mqtt(reconnect=True)
+                    Domoticz.Debug('Already connected to BMW CarData MQTT... Rotate the session!')
+                    self.parent.mqtt_handler.rotate_mqtt()
                 else:
                     Domoticz.Debug('Not yet connected to BMW CarData MQTT... Start new connection!')
                     self.parent.mqtt_handler.connect_mqtt()
-                self.parent.runAgainOAuth = DomoticzConstants.MINUTE
+                self.parent.runAgainOAuth = _MINUTE
+                self._finish_refresh(True)
             else:
                 Domoticz.Debug(f"Error refreshing tokens ({status}): {response_data}. Restarting authentication...")
+                self._finish_refresh(False)
                 AuthenticationData.state_machine = Authenticate.OAUTH2
                 self.authenticate()
 
@@ -848,7 +1802,7 @@ class OAuth2Handler:
             # Check for existing refresh tokens on startup
             if self._load_tokens():
                 Domoticz.Debug('Tokens found, checking validity and refreshing if needed.')
-                self._ensure_valid_id_token(force_update=True)
+                self.request_refresh('startup')
                 return True
             else:
                 Domoticz.Debug('Token refresh failed, proceeding with new authentication...')
@@ -886,7 +1840,7 @@ class OAuth2Handler:
                 else:
                     verification_uri_complete = DEVICE_CODE_LINK
                 AuthenticationData.expires_in = data['expires_in']
-                AuthenticationData.interval = data.get('interval', Domoticz.Heartbeat())
+                AuthenticationData.interval = data.get('interval', 10)
 
                 text: str = '\n' + '=' * 60
                 text += '\nBMW CarData Authentication Required'
@@ -950,16 +1904,16 @@ class OAuth2Handler:
         return code_verifier, code_challenge
 
     def _store_tokens(self, tokens: Dict[str, Any]) -> None:
-        """Store tokens and calculate their expiration timestamps."""
+        """Store tokens with their expiration instants (epoch 'expires_ts' and readable 'expires_at') and schedule the refresh."""
 
-        now: datetime = datetime.now()
+        now: float = time.time()
 
         # Store access token (in memory only, not persisted)
         if 'access_token' in tokens:
             expires_in: int = tokens.get('expires_in', 3600)
             self.parent.tokens['access_token'] = {
                 'token': tokens['access_token'],
-                'expires_at': (now + timedelta(seconds=expires_in)).isoformat(),
+                **self._expiry(now + expires_in),
                 'type': tokens.get('token_type', 'Bearer')
             }
 
@@ -967,7 +1921,7 @@ class OAuth2Handler:
         if 'refresh_token' in tokens:
             self.parent.tokens['refresh_token'] = {
                 'token': tokens['refresh_token'],
-                'expires_at': (now + timedelta(seconds=1209600)).isoformat()  # 2 weeks
+                **self._expiry(now + 1209600)  # 2 weeks
             }
 
         # Store ID token (in memory only, not persisted)
@@ -975,8 +1929,9 @@ class OAuth2Handler:
             expires_in: int = tokens.get('expires_in', 3600)
             self.parent.tokens['id_token'] = {
                 'token': tokens['id_token'],
-                'expires_at': (now + timedelta(seconds=expires_in)).isoformat()
+                **self._expiry(now + expires_in)
             }
+            self._schedule_refresh()
 
         # Store other data
         if 'gcid' in tokens:
@@ -986,6 +1941,32 @@ class OAuth2Handler:
 
         self._save_tokens_selective()
 
+    @staticmethod
+    def _expiry(expires_ts: float) -> Dict[str, Any]:
+        """Returns the expiration instant of a token as epoch (used for the checks) and as readable string."""
+        return {'expires_at': datetime.fromtimestamp(expires_ts).isoformat(), 'expires_ts': expires_ts}
+
+    def _expires_ts(self, token_key: str) -> Union[float, None]:
+        """Returns the expiration instant (epoch) of a token; tokens stored without it are parsed once."""
+        token: Dict[str, Any] = self.parent.tokens.get(token_key, {})
+        if 'expires_ts' not in token:
+            if 'expires_at' not in token:
+                return None
+            token['expires_ts'] = datetime.fromisoformat(token['expires_at']).timestamp()
+        return token['expires_ts']
+
+    def _schedule_refresh(self) -> None:
+        """Schedules the refresh of the tokens before the ID token expires (with jitter to spread the load)."""
+        if (expires_ts := self._expires_ts('id_token')) is None:
+            self.refresh_at = 0
+            return
+        self.refresh_at = expires_ts - self.REFRESH_LEAD_SEC - random.uniform(0, self.REFRESH_JITTER_SEC)
+        log.debug('Token refresh scheduled at %s.', Lazy(lambda: datetime.fromtimestamp(self.refresh_at)))
+
+    def refresh_due(self) -> bool:
+        """Checks if the scheduled token refresh deadline has passed (cheap; called every heartbeat)."""
+        return 0 < self.refresh_at <= time.time()
+
     @property
     def tokens_expiry(self) -> str:
         """Get the token informaton (without secret values) as string for debug purpose."""
@@ -1011,23 +1992,76 @@ class OAuth2Handler:
         """Checks ID token validity and triggers refresh or re-authentication if necessary."""
 
         if self._is_token_expired('id_token') or force_update:
-            if self._check_refresh_token():
-                Domoticz.Debug(f'Forced update ({force_update}) and/or ID token expired, refreshing using refresh token...')
-                AuthenticationData.state_machine = Authenticate.REFRESH_TOKEN
-            else:
-                Domoticz.Debug('ID token expired and cannot refresh, need new authentication')
-                AuthenticationData.state_machine = Authenticate.OAUTH2
-            self.authenticate()
+            self.request_refresh('forced' if force_update else 'ID token expired')
         else:
-            Domoticz.Debug(f"ID token still valid until {self.parent.tokens['id_token']['expires_at']} (complete token: {self.parent.tokens['id_token']})...")
+            log.debug('ID token still valid until %s (complete token: %s)...', self.parent.tokens['id_token']['expires_at'], self.parent.tokens['id_token'])
+
+    def _start_refresh(self) -> None:
+        """Starts the refresh round trip using the refresh token, or a new authentication if not possible."""
+        self.refresh_at = 0
+        if self._check_refresh_token():
+            Domoticz.Debug('Refreshing tokens using refresh token...')
+            AuthenticationData.state_machine = Authenticate.REFRESH_TOKEN
+        else:
+            Domoticz.Debug('ID token expired and cannot refresh, need new authentication')
+            self._finish_refresh(False)
+            AuthenticationData.state_machine = Authenticate.OAUTH2
+        self.authenticate()
+
+    def warm_start(self) -> bool:
+        """
+        Restores the authentication from the stored tokens if the ID and access tokens are still valid,
+        and connects to MQTT immediately (no refresh round trip). Returns False if a cold start is needed.
+        """
+        if self.token_storage == _TOKEN_STORAGE_REFRESH_ONLY or not self._load_tokens():
+            return False
+        if self._is_token_expired('id_token') or self._is_token_expired('access_token'):
+            Domoticz.Debug('Stored ID/access tokens expired: refreshing tokens...')
+            return False
+
+        AuthenticationData.state_machine = Authenticate.DONE
+        self._schedule_refresh()
+        Domoticz.Status(f"BMW CarData tokens restored (valid until {self.parent.tokens['id_token']['expires_at']}); starting BMW CarData MQTT connection...")
+        self.parent.mqtt_handler.connect_mqtt()
+        self.parent.runAgainOAuth = _MINUTE
+        return True
+
+    def _obfuscation_key(self, length: int) -> bytes:
+        """Returns the key stream to obfuscate the stored tokens (bound to the client_id and the plugin folder)."""
+        seed: str = f"{AuthenticationData.client_id}:{Parameters['HomeFolder']}"
+        return hashlib.shake_256(seed.encode('utf-8')).digest(length)
+
+    def _obfuscate(self, value: str) -> str:
+        """Obfuscates a token for storage (not an encryption: it only prevents plain-text tokens in the database)."""
+        data: bytes = value.encode('utf-8')
+        masked: bytes = bytes(a ^ b for a, b in zip(data, self._obfuscation_key(len(data))))
+        return _TOKEN_OBFUSCATION_PREFIX + base64.urlsafe_b64encode(masked).decode('ascii')
+
+    def _deobfuscate(self, value: str) -> Union[str, None]:
+        """
+        Restores a token obfuscated by _obfuscate (plain-text tokens are returned unchanged).
+        Returns None if the token cannot be restored (corrupt value, or another client_id or plugin folder).
+        """
+        if not isinstance(value, str) or not value.startswith(_TOKEN_OBFUSCATION_PREFIX):
+            return value
+        try:
+            masked: bytes = base64.urlsafe_b64decode(value[len(_TOKEN_OBFUSCATION_PREFIX):])
+            return bytes(a ^ b for a, b in zip(masked, self._obfuscation_key(len(masked)))).decode('utf-8')
+        except (ValueError, UnicodeDecodeError):
+            return None
 
     def _save_tokens_selective(self) -> None:
-        """Saves only persistent tokens (refresh token, gcid) to the Domoticz database."""
+        """Saves the persistent tokens (refresh token, gcid and, depending on Token Storage, the ID/access tokens) to the Domoticz database."""
 
         persistent_tokens: Dict[str, Any] = {}
         persistent_tokens['client_id'] = AuthenticationData.client_id
-        if 'refresh_token' in self.parent.tokens:
-            persistent_tokens['refresh_token'] = self.parent.tokens['refresh_token']
+        token_keys: Tuple[str, ...] = ('refresh_token',) if self.token_storage == _TOKEN_STORAGE_REFRESH_ONLY else ('refresh_token', 'access_token', 'id_token')
+        for token_key in token_keys:
+            if token_key in self.parent.tokens:
+                token: Dict[str, Any] = dict(self.parent.tokens[token_key])
+                if self.token_storage == _TOKEN_STORAGE_ALL_OBFUSCATED:
+                    token['token'] = self._obfuscate(token['token'])
+                persistent_tokens[token_key] = token
         if 'gcid' in self.parent.tokens:
             persistent_tokens['gcid'] = self.parent.tokens['gcid']
         if 'scope' in self.parent.tokens:
@@ -1042,22 +2076,29 @@ class OAuth2Handler:
         self.parent.tokens = get_config_item_db(key='tokens', default={})
         if self.parent.tokens:
             Domoticz.Debug(f'Tokens loaded from database: {self.parent.tokens}')
+            # The obfuscation key is bound to the client_id: check it before restoring the tokens
             if self.parent.tokens.get('client_id', '') != AuthenticationData.client_id:
                 Domoticz.Debug(f'Client_id changed: tokens from database do not correspond and will be erased!')
                 return False
+            for token_key in ('refresh_token', 'access_token', 'id_token'):
+                if 'token' in self.parent.tokens.get(token_key, {}):
+                    if (token := self._deobfuscate(self.parent.tokens[token_key]['token'])) is None:
+                        Domoticz.Status('Tokens from database could not be restored (plugin folder moved?): new authentication required.')
+                        self.parent.tokens = {}
+                        return False
+                    self.parent.tokens[token_key]['token'] = token
             return True
 
         Domoticz.Debug(f'Tokens not loaded from database.')
         return False
 
     def _is_token_expired(self, token_key: str) -> bool:
-        """Checks if a given token is expired or within the 8-minute pre-expiration window."""
+        """Checks if a given token is expired or within the pre-expiration window (EXPIRY_MARGIN_SEC)."""
 
-        if token_key not in self.parent.tokens or 'expires_at' not in self.parent.tokens[token_key]:
+        if (expires_ts := self._expires_ts(token_key)) is None:
             return True
 
-        expires_at: datetime = datetime.fromisoformat(self.parent.tokens[token_key]['expires_at'])
-        return datetime.now() + timedelta(minutes=10) >= expires_at
+        return time.time() + self.EXPIRY_MARGIN_SEC >= expires_ts
 
     @property
     def mqtt_username(self) -> str:
@@ -1067,13 +2108,142 @@ class OAuth2Handler:
             return self.parent.tokens['gcid']
         raise ValueError('GCID not available - authentication required')
 
+class ContainerCache:
+    """
+    Caches the metadata of the BMW CarData container (persisted in the Domoticz database).
+    The container is validated by the telematic data responses instead of listing the containers via the API;
+    the container management calls (create/delete) are kept for a week to report their share of the quota.
+    When the streaming keys change, the previous containers are kept as retiring until the new one is validated (blue/green).
+    """
+    # Period over which the container management calls are reported
+    LEDGER_SEC = 7 * 86400
+
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        """Initializes the (not yet loaded) cache."""
+        self._clock: Callable[[], float] = clock
+        self.metadata: Union[Dict[str, Any], None] = None
+        self.retiring: List[Dict[str, Any]] = []
+        self._calls: Deque[float] = deque()
+
+    def load(self) -> None:
+        """Loads the container metadata and the management call ledger from the database (once)."""
+        if self.metadata is None:
+            self.metadata = get_config_item_db(key='container', default={})
+            self.retiring = get_config_item_db(key='container_retiring', default=[])
+            self._calls = deque(sorted(get_config_item_db(key='container_calls', default=[])))
+
+    @property
+    def container_id(self) -> Union[str, None]:
+        """Returns the ID of the cached container."""
+        self.load()
+        return self.metadata.get('containerId', None)
+
+    @property
+    def key_hash(self) -> str:
+        """Returns the hash of the streaming keys the cached container was created with."""
+        self.load()
+        return self.metadata.get('hashContainerKeys', '')
+
+    @property
+    def validated(self) -> bool:
+        """Returns True if telematic data was received with the cached container."""
+        self.load()
+        return bool(self.metadata.get('validatedAt'))
+
+    @property
+    def retiring_id(self) -> Union[str, None]:
+        """Returns the ID of the next container to retire (None if there is none)."""
+        self.load()
+        return self.retiring[0].get('containerId', None) if self.retiring else None
+
+    def store(self, container: Dict[str, Any], key_hash: str) -> None:
+        """Caches a newly created container (not validated until telematic data is received with it); the current one becomes retiring."""
+        self.load()
+        if self.metadata.get('containerId'):
+            self.retiring.append(self.metadata)
+            self._save_retiring()
+        self.metadata = {**container, 'hashContainerKeys': key_hash}
+        set_config_item_db(key='container', value=self.metadata)
+
+    def rollback(self) -> bool:
+        """Switches back to the last retiring container (the new one was rejected); returns False if there is none."""
+        self.load()
+        if not self.retiring:
+            return False
+        self.metadata = self.retiring.pop()
+        set_config_item_db(key='container', value=self.metadata)
+        self._save_retiring()
+        return True
+
+    def retired(self, container_id: str) -> None:
+        """Forgets a retiring container (deleted, or no longer existing)."""
+        self.load()
+        self.retiring = [container for container in self.retiring if container.get('containerId', None) != container_id]
+        self._save_retiring()
+
+    def _save_retiring(self) -> None:
+        if self.retiring:
+            set_config_item_db(key='container_retiring', value=self.retiring)
+        else:
+            erase_config_item_db(key='container_retiring')
+
+    def validate(self) -> bool:
+        """Marks the container as valid after a successful telematic data request; returns True the first time."""
+        self.load()
+        if not self.metadata or self.metadata.get('validatedAt'):
+            return False
+        self.metadata['validatedAt'] = datetime.fromtimestamp(self._clock()).strftime('%Y-%m-%d %H:%M:%S')
+        set_config_item_db(key='container', value=self.metadata)
+        return True
+
+    def invalidate(self) -> None:
+        """Forgets the container (deleted, or no longer accessible)."""
+        self.metadata = {}
+        erase_config_item_db(key='container')
+
+    def register_call(self) -> None:
+        """Registers a container management call in the weekly ledger."""
+        self.load()
+        self._calls.append(self._clock())
+        self._prune_calls()
+        set_config_item_db(key='container_calls', value=list(self._calls))
+
+    def _prune_calls(self) -> None:
+        cutoff = self._clock() - self.LEDGER_SEC
+        while self._calls and self._calls[0] <= cutoff:
+            self._calls.popleft()
+
+    @property
+    def calls_last_week(self) -> int:
+        """Returns the number of container management calls made in the last 7 days."""
+        self.load()
+        self._prune_calls()
+        return len(self._calls)
+
 class CarDataAPIHandler:
     """Handles communication for the BMW CarData API (container creation and telematic polling)."""
+    # Delay before a failed container switch (create or retirement) is tried again
+    SWITCH_RETRY_SEC = 6 * 3600
 
-    def __init__(self, parent_plugin: Any) -> None:
-        """Initializes the API handler with a reference to the main plugin."""
+    def __init__(self, parent_plugin: Any, decoder: PayloadDecoder, clock: Callable[[], float] = time.time) -> None:
+        """
+        Initializes the API handler with a reference to the main plugin and the JSON decoder of the responses
+        (the clock can be replaced, e.g. for tests).
+        """
         self.parent = parent_plugin
+        self.decoder: PayloadDecoder = decoder
+        self._clock: Callable[[], float] = clock
         self.streaming_key_hash: str = '' # Stored when reading the JSON file...
+        self.polled_vin: Union[str, None] = None # Vehicle of the pending telematic data request
+        self.containers: ContainerCache = ContainerCache(clock)
+        # Blue/green switch of the container: container being deleted and the time a failed switch is tried again
+        self._deleting_id: Union[str, None] = None
+        self._switch_retry_at: float = 0
+        # Last request sent (with the API state it belongs to); replayed once after a token refresh on 401
+        self._last_request: Union[Tuple[int, Dict[str, Any]], None] = None
+        self._replaying: bool = False
+        self.replay_pending: bool = False
+        self.replays: int = 0
 
     def handle_message(self, data: Dict[str, Any]) -> None:
         """Routes message responses from the API connection based on the response status."""
@@ -1082,96 +2252,124 @@ class CarDataAPIHandler:
         response_data: Dict[str, Any] = {}
         try:
             if 'Data' in data:
-                response_data = json.loads(data['Data'])
-        except (KeyError, json.JSONDecodeError):
+                response_data = self.decoder.loads(data['Data'])
+        except (KeyError, ValueError):
             Domoticz.Debug(f"API response data invalid: {data}")
 
         # Correct answer on TelematicData
         if response_data and APIData.state_machine == API.GET_CONTAINER and status == '200':
-            Domoticz.Debug(f"Telematic data received: {response_data}")
+            log.debug('Telematic data received: %s', response_data)
             telematicData: Dict[str, Any] = response_data.get('telematicData', {})
+            if self.containers.validate():
+                Domoticz.Debug(f'BMW CarData container {self.containers.container_id} validated by telematic data response.')
             
             # Merge received data into the plugin's main data structure
-            vin: str = AuthenticationData.vin
-            if vin in self.parent.bmwData:
-                self.parent.bmwData[vin].update(telematicData)
-            else:
-                self.parent.bmwData[vin] = telematicData
+            self.parent.store_data(self.polled_vin or AuthenticationData.vin, telematicData)
+            self.parent.deviceUpdatePending.append(self._clock())
             
-            self.parent.api.Disconnect()
+            # The new container delivers data: retire the previous one(s)
+            if self.containers.retiring_id:
+                Domoticz.Status(f'BMW CarData container {self.containers.container_id} verified; retiring previous container {self.containers.retiring_id}.')
+                self._delete_container(self.containers.retiring_id)
+            else:
+                self.parent.api.Disconnect()
 
         # Successful container creation
         elif response_data and APIData.state_machine == API.CREATE_CONTAINER and status == '201':
             container: Dict[str, Any] = response_data
             container_keys: Dict[str] = container.pop('technicalDescriptors', None)
-            container['hashContainerKeys'] = self.streaming_key_hash
-            set_config_item_db(key='container', value=container)
-            APIData.container_id = container
+            self.containers.store(container, self.streaming_key_hash)
             Domoticz.Status(f'New container with BMW CarData keys created: {container} supporting the following CarData keys: {container_keys}.')
-            # List all existing containers
-            self._list_container()
-
-        # Successfully retrieved the list of containers
-        elif response_data and APIData.state_machine == API.LIST_CONTAINER and status == '200':
-            Domoticz.Debug(f"Container data received: {response_data}")
-            containerData: List[Dict] = response_data.get('containers', [])
-            Domoticz.Status(f'List of existing containers with BMW CarData keys: {containerData}')
-            # Get telematic data based on container
+            # Get telematic data based on the cached container (which validates it; no need to list the containers)
             self._get_telematic_data()
 
         # Correct answer on container deletion
         # status 208 and CU-122 is returned when containter is already set for deletion
         # Answer does not return any JSON data
         elif APIData.state_machine == API.DELETE_CONTAINER and (status == '204' or status == '208'):
-            erase_config_item_db(key='container')
-            APIData.container_id = None
-            # Create new container
-            self._create_container()
+            self._container_retired()
     
+        # Access token rejected: refresh the tokens (single flight) and replay the request once
+        elif status == '401' and self._last_request and not self._replaying:
+            Domoticz.Debug(f'BMW CarData API call not authorized (401, internal state={APIData.state_machine}): refreshing tokens to replay the request...')
+            self.parent.auth_handler.request_refresh('API 401', on_done=self._replay_after_refresh)
+
         # Application error is raised when the daily rate limit has been reached
         # exveErrorId="CU-429"; exveErrorMsg="API rate limit reached"
         elif response_data and status == '429':
             if response_data.get('exveErrorId', None) == 'CU-429':
-                Domoticz.Status(f'BMW CarData API messages received that quota is fully exhausted; overruling internal state ({self.parent.polling_handler.used_quota} API calls made last 24h).')
+                log.status('BMW CarData API messages received that quota is fully exhausted; overruling internal state (%s API calls made last 24h).',
+                           self.parent.polling_handler.used_quota, site='api-quota-exhausted', interval=3600)
                 self.parent.polling_handler.set_quota_exhausted()
 
         # Application error is raised when there is no access to the container
         # exveErrorId="CU-105"; exveErrorMsg="No permission for specified containerId"; exveNote="This application error is raised when access to the containerId used is not permitted. Reasons are that the containerId is not allocated to the user or it does not exist. Use the GET /customers/containers endpoint to retrieve the identifier."
         elif response_data and status == '403':
             if response_data.get('exveErrorId', None) == 'CU-105':
-                Domoticz.Status(f"BMW CarData API messages indicates problem with BMW CarData container access ({response_data.get('exveErrorMsg', None)}). Creating a new container...")
-                # Create new container
-                self._create_container()
+                # The retiring container does not exist anymore
+                if APIData.state_machine == API.DELETE_CONTAINER:
+                    self._container_retired()
+                # The new container is rejected before it delivered data: continue with the previous one
+                elif not self.containers.validated and self.containers.rollback():
+                    Domoticz.Status(f"BMW CarData API rejected the new container ({response_data.get('exveErrorMsg', None)}). "
+                                    f"Continuing with container {self.containers.container_id}; switch retried later.")
+                    self._switch_failed()
+                else:
+                    Domoticz.Status(f"BMW CarData API messages indicates problem with BMW CarData container access ({response_data.get('exveErrorMsg', None)}). Creating a new container...")
+                    # The cached container is no longer valid: create a new one
+                    self.containers.invalidate()
+                    self._create_container()
 
         # Errors not specifically handled
         else:
             if status in (500, ):
-                Domoticz.Status(f"BMW CarData API Error (rc={status} - internal state={APIData.state_machine}): {data}.")
+                log.status('BMW CarData API Error (rc=%s - internal state=%s): %s.', status, APIData.state_machine, data, site='api-error-500', interval=3600)
             else:
                 Domoticz.Error(f"BMW CarData API Error (rc={status} - internal state={APIData.state_machine}): {data}.")
-            # Reset state machine in case of error in listing container as the list of containers is only informative
-            if APIData.state_machine == API.LIST_CONTAINER:
-                APIData.state_machine = API.GET_CONTAINER
+            # A failed container switch keeps the current container
+            if APIData.state_machine in (API.CREATE_CONTAINER, API.DELETE_CONTAINER):
+                self._switch_failed()
+
+    def _container_retired(self) -> None:
+        """Forgets the deleted container and retires the next one (or closes the connection when done)."""
+        self.containers.retired(self._deleting_id)
+        Domoticz.Status(f'BMW CarData container {self._deleting_id} retired.')
+        self._deleting_id = None
+        if self.containers.retiring_id:
+            self._delete_container(self.containers.retiring_id)
+        else:
+            APIData.state_machine = API.GET_CONTAINER
+            self.parent.api.Disconnect()
+
+    def _switch_failed(self) -> None:
+        """Continues polling with the current container and postpones the container switch."""
+        self._switch_retry_at = self._clock() + self.SWITCH_RETRY_SEC
+        self._deleting_id = None
+        APIData.state_machine = API.GET_CONTAINER
+        self.parent.api.Disconnect()
 
     def poll_telematic_data(self) -> bool:
         """Checks for the container ID and either creates it or requests telematic data."""
         
-        # Load container ID if not in memory
-        if not APIData.container_id:
-            APIData.container_id = get_config_item_db(key='container', default={})
-            if not APIData.container_id:
-                # If still no ID, create the container
-                self._create_container()
-                return False
+        # Create the container if none is cached
+        if not self.containers.container_id:
+            self._create_container()
+            return False
 
-        # Verify if the streaming keys have changed and an update of the container is required
-        Domoticz.Debug(f"self.streaming_key_hash={self.streaming_key_hash} - APIData.container_id.get('hashContainerKeys', 0)={APIData.container_id.get('hashContainerKeys', 0)}")
-        if self.streaming_key_hash != APIData.container_id.get('hashContainerKeys', ''):
-            self.parent.bmwData[AuthenticationData.vin] = {}
+        # Verify if the streaming keys have changed and an update of the container is required (blue/green: the current
+        # container and data are kept until the new container delivered data; a failed switch is retried later)
+        log.debug('self.streaming_key_hash=%s - hashContainerKeys=%s', self.streaming_key_hash, self.containers.key_hash)
+        switch_allowed: bool = self._clock() >= self._switch_retry_at
+        if self.streaming_key_hash != self.containers.key_hash and switch_allowed:
             Domoticz.Status(f"Information in configuration file {_STREAMING_KEY_FILE} (hash={self.streaming_key_hash}) does not match "
-                            f"BMW CarData Container (ContainerId={APIData.container_id.get('containerId', None)}; "
-                            f"hash={APIData.container_id.get('hashContainerKeys', None)}). A new BMW CarData Container will be created...")
-            self._delete_container()
+                            f"BMW CarData Container (ContainerId={self.containers.container_id}; "
+                            f"hash={self.containers.key_hash}). A new BMW CarData Container will be created; the current one is kept until the new one delivers data...")
+            self._create_container()
+            return False
+
+        # Retire the containers left over from an interrupted switch
+        if self.containers.validated and self.containers.retiring_id and switch_allowed:
+            self._delete_container(self.containers.retiring_id)
             return False
 
         # Request telematic data if container ID is available
@@ -1179,16 +2377,17 @@ class CarDataAPIHandler:
         return True
 
     def get_all_streaming_keys(self) -> List[str]:
-        """Reads all unique streaming keys from the configuration file for the API container."""
+        """Reads all unique streaming keys of the vehicles of the fleet from the configuration file for the API container."""
         
         container_keys: List[str] = []
 
-        # Iterate over the values in the dictionary (parent.streamingKeys)
-        for value in self.parent.streamingKeys.values():
-            if isinstance(value, str):
-                container_keys.append(value)
-            elif isinstance(value, list):
-                container_keys.extend(value)
+        # Iterate over the values in the dictionaries (streaming keys of each vehicle); one container serves the fleet
+        for vehicle in self.parent.vehicles.values():
+            for value in vehicle.streaming_keys.values():
+                if isinstance(value, str):
+                    container_keys.append(value)
+                elif isinstance(value, list):
+                    container_keys.extend(value)
 
         sorted_key_string: str = str(tuple(sorted(set(container_keys))))
         self.streaming_key_hash = hashlib.sha256(sorted_key_string.encode('utf-8')).hexdigest()
@@ -1219,17 +2418,19 @@ class CarDataAPIHandler:
             }
 
             Domoticz.Debug('Create container with all known streaming keys.')
-            self.parent.api.Send( {'Verb':'POST', 'URL':CarDataURLs.CONTAINER_URI, 'Data':json.dumps(container_data), 'Headers':headers} )
+            self._send( {'Verb':'POST', 'URL':CarDataURLs.CONTAINER_URI, 'Data':json.dumps(container_data), 'Headers':headers} )
 
             # Register this as a successful API call
             self.parent.polling_handler.register_api_call()
+            self._register_container_call()
 
     def _delete_container(self, container_id: str = None) -> None:
-        """Sends an HTTP DELETE request to the BMW API to delete a CarData container."""
+        """Sends an HTTP DELETE request to the BMW API to delete a CarData container (by default the next retiring one)."""
 
         APIData.state_machine = API.DELETE_CONTAINER
 
-        del_container_id = container_id if container_id else APIData.container_id.get('containerId', None)
+        del_container_id = container_id if container_id else self.containers.retiring_id
+        self._deleting_id = del_container_id
 
         if del_container_id:
             headers: Dict[str, str] = {
@@ -1240,34 +2441,60 @@ class CarDataAPIHandler:
             }
 
             Domoticz.Debug(f'Delete container {del_container_id}.')
-            self.parent.api.Send( {'Verb':'DELETE', 'URL':f"{CarDataURLs.CONTAINER_URI.value}/{del_container_id}", 'Headers':headers} )
-
-            # Register this as a successful API call
-            self.parent.polling_handler.register_api_call()
-
-    def _list_container(self) -> None:
-        """Sends an HTTP GET request to the BMW API to receive a list of current CarData containers."""
-
-        APIData.state_machine = API.LIST_CONTAINER
-
-        if APIData.container_id:
-            headers: Dict[str, str] = {
-                'Host': CarDataURLs.API_HOST,
-                'Authorization': f"Bearer {self.parent.tokens['access_token']['token']}",
-                'x-version': CarDataURLs.API_VERSION,
-                'Accept': 'application/json'
-            }
-
-            Domoticz.Debug(f'List containers.')
-            self.parent.api.Send( {'Verb':'GET', 'URL':CarDataURLs.CONTAINER_URI, 'Headers':headers} )
+            self._send( {'Verb':'DELETE', 'URL':f"{CarDataURLs.CONTAINER_URI.value}/{del_container_id}", 'Headers':headers} )
 
             # Register this as a successful API call
             self.parent.polling_handler.register_api_call()
+            self._register_container_call()
+
+    def _register_container_call(self) -> None:
+        """Registers a container management call and reports the quota spent on container management."""
+        self.containers.register_call()
+        Domoticz.Status(f'BMW CarData container management used {self.containers.calls_last_week} API call(s) during the last 7 days.')
+
+    def _send(self, request: Dict[str, Any]) -> None:
+        """Sends a request on the API connection and keeps it for a replay."""
+        self._last_request = (APIData.state_machine, request)
+        self._replaying = False
+        self.parent.api.Send(request)
+
+    def _replay_after_refresh(self) -> None:
+        """Replays the last request after the tokens were refreshed (connecting first if needed)."""
+        self.replay_pending = True
+        if self.parent.api.Connected():
+            self.replay()
+        elif not self.parent.api.Connecting():
+            self.parent.api.Connect()
+
+    def replay(self) -> None:
+        """
+        Sends the last request again with the new access token.
+        The call is not registered again with the PollingHandler: the quota slot was taken by the original call.
+        """
+        self.replay_pending = False
+        if not self._last_request:
+            return
+        state, request = self._last_request
+        request = {**request, 'Headers': {**request['Headers'], 'Authorization': f"Bearer {self.parent.tokens['access_token']['token']}"}}
+        APIData.state_machine = state
+        self._last_request = (state, request)
+        self._replaying = True
+        self.replays += 1
+        Domoticz.Debug(f'Replay API request {request["Verb"]} {request["URL"]} with refreshed access token.')
+        self.parent.api.Send(request)
+
+    def _next_vin_to_poll(self) -> str:
+        """Returns the vehicle of the fleet with the stalest configured key (the one that received data the longest time ago if equal)."""
+        vehicles: List[Vehicle] = [self.parent.vehicles[vin] for vin in AuthenticationData.vins if vin in self.parent.vehicles]
+        if not vehicles:
+            return AuthenticationData.vin
+        return min(vehicles, key=lambda vehicle: (vehicle.stalest_key_timestamp, vehicle.last_data_received)).vin
 
     def _get_telematic_data(self) -> None:
-        """Sends an HTTP GET request to retrieve the latest telematic data for the vehicle."""
+        """Sends an HTTP GET request to retrieve the latest telematic data for the next vehicle of the fleet."""
 
         APIData.state_machine = API.GET_CONTAINER
+        self.polled_vin = self._next_vin_to_poll()
 
         headers: Dict[str, str] = {
             'Host': CarDataURLs.API_HOST,
@@ -1276,8 +2503,8 @@ class CarDataAPIHandler:
             'Accept': 'application/json'
         }
 
-        Domoticz.Debug('Send request for telematic data.')
-        self.parent.api.Send( {'Verb':'GET', 'URL':f"{CarDataURLs.GET_TELEMATICDATA_URI.format(vin=AuthenticationData.vin)}?containerId={APIData.container_id['containerId']}", 'Headers':headers} )
+        Domoticz.Debug(f'Send request for telematic data of {self.polled_vin}.')
+        self._send( {'Verb':'GET', 'URL':f"{CarDataURLs.GET_TELEMATICDATA_URI.format(vin=self.polled_vin)}?containerId={self.containers.container_id}", 'Headers':headers} )
 
         # Register this as a successful API call
         self.parent.polling_handler.register_api_call()
@@ -1292,23 +2519,35 @@ class BasePlugin:
     Handles Domoticz callbacks and delegates tasks to handler classes.
     """
 
-    def __init__(self):
-        """Initializes plugin state and handler classes."""
+    def __init__(self, clock: Callable[[], float] = time.time):
+        """Initializes plugin state and handler classes (the clock of the data pipeline can be replaced, e.g. to replay a trace)."""
+        self._clock: Callable[[], float] = clock
         self.runAgainOAuth: int = 0
         self.runAgainAPI: int = 0
         self.runAgainDeviceUpdate: int = 0
+        self.deviceUpdateWindow: float = _DEVICE_UPDATE_WINDOW_MS / 1000
+        self.deviceUpdatePending: List[float] = [] # Arrival times of data not yet pushed to the devices
+        self.deviceUpdateLatency: Deque[float] = deque(maxlen=500)
         self.Stop: bool = False
+        self.startTime: float = time.monotonic()
+        self.warmStart: bool = False
+        self.firstMessageReported: bool = False
         self.loggingLevel: int = 0
         self.tokens: Dict[str, Any] = {}
-        self.bmwData: Dict[str, Any] = {}
-        self.streamingKeys: Dict[str, Any] = {}
+        self.bmwData: Dict[str, Dict[str, TelemetryRecord]] = {}
+        # Vehicles of the fleet (VIN -> state shard) and the VINs with data not yet pushed to the devices
+        self.vehicles: Dict[str, Vehicle] = {}
+        self.dirtyVehicles: Set[str] = set()
+        self.unmanagedKeysDropped: int = 0
+
+        # JSON decoder shared by the MQTT payloads, the token responses and the API responses
+        self.decoder: PayloadDecoder = PayloadDecoder()
 
         # Initialize Handlers
-        self.mov_handler: CarMovementHandler = CarMovementHandler()
-        self.mqtt_handler: MqttClientHandler = MqttClientHandler(self) 
-        self.auth_handler: OAuth2Handler = OAuth2Handler(self)
-        self.api_handler: CarDataAPIHandler = CarDataAPIHandler(self)
-        self.polling_handler: PollingHandler = PollingHandler(self)
+        self.mqtt_handler: MqttClientHandler = MqttClientHandler(self, self.decoder, clock)
+        self.auth_handler: OAuth2Handler = OAuth2Handler(self, self.decoder)
+        self.api_handler: CarDataAPIHandler = CarDataAPIHandler(self, self.decoder, clock)
+        self.polling_handler: PollingHandler = PollingHandler(self, clock)
 
         # Connection objects (initialized in onStart)
         self.oauth2: Union[Domoticz.Connection, None] = None
@@ -1321,11 +2560,13 @@ class BasePlugin:
         # Debugging
         if Parameters["Mode6"] != '0':
             self.loggingLevel = int(Parameters["Mode6"])
+            log.set_debug_level(self.loggingLevel)
             try:
                 Domoticz.Debugging(self.loggingLevel)
                 dump_config_to_log(Parameters, Devices)
             except:
                 pass
+        Domoticz.Debug(f'JSON decoder used for MQTT payloads and API responses: {self.decoder.name}.')
 
         # Check if plugin hardware settings needs to be reset
         if os.path.exists(f"{Parameters['HomeFolder']}{_RESET_FILE}"):
@@ -1342,14 +2583,36 @@ class BasePlugin:
             if image.endswith('.zip') and image.startswith('_IMAGE') and image != f'{_IMAGE}.zip':
                 Domoticz.Image(image).Create()
 
+        # Get CarData client_id and vin(s); the devices of the first vehicle keep the hardware name as DeviceID
+        AuthenticationData.client_id = Parameters["Mode1"]
+        AuthenticationData.vins = list(dict.fromkeys(vin.strip() for vin in Parameters["Mode2"].split(',') if vin.strip()))
+        AuthenticationData.vin = AuthenticationData.vins[0] if AuthenticationData.vins else Parameters["Mode2"]
+        self.vehicles = {
+            vin: Vehicle(vin, Parameters['Name'] if index == 0 else f"{Parameters['Name']}-{vin}",
+                         Parameters['Name'] if index == 0 else f"{Parameters['Name']} {vin}")
+            for index, vin in enumerate(AuthenticationData.vins)
+        }
+
         # Create devices
-        self.create_devices()
+        for vehicle in self.vehicles.values():
+            self.create_devices(vehicle)
 
-        # Get CarData client_id and vin
-        AuthenticationData.client_id = Parameters["Mode1"]
-        AuthenticationData.vin = Parameters["Mode2"]
+            # Unit specific timeouts (e.g. the lock status is only sent sporadically by the car)
+            for unit, timeout in _UNIT_TIMEOUT_SEC_SPECIFIC.items():
+                staleness_tracker.set_ttl(vehicle.device_id, unit, timeout)
+
+        # Push data to the devices shortly after arrival instead of waiting for the periodic update
+        Domoticz.Heartbeat(_HEARTBEAT_SEC)
+        try:
+            self.deviceUpdateWindow = max(0, int(Parameters.get('Mode3') or _DEVICE_UPDATE_WINDOW_MS)) / 1000
+        except ValueError:
+            Domoticz.Error(f"Invalid Device Update Delay ({Parameters.get('Mode3')}); using default of {_DEVICE_UPDATE_WINDOW_MS}ms.")
 
         # Get Smart Polling info
+        self.polling_handler.min_interval_sec = int(Parameters.get('Mode5', 60)) * 60
+        if os.path.exists(f"{Parameters['HomeFolder']}{_ADAPTIVE_POLLING_FILE}"):
+            self.polling_handler.adaptive = True
+            Domoticz.Status(f'File {_ADAPTIVE_POLLING_FILE} detected: API calls are planned outside the periods with predicted MQTT activity.')
         self.polling_handler.load_state()
 
         # Set up connections
@@ -1368,15 +2631,23 @@ class BasePlugin:
                 Port=CarDataURLs.API_PORT
             )
 
-        # Initial Authentication attempt
+        # Initial Authentication attempt; a warm start with the stored tokens connects to MQTT directly
+        self.startTime = time.monotonic()
+        self.firstMessageReported = False
+        self.auth_handler.token_storage = Parameters.get('Mode4') or _TOKEN_STORAGE_ALL_OBFUSCATED
         AuthenticationData.state_machine = Authenticate.INIT
-        self.auth_handler.authenticate()
+        self.warmStart = self.auth_handler.warm_start()
+        if not self.warmStart:
+            self.auth_handler.authenticate()
 
         # Read key streaming file
         self._read_streaming_keys_file()
 
+        # Record the MQTT messages if requested
+        self._check_recording()
+
         # Update interval of devices
-        self.runAgainDeviceUpdate = DomoticzConstants.MINUTE
+        self.runAgainDeviceUpdate = _MINUTE
 
         # Timeout devices
         timeout_device(Devices)
@@ -1386,7 +2657,7 @@ class BasePlugin:
         Domoticz.Debug('onStop called')
         self.Stop = True
 
-        # Save the PollingHandler state only upon plugin stop
+        # Save the PollingHandler state (also checkpointed while running)
         polling = getattr(self, 'polling_handler', None)
         if polling is not None:
             try:
@@ -1400,6 +2671,7 @@ class BasePlugin:
         if handler is not None:
             try:
                 handler.disconnect_mqtt(reconnect=False)
+                handler.recorder.stop()
             except Exception as e:
                 Domoticz.Error(f"Error calling disconnect_mqtt during onStop: {e}")
 
@@ -1419,8 +2691,8 @@ class BasePlugin:
             # Check all statuses safely using local references or getattr
             mqtt_connected = False
             if handler is not None:
-                # Use getattr to safely check the 'connected' attribute of the handler
-                mqtt_connected = getattr(handler, 'connected', False)  
+                # The MQTT client is torn down in a background thread
+                mqtt_connected = handler.is_tearing_down()
             oauth_connected = oauth2.Connected() if oauth2 else False
             api_connected = api.Connected() if api else False
 
@@ -1431,6 +2703,25 @@ class BasePlugin:
             Domoticz.Debug(f'Waiting for disconnections: MQTT:{mqtt_connected}, OAuth2:{oauth_connected}, API:{api_connected}')
             time.sleep(0.2)
 
+    def _check_recording(self) -> None:
+        """Starts the recording of the MQTT messages if the record file is present (stops it when the file is removed)."""
+        recorder: TraceRecorder = self.mqtt_handler.recorder
+        record_file: str = f"{Parameters['HomeFolder']}{_RECORD_FILE}"
+        if os.path.exists(record_file):
+            if recorder.active:
+                recorder.flush()
+                return
+            try:
+                with open(record_file) as file:
+                    compression: str = file.read().strip().lower() or 'gzip'
+                recorder.start(Parameters['HomeFolder'], compression)
+                Domoticz.Status(f'File {_RECORD_FILE} detected: recording the MQTT messages in {recorder.path}.')
+            except OSError as e:
+                Domoticz.Error(f'Recording of the MQTT messages could not be started: {e}')
+        elif recorder.active:
+            recorder.stop()
+            Domoticz.Status(f'Recording of the MQTT messages stopped ({recorder.recorded} messages recorded in {recorder.path}).')
+
     def onConnect(self, Connection: Domoticz.Connection, Status: int, Description: str) -> None:
         """Called when a connection attempt completes. Routes success to the relevant handler."""
         if self.Stop: return
@@ -1442,11 +2733,14 @@ class BasePlugin:
             else:
                 Domoticz.Debug(f'OAuth2 connection error ({Description}). Trying again in 1 minute...')
                 AuthenticationData.state_machine = Authenticate.ERROR
-                self.runAgainOAuth = DomoticzConstants.MINUTE
+                self.runAgainOAuth = _MINUTE
         
         elif Connection == self.api:
             if Status == 0:
-                self.api_handler.poll_telematic_data()
+                if self.api_handler.replay_pending:
+                    self.api_handler.replay()
+                else:
+                    self.api_handler.poll_telematic_data()
             else:
                 Domoticz.Debug(f'API connection error ({Description}). Trying again in 5 minutes...')
 
@@ -1472,6 +2766,22 @@ class BasePlugin:
         """Called periodically by Domoticz. Handles scheduling and state machine progression."""
         if self.Stop: return
 
+        # Merge data received via MQTT since the previous heartbeat and update the devices
+        self.process_received_data()
+
+        # Finish MQTT teardowns and start scheduled reconnects
+        self.mqtt_handler.process_state()
+
+        # Refresh the tokens at the scheduled deadline, well before the broker rejects the ID token
+        if AuthenticationData.state_machine == Authenticate.DONE and self.auth_handler.refresh_due():
+            self.auth_handler.request_refresh('scheduled')
+
+        # Refresh requested by the MQTT callbacks (joins a refresh in flight)
+        if (reason := self.auth_handler.refresh_requested) is not None:
+            self.auth_handler.refresh_requested = None
+            if AuthenticationData.state_machine in (Authenticate.DONE, Authenticate.REFRESH_TOKEN):
+                self.auth_handler.request_refresh(reason)
+
         self.runAgainOAuth -= 1
         if self.runAgainOAuth <= 0:
             if AuthenticationData.state_machine == Authenticate.USER_INTERACTION:
@@ -1489,13 +2799,14 @@ class BasePlugin:
                 # Ensure MQTT connection
                 self.mqtt_handler.connect_mqtt()
                 self.mqtt_handler.is_mqtt_active()
-                self.runAgainOAuth = DomoticzConstants.MINUTE
+                self.runAgainOAuth = _MINUTE
             else:
-                self.runAgainOAuth = DomoticzConstants.MINUTE
+                self.runAgainOAuth = _MINUTE
 
         self.runAgainDeviceUpdate -= 1
         if self.runAgainDeviceUpdate <= 0:
-            Domoticz.Debug(f'Status BMW(s): {self.bmwData}')
+            log.debug('Status BMW(s): %s', self.bmwData)
+            log.debug('MQTT ingest queue: %s', Lazy(lambda: self.mqtt_handler.ingest_queue.stats))
 
             # Read bmw keys streaming file if change was detected
             try:
@@ -1504,232 +2815,333 @@ class BasePlugin:
                     self._read_streaming_keys_file()
             except:
                 pass
-            self.workaround_driving() # Workaround to deduct if vehicle is driving or not
-            self.update_devices()
-            if check_activity_units_and_timeout(Devices, 7200):
-                #Domoticz.Error(f"Devices timed out! Timestamp last BMW CarData information: API: {self.polling_handler.last_call_time} - MQTT: {self.mqtt_handler.time_last_message_received}.")
-                pass
-            self.runAgainDeviceUpdate = DomoticzConstants.MINUTE
+            # Start or stop the recording of the MQTT messages
+            self._check_recording()
+            # Periodic update of all vehicles remains as safety net for the event-driven updates
+            self.flush_device_updates(all_vehicles=True)
+            log.debug('Token refreshes: %s (coalesced triggers: %s; API requests replayed after 401: %s).',
+                      self.auth_handler.refreshes, self.auth_handler.refreshes_coalesced, self.api_handler.replays)
+            if self.mqtt_handler.rotation_gaps:
+                log.debug('MQTT data gap over last %s session rotations: median=%.2fs; max=%.2fs.', len(self.mqtt_handler.rotation_gaps),
+                          Lazy(lambda: statistics.median(self.mqtt_handler.rotation_gaps)), Lazy(lambda: max(self.mqtt_handler.rotation_gaps)))
+            if self.mqtt_handler.reconnect_durations:
+                log.debug('MQTT reconnect duration over last %s reconnects: median=%.2fs; max=%.2fs.', len(self.mqtt_handler.reconnect_durations),
+                          Lazy(lambda: statistics.median(self.mqtt_handler.reconnect_durations)), Lazy(lambda: max(self.mqtt_handler.reconnect_durations)))
+            if self.deviceUpdateLatency:
+                log.debug('Arrival-to-device latency over last %s updates: median=%.3fs; max=%.3fs.', len(self.deviceUpdateLatency),
+                          Lazy(lambda: statistics.median(self.deviceUpdateLatency)), Lazy(lambda: max(self.deviceUpdateLatency)))
+            log.debug('MQTT duplicate deliveries prevented by non-overlapping subscriptions: %s.', self.mqtt_handler.subscriptions.prevented_duplicates)
+            log.debug('Telemetry memory: %s.', Lazy(self.memory_report))
+            log.debug('Values rejected by the converters: %s.', Lazy(lambda: {vin: vehicle.rejected_values for vin, vehicle in self.vehicles.items() if vehicle.rejected_values}))
+            log.debug('Merge discarded %s older and %s duplicate values.', Lazy(lambda: sum(vehicle.discarded_older for vehicle in self.vehicles.values())),
+                      Lazy(lambda: sum(vehicle.discarded_duplicates for vehicle in self.vehicles.values())))
+            log.debug('BMW CarData container management API calls last 7 days: %s.', Lazy(lambda: self.api_handler.containers.calls_last_week))
+            if timed_out_units := check_activity_units_and_timeout(Devices, _UNIT_TIMEOUT_SEC):
+                log.debug('Units timed out: %s', timed_out_units)
+            # Persist the quota ledger if API calls were registered
+            self.polling_handler.checkpoint()
+            self.runAgainDeviceUpdate = _MINUTE
 
         if AuthenticationData.state_machine == Authenticate.DONE:
             self.runAgainAPI -= 1
             if self.runAgainAPI <= 0:
-                Domoticz.Debug(f'Total API calls last 24h: {self.polling_handler.used_quota}/{self.polling_handler.DAILY_QUOTA}. Next API call at {self.polling_handler.next_call_time}.')
+                log.debug('Total API calls last 24h: %s/%s. Next API call at %s.', self.polling_handler.used_quota, self.polling_handler.DAILY_QUOTA, self.polling_handler.next_call_time)
                 # Don't do anything if we are still busy with container management (creating/deleting)
                 if APIData.state_machine == API.GET_CONTAINER or APIData.state_machine == API.ERROR:
                     # This will now safely check if budget opened up without pushing the time forward
                     self.polling_handler.update_possible_budget()
                     # Check if it is time to do an API call to get telematic data, taking into account the API quota...
-                    Domoticz.Debug(f"Current time {datetime.now()} - used quota: {self.polling_handler.used_quota} - next api call at {self.polling_handler.next_call_time} - {self.polling_handler.get_quota_list}")
-                    if datetime.now() >= self.polling_handler.next_call_time:
+                    log.debug('Current time %s - used quota: %s - next api call at %s - %s', Lazy(datetime.now), self.polling_handler.used_quota,
+                              self.polling_handler.next_call_time, Lazy(lambda: self.polling_handler.get_quota_list))
+                    # Skip the call while the streamed values of all configured keys are still fresh
+                    if datetime.now() >= self.polling_handler.next_call_time and not self.polling_handler.defer_while_fresh(self.stalest_key_timestamp()):
                         if not (self.api.Connected() or self.api.Connecting() ):
                             self.api.Connect()
                         else:
                             self.api_handler.poll_telematic_data()
-                self.runAgainAPI = 5 * DomoticzConstants.MINUTE
+                self.runAgainAPI = 5 * _MINUTE
+
+    def process_received_data(self) -> None:
+        """Merges the data received via MQTT and pushes new data to the devices once the coalescing window has passed (every heartbeat)."""
+        self.ingest_mqtt_data()
+        if self.deviceUpdatePending and self._clock() - self.deviceUpdatePending[0] >= self.deviceUpdateWindow:
+            self.flush_device_updates()
+
+    def ingest_mqtt_data(self) -> None:
+        """Drains the MQTT ingest queue in one batch and merges the messages into the BMW data (Domoticz thread only)."""
+        queue: IngestQueue = self.mqtt_handler.ingest_queue
+        batch: List[Tuple[float, str, Dict[str, Any]]] = queue.drain()
+        if not batch:
+            return
+
+        for received_at, vin, data in batch:
+            self.store_data(vin, data)
+
+        self.deviceUpdatePending.extend(received_at for received_at, _, _ in batch)
+
+        if not self.firstMessageReported:
+            self.firstMessageReported = True
+            Domoticz.Status(f"First BMW CarData MQTT message received {time.monotonic() - self.startTime:.1f}s after {'warm' if self.warmStart else 'cold'} start.")
+
+        # Register the MQTT activity once per batch (replaces the throttling per message)
+        self.mqtt_handler.time_last_message_received = datetime.fromtimestamp(batch[-1][0])
+        self.polling_handler.register_mqtt_update({vin for _, vin, _ in batch})
+
+        if queue.dropped > self.mqtt_handler.dropped_reported:
+            log.status('MQTT ingest queue overflow: %s message(s) dropped (%s).', queue.dropped - self.mqtt_handler.dropped_reported, queue.stats,
+                       site='ingest-overflow', interval=300)
+            self.mqtt_handler.dropped_reported = queue.dropped
 
-    def workaround_driving(self) -> None:
+    def store_data(self, vin: str, data: Dict[str, Any]) -> None:
+        """Merges received CarData keys of a managed vehicle into the BMW data (timestamp ordered) and routes them to its device groups."""
+        vehicle: Union[Vehicle, None] = self.vehicles.get(vin)
+        # Data of vehicles not managed by the plugin is not retained
+        if vehicle is None:
+            self.unmanagedKeysDropped += len(data)
+            return
+        # Only genuinely newer data of configured keys is merged and marks device groups dirty
+        data = vehicle.merge(self.bmwData.setdefault(vin, {}), data)
+        if not data:
+            return
+        vehicle.last_data_received = self._clock()
+        vehicle.route(data)
+        if vehicle.dirty:
+            self.dirtyVehicles.add(vin)
+
+    def memory_report(self) -> str:
+        """Returns the memory held per vehicle and the number of keys dropped as string for logging purpose."""
+        report: List[str] = [
+            f'{vin}: {vehicle.memory_bytes(self.bmwData.get(vin, {}))} bytes, {len(vehicle.latest)} keys retained ({len(self.bmwData.get(vin, {}))} pending), '
+            f'{vehicle.dropped_keys} dropped, {vehicle.evicted_keys} evicted'
+            for vin, vehicle in self.vehicles.items()
+        ]
+        return f"{'; '.join(report)}; keys of unmanaged vehicles dropped: {self.unmanagedKeysDropped}"
+
+    def stalest_key_timestamp(self) -> float:
+        """Returns the timestamp of the stalest configured key over all vehicles of the fleet."""
+        return min((vehicle.stalest_key_timestamp for vehicle in self.vehicles.values()), default=0)
+
+    def flush_device_updates(self, all_vehicles: bool = False) -> None:
+        """Updates the devices of the vehicles with pending data (or all vehicles) and records the arrival-to-device latency."""
+        vins: Iterable[str] = self.vehicles if all_vehicles else self.dirtyVehicles
+        for vin in list(vins):
+            self.update_devices(self.vehicles[vin])
+        self.dirtyVehicles.clear()
+        now: float = self._clock()
+        self.deviceUpdateLatency.extend(now - received_at for received_at in self.deviceUpdatePending)
+        self.deviceUpdatePending.clear()
+
+    def workaround_driving(self, vehicle: Vehicle) -> None:
         """Applies a calculated driving status if the 'vehicle.isMoving' key is missing from the stream."""
-        if ( streaming_keys := self.streamingKeys.get('Location', None) ):
-            current_location = self._get_status_from_streaming_keys('Location', streaming_keys, float, delete_key=False)
+        mov_handler: CarMovementHandler = vehicle.mov_handler
+        if ( streaming_keys := vehicle.streaming_keys.get('Location', None) ):
+            current_location = self._get_status_from_streaming_keys(vehicle, 'Location', delete_key=False)
             # Workaround if key "vehicle.isMoving" is not supplied... calculate if vehicle is moving
             current_time: datetime = datetime.now()
-            result: str = self.mov_handler.process_new_data(list(current_location), current_time)
-            Domoticz.Debug(f'Workaround for vehicle isMoving... isMoving={self.mov_handler.is_currently_moving}; last_location={self.mov_handler.last_coord}; current_location={current_location}; result={result}')
-            #if (self.mov_handler.is_currently_moving==False and len(current_location)>0) or self.mov_handler.is_currently_moving:
-            #    Domoticz.Status(f'Vehicle isMoving status: isMoving={self.mov_handler.is_currently_moving}; last_location={self.mov_handler.last_coord}; current_location={current_location}; result={result}')
+            result: str = mov_handler.process_new_data(list(current_location), current_time)
+            log.debug('%s: Workaround for vehicle isMoving... isMoving=%s; last_location=%s; current_location=%s; result=%s',
+                      vehicle.vin, mov_handler.is_currently_moving, mov_handler.last_coord, current_location, result)
+            #if (mov_handler.is_currently_moving==False and len(current_location)>0) or mov_handler.is_currently_moving:
+            #    Domoticz.Status(f'Vehicle isMoving status: isMoving={mov_handler.is_currently_moving}; last_location={mov_handler.last_coord}; current_location={current_location}; result={result}')
             # Use workaround if no vehicle.isMoving data coming true
-            update_device(False, Devices, Parameters['Name'], UnitIdentifiers.DRIVING,
-                          1 if self.mov_handler.is_currently_moving else 0, 
-                          100 if self.mov_handler.is_currently_moving else 0)
+            update_device(False, Devices, vehicle.device_id, UnitIdentifiers.DRIVING,
+                          1 if mov_handler.is_currently_moving else 0, 
+                          100 if mov_handler.is_currently_moving else 0)
 
-    def update_devices(self) -> None:
-        """Updates all virtual devices in Domoticz based on the latest BMW data."""
+    def update_devices(self, vehicle: Vehicle) -> None:
+        """Updates the virtual devices in Domoticz of the device groups of the vehicle that received new BMW data."""
         if self.Stop:
             return
-        
-        if not self.bmwData.get(AuthenticationData.vin, None):
+
+        # Only the device groups with new data since the last update are evaluated
+        dirty: Set[str] = vehicle.dirty
+        vehicle.dirty = set()
+        full_update: bool = vehicle.full_update
+        if full_update:
+            dirty.update(_DEVICE_GROUPS)
+            vehicle.full_update = False
+
+        # Deduct the driving status from the location (new location or stop timer running)
+        if 'Location' in dirty or vehicle.mov_handler.is_currently_moving:
+            was_moving: bool = vehicle.mov_handler.is_currently_moving
+            self.workaround_driving(vehicle)
+            if was_moving != vehicle.mov_handler.is_currently_moving:
+                dirty.add('Driving')
+
+        if not dirty:
             return
 
+        # Charging time depends on the charging status
+        if 'Charging' in dirty:
+            dirty.add('ChargingTime')
+
         # Update Mileage
-        if not ( streaming_keys := self.streamingKeys.get('Mileage', None) ):
-            update_device( False, Devices, Parameters['Name'], UnitIdentifiers.MILEAGE, Used=0 )
-            update_device( False, Devices, Parameters['Name'], UnitIdentifiers.MILEAGE_COUNTER, Used=0 )
-        else:
-            if status := self._get_status_from_streaming_keys('Mileage', [streaming_keys], int):
-                unit: str = self.bmwData[AuthenticationData.vin].get(streaming_keys, {}).get('unit', 'km')
-                update_device( False, Devices, Parameters['Name'], UnitIdentifiers.MILEAGE,
-                               status[0], status[0], 
-                               Options={'Custom': f"0;{unit}"}
-                             )
-                update_device( False, Devices, Parameters['Name'], UnitIdentifiers.MILEAGE_COUNTER,
-                               0, status[0],
-                               Options={'ValueUnits': unit, 'ValueQuantity': unit}
-                             )
+        if 'Mileage' in dirty:
+            if not ( streaming_keys := vehicle.streaming_keys.get('Mileage', None) ):
+                update_device( False, Devices, vehicle.device_id, UnitIdentifiers.MILEAGE, Used=0 )
+                update_device( False, Devices, vehicle.device_id, UnitIdentifiers.MILEAGE_COUNTER, Used=0 )
+            else:
+                if status := self._get_status_from_streaming_keys(vehicle, 'Mileage'):
+                    unit: str = vehicle.unit_of(streaming_keys, 'km')
+                    update_device( False, Devices, vehicle.device_id, UnitIdentifiers.MILEAGE,
+                                   status[0], status[0], 
+                                   Options={'Custom': f"0;{unit}"}
+                                 )
+                    update_device( False, Devices, vehicle.device_id, UnitIdentifiers.MILEAGE_COUNTER,
+                                   0, status[0],
+                                   Options={'ValueUnits': unit, 'ValueQuantity': unit}
+                                 )
 
         # Update status of Doors
-        if not ( streaming_keys := self.streamingKeys.get('Doors', None) ):
-            update_device( False, Devices, Parameters['Name'], UnitIdentifiers.DOORS, Used=0 )
-        else:
-            if status := self._get_status_from_streaming_keys('Doors', streaming_keys, ['OPEN', 'CLOSED', True, False]):
-                update_device( False, Devices, Parameters['Name'], UnitIdentifiers.DOORS,
-                               0 if all(x in ['CLOSED', False] for x in status) else 1, 0 )
+        if 'Doors' in dirty:
+            if not ( streaming_keys := vehicle.streaming_keys.get('Doors', None) ):
+                update_device( False, Devices, vehicle.device_id, UnitIdentifiers.DOORS, Used=0 )
+            else:
+                if status := self._get_status_from_streaming_keys(vehicle, 'Doors'):
+                    update_device( False, Devices, vehicle.device_id, UnitIdentifiers.DOORS,
+                                   0 if all(x in ['CLOSED', False] for x in status) else 1, 0 )
 
         # Update status of Windows
-        if not ( streaming_keys := self.streamingKeys.get('Windows', None) ):
-            update_device( False, Devices, Parameters['Name'], UnitIdentifiers.WINDOWS, Used=0 )
-        else:
-            if status := self._get_status_from_streaming_keys('Windows', streaming_keys, ['OPEN', 'INTERMEDIATE', 'CLOSED']):
-                update_device( False, Devices, Parameters['Name'], UnitIdentifiers.WINDOWS,
-                               0 if all(x == 'CLOSED' for x in status) else 1, 0 )
+        if 'Windows' in dirty:
+            if not ( streaming_keys := vehicle.streaming_keys.get('Windows', None) ):
+                update_device( False, Devices, vehicle.device_id, UnitIdentifiers.WINDOWS, Used=0 )
+            else:
+                if status := self._get_status_from_streaming_keys(vehicle, 'Windows'):
+                    update_device( False, Devices, vehicle.device_id, UnitIdentifiers.WINDOWS,
+                                   0 if all(x == 'CLOSED' for x in status) else 1, 0 )
 
         # Update door lock status
-        if not ( streaming_keys := self.streamingKeys.get('Locked', None) ):
-            update_device( False, Devices, Parameters['Name'], UnitIdentifiers.CAR, Used=0 )
-        else:
-            status = self._get_status_from_streaming_keys('Locked', [streaming_keys], ['SECURED', 'LOCKED', 'UNLOCKED', 'SELECTIVELOCKED'])
-            if status:
-                update_device( False, Devices, Parameters['Name'], UnitIdentifiers.CAR,
-                               0 if status[0] in ['SECURED', 'LOCKED'] else 1, 0 )
-            # The streaming documentation clearly indicates that this information is only sent sporadically...
-            # We "touch" the device to avoid timed-out devices 
-            elif len(status) == 0:
-                touch_device(Devices, Parameters['Name'], UnitIdentifiers.CAR)
+        if 'Locked' in dirty:
+            if not ( streaming_keys := vehicle.streaming_keys.get('Locked', None) ):
+                update_device( False, Devices, vehicle.device_id, UnitIdentifiers.CAR, Used=0 )
+            else:
+                if status := self._get_status_from_streaming_keys(vehicle, 'Locked'):
+                    update_device( False, Devices, vehicle.device_id, UnitIdentifiers.CAR,
+                                   0 if status[0] in ['SECURED', 'LOCKED'] else 1, 0 )
 
         # Location data is available 
-        if not ( streaming_keys := self.streamingKeys.get('Location', None) ):
-            update_device( False, Devices, Parameters['Name'], UnitIdentifiers.HOME, Used=0 )
-        else:
-            if (status := self._get_status_from_streaming_keys('Location', streaming_keys, float)) and len(status)==2:
-                # Parse home location from settings
-                home_loc: List[str] = Settings['Location'].split(';')
-                home_point: Tuple[float, float] = (float(home_loc[0]), float(home_loc[1]))
-                # Calculate distance from home using the tracker
-                if distance := get_distance(list(status), home_point, 'm'):
-                    update_device(False, Devices, Parameters['Name'], UnitIdentifiers.HOME,
-                                  1 if distance <= 100 else 0, 100-distance if distance <= 100 else 0)
+        if 'Location' in dirty:
+            if not ( streaming_keys := vehicle.streaming_keys.get('Location', None) ):
+                update_device( False, Devices, vehicle.device_id, UnitIdentifiers.HOME, Used=0 )
+            else:
+                if (status := self._get_status_from_streaming_keys(vehicle, 'Location')) and len(status)==2:
+                    # Parse home location from settings
+                    home_loc: List[str] = Settings['Location'].split(';')
+                    home_point: Tuple[float, float] = (float(home_loc[0]), float(home_loc[1]))
+                    # Calculate distance from home using the tracker
+                    if distance := get_distance(list(status), home_point, 'm'):
+                        update_device(False, Devices, vehicle.device_id, UnitIdentifiers.HOME,
+                                      1 if distance <= 100 else 0, 100-distance if distance <= 100 else 0)
 
         # Driving status
-        if not ( streaming_keys := self.streamingKeys.get('Driving', None) ):
-            # Driving status is calculated via the workaround if not explicitly streamed
-            if not self.mov_handler.is_currently_moving:
-                 update_device( False, Devices, Parameters['Name'], UnitIdentifiers.DRIVING, Used=0 )
-        else:
-            if status := self._get_status_from_streaming_keys('Driving', [streaming_keys], bool):
-                update_device(False, Devices, Parameters['Name'], UnitIdentifiers.DRIVING,
-                              1 if status[0] else 0, 100 if status[0] else 0)
+        if 'Driving' in dirty:
+            if not ( streaming_keys := vehicle.streaming_keys.get('Driving', None) ):
+                # Driving status is calculated via the workaround if not explicitly streamed
+                if not vehicle.mov_handler.is_currently_moving:
+                     update_device( False, Devices, vehicle.device_id, UnitIdentifiers.DRIVING, Used=0 )
+            else:
+                if status := self._get_status_from_streaming_keys(vehicle, 'Driving'):
+                    update_device(False, Devices, vehicle.device_id, UnitIdentifiers.DRIVING,
+                                  1 if status[0] else 0, 100 if status[0] else 0)
 
         # Update Remaining fuel range
-        if not ( streaming_keys := self.streamingKeys.get('RemainingRangeTotal', None) ):
-            update_device( False, Devices, Parameters['Name'], UnitIdentifiers.REMAIN_RANGE_TOTAL, Used=0 )
-        else:
-            if status := self._get_status_from_streaming_keys('RemainingRangeTotal', [streaming_keys], int):
-                unit: str = self.bmwData[AuthenticationData.vin].get(streaming_keys, {}).get('unit', 'km')
-                update_device( False, Devices, Parameters['Name'], UnitIdentifiers.REMAIN_RANGE_TOTAL,
-                               status[0], status[0], 
-                               Options={'Custom': f"0;{unit}"}
-                             )
+        if 'RemainingRangeTotal' in dirty:
+            if not ( streaming_keys := vehicle.streaming_keys.get('RemainingRangeTotal', None) ):
+                update_device( False, Devices, vehicle.device_id, UnitIdentifiers.REMAIN_RANGE_TOTAL, Used=0 )
+            else:
+                if status := self._get_status_from_streaming_keys(vehicle, 'RemainingRangeTotal'):
+                    unit: str = vehicle.unit_of(streaming_keys, 'km')
+                    update_device( False, Devices, vehicle.device_id, UnitIdentifiers.REMAIN_RANGE_TOTAL,
+                                   status[0], status[0], 
+                                   Options={'Custom': f"0;{unit}"}
+                                 )
 
         # Update Remaining electric range
-        if not ( streaming_keys := self.streamingKeys.get('RemainingRangeElec', None) ):
-            update_device( False, Devices, Parameters['Name'], UnitIdentifiers.REMAIN_RANGE_ELEC, Used=0 )
-        else:
-            if status := self._get_status_from_streaming_keys('RemainingRangeElec', [streaming_keys], int):
-                unit: str = self.bmwData[AuthenticationData.vin].get(streaming_keys, {}).get('unit', 'km')
-                update_device( False, Devices, Parameters['Name'], UnitIdentifiers.REMAIN_RANGE_ELEC,
-                               status[0], status[0], 
-                               Options={'Custom': f"0;{unit}"}
-                             )
+        if 'RemainingRangeElec' in dirty:
+            if not ( streaming_keys := vehicle.streaming_keys.get('RemainingRangeElec', None) ):
+                update_device( False, Devices, vehicle.device_id, UnitIdentifiers.REMAIN_RANGE_ELEC, Used=0 )
+            else:
+                if status := self._get_status_from_streaming_keys(vehicle, 'RemainingRangeElec'):
+                    unit: str = vehicle.unit_of(streaming_keys, 'km')
+                    update_device( False, Devices, vehicle.device_id, UnitIdentifiers.REMAIN_RANGE_ELEC,
+                                   status[0], status[0], 
+                                   Options={'Custom': f"0;{unit}"}
+                                 )
 
         # Update Battery Percentage
-        if not ( streaming_keys := self.streamingKeys.get('BatteryLevel', None) ):
-            update_device( False, Devices, Parameters['Name'], UnitIdentifiers.BAT_LEVEL, Used=0 )
-        else:
-            if status := self._get_status_from_streaming_keys('BatteryLevel', [streaming_keys], int):
-                update_device(False, Devices, Parameters['Name'], UnitIdentifiers.BAT_LEVEL,
-                              status[0], status[0])
+        if 'BatteryLevel' in dirty:
+            if not ( streaming_keys := vehicle.streaming_keys.get('BatteryLevel', None) ):
+                update_device( False, Devices, vehicle.device_id, UnitIdentifiers.BAT_LEVEL, Used=0 )
+            else:
+                if status := self._get_status_from_streaming_keys(vehicle, 'BatteryLevel'):
+                    update_device(False, Devices, vehicle.device_id, UnitIdentifiers.BAT_LEVEL,
+                                  status[0], status[0])
 
         # Update Electric charging status
-        if not ( streaming_keys := self.streamingKeys.get('Charging', None) ):
-            update_device( False, Devices, Parameters['Name'], UnitIdentifiers.CHARGING, Used=0 )
-        else:
-            if status := self._get_status_from_streaming_keys('Charging', [streaming_keys], 
-                                                               ['NOCHARGING', 'INITIALIZATION', 
-                                                                'CHARGINGACTIVE', 'CHARGINGPAUSED', 
-                                                                'CHARGINGENDED', 'CHARGINGERROR']
-                                                             ):
-                charging: bool = status[0]=='CHARGINGACTIVE'
-                battery: int = get_device_n_value(Devices, Parameters['Name'], UnitIdentifiers.BAT_LEVEL) or 0
-                update_device(False, Devices, Parameters['Name'], UnitIdentifiers.CHARGING,
-                              1 if charging else 0, battery if charging else 0)
+        if 'Charging' in dirty:
+            if not ( streaming_keys := vehicle.streaming_keys.get('Charging', None) ):
+                update_device( False, Devices, vehicle.device_id, UnitIdentifiers.CHARGING, Used=0 )
+            else:
+                if status := self._get_status_from_streaming_keys(vehicle, 'Charging'):
+                    charging: bool = status[0]=='CHARGINGACTIVE'
+                    battery: int = get_device_n_value(Devices, vehicle.device_id, UnitIdentifiers.BAT_LEVEL) or 0
+                    update_device(False, Devices, vehicle.device_id, UnitIdentifiers.CHARGING,
+                                  1 if charging else 0, battery if charging else 0)
 
         # Update Charging Time (minutes)
-        if not ( streaming_keys := self.streamingKeys.get('ChargingTime', None) ):
-            update_device( False, Devices, Parameters['Name'], UnitIdentifiers.CHARGING_REMAINING, Used=0 )
-        else:
-            if get_device_n_value(Devices, Parameters['Name'], UnitIdentifiers.CHARGING):
-                if status := self._get_status_from_streaming_keys('ChargingTime', [streaming_keys], int):
-                    update_device(False, Devices, Parameters['Name'], UnitIdentifiers.CHARGING_REMAINING,
-                                  status[0], status[0])
+        if 'ChargingTime' in dirty:
+            if not ( streaming_keys := vehicle.streaming_keys.get('ChargingTime', None) ):
+                update_device( False, Devices, vehicle.device_id, UnitIdentifiers.CHARGING_REMAINING, Used=0 )
             else:
-                update_device(False, Devices, Parameters['Name'], UnitIdentifiers.CHARGING_REMAINING, 0, 0)
+                if get_device_n_value(Devices, vehicle.device_id, UnitIdentifiers.CHARGING):
+                    if status := self._get_status_from_streaming_keys(vehicle, 'ChargingTime'):
+                        update_device(False, Devices, vehicle.device_id, UnitIdentifiers.CHARGING_REMAINING,
+                                      status[0], status[0])
+                else:
+                    update_device(False, Devices, vehicle.device_id, UnitIdentifiers.CHARGING_REMAINING, 0, 0)
 
         # Clean up unused/legacy devices
-        if get_unit(Devices, Parameters['Name'], UnitIdentifiers.REMOTE_SERVICES):
-            update_device( False, Devices, Parameters['Name'], UnitIdentifiers.REMOTE_SERVICES, Used=0 )
-        if get_unit(Devices, Parameters['Name'], UnitIdentifiers.AC_LIMITS):
-            update_device( False, Devices, Parameters['Name'], UnitIdentifiers.AC_LIMITS, Used=0 )
-        if get_unit(Devices, Parameters['Name'], UnitIdentifiers.CHARGING_MODE):
-            update_device( False, Devices, Parameters['Name'], UnitIdentifiers.CHARGING_MODE, Used=0 )
+        if full_update:
+            if get_unit(Devices, vehicle.device_id, UnitIdentifiers.REMOTE_SERVICES):
+                update_device( False, Devices, vehicle.device_id, UnitIdentifiers.REMOTE_SERVICES, Used=0 )
+            if get_unit(Devices, vehicle.device_id, UnitIdentifiers.AC_LIMITS):
+                update_device( False, Devices, vehicle.device_id, UnitIdentifiers.AC_LIMITS, Used=0 )
+            if get_unit(Devices, vehicle.device_id, UnitIdentifiers.CHARGING_MODE):
+                update_device( False, Devices, vehicle.device_id, UnitIdentifiers.CHARGING_MODE, Used=0 )
 
 
     def _get_status_from_streaming_keys(
         self, 
+        vehicle: Vehicle,
         key_name: str, 
-        streaming_keys: Union[str, List[str]], 
-        expected_value: Union[List[Union[str, bool]], Type], 
         delete_key: bool = True
-        ) -> Union[List[Any], None]:
+        ) -> List[Any]:
         """
-        Parses all requested streaming keys for the current VIN, validates their type/value, 
-        and optionally removes them from the main data structure.
+        Returns the values of the received streaming keys of a device group of the vehicle (converted and validated
+        at ingest) and optionally removes them from the main data structure.
         """
         
-        # Ensure streaming_keys is a list for uniform processing
-        if isinstance(streaming_keys, str):
-            streaming_keys = [streaming_keys]
-            
-        # Parse to get explicit list of streaming keys
+        # Explicit list of received streaming keys of the device group (routed at ingest), in configuration order
+        vin_data: Dict[str, Any] = self.bmwData.get(vehicle.vin, {})
+        routed: Dict[str, int] = vehicle.routed_keys.get(key_name, {})
         keys: List[str] = [ 
-            key for streaming_key in streaming_keys
-            for key in self.bmwData.get(AuthenticationData.vin, {}).keys() 
-                if '*' in streaming_key and key.startswith(streaming_key.split('*', 1)[0]) and key.endswith(streaming_key.split('*', 1)[1])
-                or '*' not in streaming_key and key == streaming_key
+            key for key, position in sorted(routed.items(), key=lambda item: item[1])
+                if key in vin_data
         ]
         
         # Get status/return value back of all defined streaming keys for the specific key in the JSON configuration file
+        # Values were converted to their typed form at ingest
         status: List[Any] = [ 
-            smart_convert_string(self.bmwData[AuthenticationData.vin][key].get('value', None)) 
+            vin_data[key].value
             for key in keys 
-            if self.bmwData[AuthenticationData.vin][key].get('value', None) is not None
+            if vin_data[key].value is not None
         ]
         
         # Erase streaming keys from BMWStatus
         if delete_key:
             for key in keys:
-                self.bmwData[AuthenticationData.vin].pop(key, None)
+                vin_data.pop(key, None)
         
-        # Check if all return values match expected types/values
-        check: bool
-        if isinstance(expected_value, List):
-            check = all(x in expected_value for x in status)
-        else:
-            check = all(isinstance(x, expected_value) for x in status)
-            
-        if not check:
-            Domoticz.Error(f'{AuthenticationData.vin}: Streaming keys are defined in {_STREAMING_KEY_FILE} for {key_name} that do not return {expected_value}. Key {streaming_keys} gives {status}.')
-            return None
-            
         #Domoticz.Debug(f'{key_name}: {status}')
         return status
 
@@ -1739,114 +3151,119 @@ class BasePlugin:
         try:
             # Read parameters
             with open(f"{Parameters['HomeFolder']}{_STREAMING_KEY_FILE}") as json_file:
-                self.streamingKeys = json.load(json_file).get(AuthenticationData.vin, {})
+                streaming_keys: Dict[str, Any] = json.load(json_file)
             self.streamingKeysDatim = os.path.getmtime(f"{Parameters['HomeFolder']}{_STREAMING_KEY_FILE}")
-            Domoticz.Debug(f'{_STREAMING_KEY_FILE} read: {self.streamingKeys}.')
-            if self.streamingKeys:
+            # Compile the keys of each vehicle and route the data already received again
+            for vehicle in self.vehicles.values():
+                vehicle.configure(streaming_keys.get(vehicle.vin, {}))
+                vehicle.route(self.bmwData.get(vehicle.vin, {}))
+                Domoticz.Debug(f'{_STREAMING_KEY_FILE} read for {vehicle.vin}: {vehicle.streaming_keys}.')
+            if any(vehicle.streaming_keys for vehicle in self.vehicles.values()):
                 self.api_handler.get_all_streaming_keys()
             return True
         except Exception as e:
-            self.streamingKeys = {}
+            for vehicle in self.vehicles.values():
+                vehicle.configure({})
             Domoticz.Error(f"Problem BMW streaming keys file {Parameters['HomeFolder']}{_STREAMING_KEY_FILE} ({e})!")
             return False
 
-    def create_devices(self) -> None:
-        """Creates all required Domoticz devices if they don't exist yet."""
+    def create_devices(self, vehicle: Vehicle) -> None:
+        """Creates all required Domoticz devices of the vehicle if they don't exist yet."""
         # Create Mileage device
-        if not get_unit(Devices, Parameters['Name'], UnitIdentifiers.MILEAGE):
+        if not get_unit(Devices, vehicle.device_id, UnitIdentifiers.MILEAGE):
             Domoticz.Unit(
-                DeviceID=Parameters['Name'], Unit=UnitIdentifiers.MILEAGE, Name=f"{Parameters['Name']} - Mileage",
+                DeviceID=vehicle.device_id, Unit=UnitIdentifiers.MILEAGE, Name=f"{vehicle.name} - Mileage",
                 TypeName='Custom', Options={'Custom': '0;km'}, Image=Images[_IMAGE].ID, Used=1
             ).Create()
 
         # Create Mileage Counter device
-        if not get_unit(Devices, Parameters['Name'], UnitIdentifiers.MILEAGE_COUNTER):
+        if not get_unit(Devices, vehicle.device_id, UnitIdentifiers.MILEAGE_COUNTER):
             Domoticz.Unit(
-                DeviceID=Parameters['Name'], Unit=UnitIdentifiers.MILEAGE_COUNTER, Name=f"{Parameters['Name']} - Mileage (Day)",
+                DeviceID=vehicle.device_id, Unit=UnitIdentifiers.MILEAGE_COUNTER, Name=f"{vehicle.name} - Mileage (Day)",
                 Type=113, Subtype=0, Switchtype=3, Options={'ValueUnits': 'km'}, Image=Images[_IMAGE].ID, Used=1
             ).Create()
 
         # NOT USED: Create device for remote services
-        if get_unit(Devices, Parameters['Name'], UnitIdentifiers.REMOTE_SERVICES):
-            update_device( False, Devices, Parameters['Name'], UnitIdentifiers.REMOTE_SERVICES, Used=0 )
+        if get_unit(Devices, vehicle.device_id, UnitIdentifiers.REMOTE_SERVICES):
+            update_device( False, Devices, vehicle.device_id, UnitIdentifiers.REMOTE_SERVICES, Used=0 )
 
         # Create doors status device
-        if not get_unit(Devices, Parameters['Name'], UnitIdentifiers.DOORS):
+        if not get_unit(Devices, vehicle.device_id, UnitIdentifiers.DOORS):
             Domoticz.Unit(
-                DeviceID=Parameters['Name'], Unit=UnitIdentifiers.DOORS, Name=f"{Parameters['Name']} - Doors",
+                DeviceID=vehicle.device_id, Unit=UnitIdentifiers.DOORS, Name=f"{vehicle.name} - Doors",
                 Type=244, Subtype=73, Switchtype=11, Image=Images[_IMAGE].ID, Used=1
             ).Create()
 
         # Create windows status device
-        if not get_unit(Devices, Parameters['Name'], UnitIdentifiers.WINDOWS):
+        if not get_unit(Devices, vehicle.device_id, UnitIdentifiers.WINDOWS):
             Domoticz.Unit(
-                DeviceID=Parameters['Name'], Unit=UnitIdentifiers.WINDOWS, Name=f"{Parameters['Name']} - Windows",
+                DeviceID=vehicle.device_id, Unit=UnitIdentifiers.WINDOWS, Name=f"{vehicle.name} - Windows",
                 Type=244, Subtype=73, Switchtype=11, Image=Images[_IMAGE].ID, Used=1
             ).Create()
 
         # Create remaining total (fuel+elec) range device
-        if not get_unit(Devices, Parameters['Name'], UnitIdentifiers.REMAIN_RANGE_TOTAL):
+        if not get_unit(Devices, vehicle.device_id, UnitIdentifiers.REMAIN_RANGE_TOTAL):
             Domoticz.Unit(
-                DeviceID=Parameters['Name'], Unit=UnitIdentifiers.REMAIN_RANGE_TOTAL, Name=f"{Parameters['Name']} - Remaining range (total)",
+                DeviceID=vehicle.device_id, Unit=UnitIdentifiers.REMAIN_RANGE_TOTAL, Name=f"{vehicle.name} - Remaining range (total)",
                 TypeName='Custom', Options={'Custom': '0;km'}, Image=Images[_IMAGE].ID, Used=1
             ).Create()
 
         # Create remaining electric range device
-        if not get_unit(Devices, Parameters['Name'], UnitIdentifiers.REMAIN_RANGE_ELEC):
+        if not get_unit(Devices, vehicle.device_id, UnitIdentifiers.REMAIN_RANGE_ELEC):
             Domoticz.Unit(
-                DeviceID=Parameters['Name'], Unit=UnitIdentifiers.REMAIN_RANGE_ELEC, Name=f"{Parameters['Name']} - Remaining range (elec)",
+                DeviceID=vehicle.device_id, Unit=UnitIdentifiers.REMAIN_RANGE_ELEC, Name=f"{vehicle.name} - Remaining range (elec)",
                 TypeName='Custom', Options={'Custom': '0;km'}, Image=Images[_IMAGE].ID, Used=1
             ).Create()
 
         # Create charging status device
-        if not get_unit(Devices, Parameters['Name'], UnitIdentifiers.CHARGING):
+        if not get_unit(Devices, vehicle.device_id, UnitIdentifiers.CHARGING):
             Domoticz.Unit(
-                DeviceID=Parameters['Name'], Unit=UnitIdentifiers.CHARGING, Name=f"{Parameters['Name']} - Charging",
+                DeviceID=vehicle.device_id, Unit=UnitIdentifiers.CHARGING, Name=f"{vehicle.name} - Charging",
                 Type=244, Subtype=73, Switchtype=0, Image=Images[_IMAGE].ID, Used=1
             ).Create()
 
         # Create charging remaining time device
-        if not get_unit(Devices, Parameters['Name'], UnitIdentifiers.CHARGING_REMAINING):
+        if not get_unit(Devices, vehicle.device_id, UnitIdentifiers.CHARGING_REMAINING):
             Domoticz.Unit(
-                DeviceID=Parameters['Name'], Unit=UnitIdentifiers.CHARGING_REMAINING, Name=f"{Parameters['Name']} - Charging time",
+                DeviceID=vehicle.device_id, Unit=UnitIdentifiers.CHARGING_REMAINING, Name=f"{vehicle.name} - Charging time",
                 TypeName='Custom', Options={'Custom': '0;min'}, Image=Images[_IMAGE].ID, Used=1
             ).Create()
 
         # Create battery level device
-        if not get_unit(Devices, Parameters['Name'], UnitIdentifiers.BAT_LEVEL):
+        if not get_unit(Devices, vehicle.device_id, UnitIdentifiers.BAT_LEVEL):
             Domoticz.Unit(
-                DeviceID=Parameters['Name'], Unit=UnitIdentifiers.BAT_LEVEL, Name=f"{Parameters['Name']} - Battery Level",
+                DeviceID=vehicle.device_id, Unit=UnitIdentifiers.BAT_LEVEL, Name=f"{vehicle.name} - Battery Level",
                 TypeName='Custom', Options={'Custom': '0;%'}, Image=Images[_IMAGE].ID, Used=1
             ).Create()
 
         # Create car status device (locked/unlocked)
-        if not get_unit(Devices, Parameters['Name'], UnitIdentifiers.CAR):
+        if not get_unit(Devices, vehicle.device_id, UnitIdentifiers.CAR):
             Domoticz.Unit(
-                DeviceID=Parameters['Name'], Unit=UnitIdentifiers.CAR, Name=f"{Parameters['Name']} - Car",
+                DeviceID=vehicle.device_id, Unit=UnitIdentifiers.CAR, Name=f"{vehicle.name} - Car",
                 Type=244, Subtype=73, Switchtype=11, Image=Images[_IMAGE].ID, Used=1
             ).Create()
 
         # Create driving status device
-        if not get_unit(Devices, Parameters['Name'], UnitIdentifiers.DRIVING):
+        if not get_unit(Devices, vehicle.device_id, UnitIdentifiers.DRIVING):
             Domoticz.Unit(
-                DeviceID=Parameters['Name'], Unit=UnitIdentifiers.DRIVING, Name=f"{Parameters['Name']} - Driving",
+                DeviceID=vehicle.device_id, Unit=UnitIdentifiers.DRIVING, Name=f"{vehicle.name} - Driving",
                 Type=244, Subtype=73, Switchtype=0, Image=Images[_IMAGE].ID, Used=1
             ).Create()
 
         # Create home status device
-        if not get_unit(Devices, Parameters['Name'], UnitIdentifiers.HOME):
+        if not get_unit(Devices, vehicle.device_id, UnitIdentifiers.HOME):
             Domoticz.Unit(
-                DeviceID=Parameters['Name'], Unit=UnitIdentifiers.HOME, Name=f"{Parameters['Name']} - Home",
+                DeviceID=vehicle.device_id, Unit=UnitIdentifiers.HOME, Name=f"{vehicle.name} - Home",
                 Type=244, Subtype=73, Switchtype=0, Image=Images[_IMAGE].ID, Used=1
             ).Create()
 
         # NOT USED: Create device for AC limitation limits
-        if get_unit(Devices, Parameters['Name'], UnitIdentifiers.AC_LIMITS):
-            update_device( False, Devices, Parameters['Name'], UnitIdentifiers.AC_LIMITS, Used=0 )
+        if get_unit(Devices, vehicle.device_id, UnitIdentifiers.AC_LIMITS):
+            update_device( False, Devices, vehicle.device_id, UnitIdentifiers.AC_LIMITS, Used=0 )
 
         # NOT USED:  Create device for Charging Mode
-        if get_unit(Devices, Parameters['Name'], UnitIdentifiers.CHARGING_MODE):
-            update_device( False, Devices, Parameters['Name'], UnitIdentifiers.CHARGING_MODE, Used=0 )
+        if get_unit(Devices, vehicle.device_id, UnitIdentifiers.CHARGING_MODE):
+            update_device( False, Devices, vehicle.device_id, UnitIdentifiers.CHARGING_MODE, Used=0 )
 
 global _plugin
 _plugin = BasePlugin()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Loads plugin.py against the stub DomoticzEx module (tool_domoticz_stub) for the tests.
+
+Author: Filip Demaertelaere
+Version: 5.1.2
+License: MIT
+"""
+
+import os
+from typing import Any
+
+import tool_domoticz_stub
+tool_domoticz_stub.install()
+import plugin
+
+PLUGIN_FOLDER: str = os.path.join(os.path.dirname(os.path.realpath(plugin.__file__)), '')
+VIN: str = 'WBA00000000000001'
+PARAMETERS = {
+    'Mode1': 'client-a', 'Mode2': VIN, 'Mode3': '500', 'Mode4': plugin._TOKEN_STORAGE_ALL_OBFUSCATED, 'Mode5': '30', 'Mode6': '0',
+    'HomeFolder': PLUGIN_FOLDER, 'Name': 'BMW',
+}
+
+
+def new_plugin(**parameters: Any) -> plugin.BasePlugin:
+    """Resets the stub (database, devices, log) and the shared state, and returns a new plugin (not started)."""
+    tool_domoticz_stub._configuration.clear()
+    tool_domoticz_stub._devices.clear()
+    tool_domoticz_stub.messages.clear()
+    tool_domoticz_stub.attach(plugin, {**PARAMETERS, **parameters})
+    plugin.AuthenticationData.state_machine = plugin.Authenticate.INIT
+    plugin.AuthenticationData.client_id = plugin.Parameters['Mode1']
+    plugin.AuthenticationData.vins = [plugin.Parameters['Mode2']]
+    plugin.AuthenticationData.vin = plugin.Parameters['Mode2']
+    plugin.APIData.state_machine = plugin.API.GET_CONTAINER
+    plugin._plugin = plugin.BasePlugin()
+    return plugin._plugin
+
+
+def logged(level: str) -> list:
+    """Returns the messages written to the Domoticz log at the level (Status, Error, Debug)."""
+    return [message for message_level, message in tool_domoticz_stub.messages if message_level == level]
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the blue/green switch of the BMW CarData container (CarDataAPIHandler and ContainerCache)."""
+
+import json
+import unittest
+from typing import Any, Dict
+
+from tests.support import new_plugin, plugin, VIN
+
+
+class Clock:
+    """Clock injected into the CarDataAPIHandler."""
+
+    def __init__(self) -> None:
+        self.now = 1_750_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def response(status: str, data: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Returns an API response as handed over by Domoticz to onMessage."""
+    message: Dict[str, Any] = {'Status': status}
+    if data is not None:
+        message['Data'] = json.dumps(data).encode('utf-8')
+    return message
+
+
+CU_105 = {'exveErrorId': 'CU-105', 'exveErrorMsg': 'No permission for specified containerId'}
+
+
+class ContainerSwitchTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.bmw = new_plugin()
+        self.clock = Clock()
+        self.bmw.api_handler = self.api = plugin.CarDataAPIHandler(self.bmw, self.bmw.decoder, clock=self.clock)
+        self.bmw.api = plugin.Domoticz.Connection(Name='BMW API')
+        self.bmw.api.Connect()
+        self.bmw.tokens = {'access_token': {'token': 'access'}}
+        vehicle = plugin.Vehicle(VIN, 'BMW', 'BMW')
+        self.bmw.vehicles = {VIN: vehicle}
+
+        # Validated container created with the previous configuration
+        vehicle.configure({'Mileage': 'vehicle.vehicle.travelledDistance'})
+        self.api.get_all_streaming_keys()
+        self.api.containers.store({'containerId': 'OLD'}, self.api.streaming_key_hash)
+        self.api.containers.validate()
+
+        # The streaming keys changed
+        vehicle.configure({'Mileage': 'vehicle.vehicle.travelledDistance', 'Driving': 'vehicle.isMoving'})
+        self.api.get_all_streaming_keys()
+
+    def last_request(self) -> Dict[str, Any]:
+        return self.bmw.api.sent[-1]
+
+    def start_switch(self) -> None:
+        """Polls: the new container is created and its telematic data requested."""
+        self.assertFalse(self.api.poll_telematic_data())
+        self.assertEqual(self.last_request()['Verb'], 'POST')
+        self.assertEqual(plugin.APIData.state_machine, plugin.API.CREATE_CONTAINER)
+        self.api.handle_message(response('201', {'containerId': 'NEW', 'technicalDescriptors': []}))
+        self.assertEqual(self.last_request()['Verb'], 'GET')
+        self.assertTrue(self.last_request()['URL'].endswith('containerId=NEW'))
+
+    def test_switch_created_validated_and_previous_retired(self) -> None:
+        self.start_switch()
+        # The previous container is kept until the new one delivered data
+        self.assertEqual(self.api.containers.container_id, 'NEW')
+        self.assertEqual(self.api.containers.retiring_id, 'OLD')
+        self.assertFalse(self.api.containers.validated)
+
+        self.api.handle_message(response('200', {'telematicData': {}}))
+        self.assertTrue(self.api.containers.validated)
+        self.assertEqual(self.last_request()['Verb'], 'DELETE')
+        self.assertTrue(self.last_request()['URL'].endswith('/OLD'))
+
+        self.api.handle_message(response('204'))
+        self.assertIsNone(self.api.containers.retiring_id)
+        self.assertEqual(plugin.APIData.state_machine, plugin.API.GET_CONTAINER)
+        self.assertFalse(self.bmw.api.Connected())
+        # Persisted: a restart continues with the new container only
+        self.assertEqual(plugin.get_config_item_db(key='container')['containerId'], 'NEW')
+        self.assertEqual(plugin.get_config_item_db(key='container_retiring', default=[]), [])
+        self.assertEqual(self.api.containers.calls_last_week, 2)
+
+    def test_failed_create_is_retried_after_switch_retry_sec(self) -> None:
+        self.assertFalse(self.api.poll_telematic_data())
+        self.api.handle_message(response('503', {'error': 'unavailable'}))
+        self.assertEqual(plugin.APIData.state_machine, plugin.API.GET_CONTAINER)
+        self.assertEqual(self.api.containers.container_id, 'OLD')
+
+        # Polling continues with the current container until the retry
+        self.clock.now += self.api.SWITCH_RETRY_SEC - 1
+        self.assertTrue(self.api.poll_telematic_data())
+        self.assertTrue(self.last_request()['URL'].endswith('containerId=OLD'))
+
+        self.clock.now += 1
+        self.assertFalse(self.api.poll_telematic_data())
+        self.assertEqual(self.last_request()['Verb'], 'POST')
+
+    def test_rejected_new_container_is_rolled_back(self) -> None:
+        self.start_switch()
+        self.api.handle_message(response('403', CU_105))
+        self.assertEqual(self.api.containers.container_id, 'OLD')
+        self.assertTrue(self.api.containers.validated)
+        self.assertIsNone(self.api.containers.retiring_id)
+        self.assertEqual(plugin.APIData.state_machine, plugin.API.GET_CONTAINER)
+
+        # No new switch before the retry
+        self.assertTrue(self.api.poll_telematic_data())
+        self.assertTrue(self.last_request()['URL'].endswith('containerId=OLD'))
+
+    def test_missing_retiring_container_is_treated_as_retired(self) -> None:
+        self.start_switch()
+        self.api.handle_message(response('200', {'telematicData': {}}))
+        self.assertEqual(plugin.APIData.state_machine, plugin.API.DELETE_CONTAINER)
+
+        self.api.handle_message(response('403', CU_105))
+        self.assertIsNone(self.api.containers.retiring_id)
+        self.assertEqual(self.api.containers.container_id, 'NEW')
+        self.assertEqual(plugin.APIData.state_machine, plugin.API.GET_CONTAINER)
+
+    def test_interrupted_switch_is_completed_after_restart(self) -> None:
+        self.start_switch()
+        self.api.handle_message(response('200', {'telematicData': {}}))
+        # Restart before the previous container was deleted
+        restarted = plugin.CarDataAPIHandler(self.bmw, self.bmw.decoder, clock=self.clock)
+        restarted.streaming_key_hash = self.api.streaming_key_hash
+        self.bmw.api_handler = restarted
+        self.assertEqual(restarted.containers.retiring_id, 'OLD')
+        self.assertFalse(restarted.poll_telematic_data())
+        self.assertEqual(self.last_request()['Verb'], 'DELETE')
+        self.assertTrue(self.last_request()['URL'].endswith('/OLD'))
+
+
+if __name__ == '__main__':
+    unittest.main()
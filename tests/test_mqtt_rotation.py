@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the make-before-break rotation of the MQTT session (MqttClientHandler) with a fake paho client."""
+
+import types
+import unittest
+from typing import Any, List
+from unittest import mock
+
+from tests.support import logged, new_plugin, plugin
+
+SESSION_PRESENT = types.SimpleNamespace(session_present=True)
+# Reason code of the broker when the session is taken over by a new connection with the same client id
+SESSION_TAKEN_OVER = 142
+
+
+class FakeClient:
+    """paho client without network: the test confirms the connection (CONNACK) by calling the callbacks."""
+
+    def __init__(self, client_id: str = '', **kwargs: Any) -> None:
+        self.client_id = client_id
+        self.clean_start = None
+        self.connected = False
+        self.disconnected = False
+        self.loop_stopped = False
+        self.subscribed: List[str] = []
+
+    def tls_set(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def username_pw_set(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def reconnect_delay_set(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def disable_logger(self) -> None:
+        pass
+
+    def enable_logger(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def connect_async(self, host: str, port: int, keepalive: int = 60, clean_start: Any = None, properties: Any = None) -> None:
+        self.clean_start = clean_start
+
+    def loop_start(self) -> None:
+        pass
+
+    def loop_stop(self) -> None:
+        self.loop_stopped = True
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    def disconnect(self) -> None:
+        self.disconnected = True
+        self.connected = False
+
+    def subscribe(self, topic: str, qos: int = 0) -> None:
+        self.subscribed.append(topic)
+
+    def unsubscribe(self, topic: str) -> None:
+        pass
+
+
+class RotationTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        patcher = mock.patch.object(plugin.mqtt, 'Client', FakeClient)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.bmw = new_plugin()
+        self.bmw.tokens = {'id_token': {'token': 'id'}, 'gcid': 'gcid-1'}
+        plugin.AuthenticationData.state_machine = plugin.Authenticate.DONE
+        self.handler = self.bmw.mqtt_handler
+
+        # Current session
+        self.assertTrue(self.handler.connect_mqtt())
+        self.previous: FakeClient = self.handler.mqtt_client
+        self.connack(self.previous)
+        self.assertEqual(self.handler.state, plugin.MqttState.CONNECTED)
+
+    def connack(self, client: FakeClient, rc: int = 0) -> None:
+        """The broker confirms the connection of the client."""
+        client.connected = rc == 0
+        self.handler.onMqttConnect(client, None, SESSION_PRESENT, rc, None)
+
+    def wait_for_teardown(self) -> None:
+        for thread in (self.handler._teardown_thread, self.handler._retire_thread):
+            if thread is not None:
+                thread.join()
+
+    def test_previous_session_is_retired_after_new_session_is_confirmed(self) -> None:
+        self.handler.rotate_mqtt()
+        new: FakeClient = self.handler.mqtt_client
+        self.assertIsNot(new, self.previous)
+        # The new client resumes the persistent session with the same client id
+        self.assertEqual(new.client_id, self.previous.client_id)
+        self.assertFalse(new.clean_start)
+        # The previous session keeps streaming until the new one is confirmed
+        self.assertIs(self.handler._retiring_client, self.previous)
+        self.assertFalse(self.previous.disconnected)
+        self.assertFalse(self.previous.loop_stopped)
+
+        self.connack(new)
+        self.wait_for_teardown()
+        self.assertEqual(self.handler.state, plugin.MqttState.CONNECTED)
+        self.assertIs(self.handler.mqtt_client, new)
+        self.assertIsNone(self.handler._retiring_client)
+        self.assertTrue(self.previous.disconnected)
+        self.assertTrue(self.previous.loop_stopped)
+        self.assertFalse(new.loop_stopped)
+        self.assertEqual(list(self.handler.rotation_gaps), [0.0])
+
+    def test_session_taken_over_by_new_client_measures_data_gap(self) -> None:
+        self.handler.rotate_mqtt()
+        new: FakeClient = self.handler.mqtt_client
+        # The broker disconnects the previous client as soon as the new one connects
+        self.previous.connected = False
+        self.handler.onMqttDisconnect(self.previous, None, None, SESSION_TAKEN_OVER, None)
+        self.wait_for_teardown()
+        # Retired right away; the new client is not disturbed (no reconnect)
+        self.assertIsNone(self.handler._retiring_client)
+        self.assertTrue(self.previous.loop_stopped)
+        self.assertIsNotNone(self.handler._dark_since)
+        self.assertIs(self.handler.mqtt_client, new)
+        self.assertEqual(self.handler.state, plugin.MqttState.CONNECTING)
+        self.assertIsNone(self.handler._reconnect_requested_at)
+
+        self.connack(new)
+        self.assertEqual(self.handler.state, plugin.MqttState.CONNECTED)
+        self.assertEqual(len(self.handler.rotation_gaps), 1)
+        self.assertGreaterEqual(self.handler.rotation_gaps[0], 0)
+
+    def test_unconfirmed_new_session_falls_back_to_previous_session(self) -> None:
+        self.handler.rotate_mqtt()
+        new: FakeClient = self.handler.mqtt_client
+        self.handler._rotation_started -= self.handler.ROTATION_TIMEOUT_SEC + 1
+        self.handler.process_state()
+        self.wait_for_teardown()
+        self.assertIs(self.handler.mqtt_client, self.previous)
+        self.assertEqual(self.handler.state, plugin.MqttState.CONNECTED)
+        self.assertIsNone(self.handler._rotation_started)
+        self.assertTrue(new.loop_stopped)
+        self.assertFalse(self.previous.loop_stopped)
+        self.assertTrue(any('not confirmed' in message for message in logged('Status')))
+
+        # A late confirmation of the abandoned client is ignored
+        self.connack(new)
+        self.assertIs(self.handler.mqtt_client, self.previous)
+        self.assertEqual(new.subscribed, [])
+        self.assertEqual(list(self.handler.rotation_gaps), [])
+
+    def test_disconnect_of_retired_client_is_ignored(self) -> None:
+        self.handler.rotate_mqtt()
+        new: FakeClient = self.handler.mqtt_client
+        self.connack(new)
+        self.wait_for_teardown()
+
+        self.handler.onMqttDisconnect(self.previous, None, None, 0, None)
+        self.assertIs(self.handler.mqtt_client, new)
+        self.assertEqual(self.handler.state, plugin.MqttState.CONNECTED)
+        self.assertIsNone(self.handler._reconnect_requested_at)
+        self.assertFalse(new.loop_stopped)
+
+    def test_rotation_without_active_session_reconnects(self) -> None:
+        self.previous.connected = False
+        self.handler.rotate_mqtt()
+        self.assertIsNone(self.handler.mqtt_client)
+        self.assertIsNone(self.handler._retiring_client)
+        self.assertEqual(self.handler.state, plugin.MqttState.DISCONNECTING)
+        self.wait_for_teardown()
+        self.handler.process_state()
+        self.assertEqual(self.handler.state, plugin.MqttState.RECONNECT_PENDING)
+
+
+if __name__ == '__main__':
+    unittest.main()
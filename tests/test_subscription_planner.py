@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the planning of non-overlapping MQTT subscriptions (SubscriptionPlanner)."""
+
+import unittest
+
+from tests.support import plugin
+
+Planner = plugin.SubscriptionPlanner
+
+
+class MatchesTest(unittest.TestCase):
+
+    def test_exact_topic(self) -> None:
+        self.assertTrue(Planner.matches('gcid/WBA1', 'gcid/WBA1'))
+        self.assertFalse(Planner.matches('gcid/WBA1', 'gcid/WBA2'))
+
+    def test_single_level_wildcard(self) -> None:
+        self.assertTrue(Planner.matches('gcid/+', 'gcid/WBA1'))
+        self.assertFalse(Planner.matches('gcid/+', 'gcid/WBA1/extra'))
+        self.assertFalse(Planner.matches('gcid/+', 'other/WBA1'))
+
+    def test_multi_level_wildcard(self) -> None:
+        self.assertTrue(Planner.matches('gcid/#', 'gcid/WBA1/extra'))
+        self.assertTrue(Planner.matches('#', 'gcid/WBA1'))
+
+    def test_level_count_must_match(self) -> None:
+        self.assertFalse(Planner.matches('gcid/WBA1/x', 'gcid/WBA1'))
+        self.assertFalse(Planner.matches('gcid', 'gcid/WBA1'))
+
+
+class PlanTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.planner = Planner()
+
+    def test_one_topic_per_vin(self) -> None:
+        self.assertEqual(self.planner.plan('gcid', ['WBA1', 'WBA2']), ['gcid/WBA1', 'gcid/WBA2'])
+
+    def test_wildcard_without_vin(self) -> None:
+        self.assertEqual(self.planner.plan('gcid', []), ['gcid/+'])
+
+    def test_changes_of_a_kept_session(self) -> None:
+        self.planner.plan('gcid', ['WBA1'])
+        self.assertEqual(self.planner.changes(session_present=False), (['gcid/WBA1'], []))
+        # Unknown subscriptions of a kept session: the legacy wildcard topic is removed
+        self.assertEqual(self.planner.changes(session_present=True), (['gcid/WBA1'], ['gcid/+']))
+        self.planner.subscribed = {'gcid/WBA1'}
+        self.assertEqual(self.planner.changes(session_present=True), ([], []))
+
+    def test_prevented_duplicates(self) -> None:
+        self.planner.plan('gcid', ['WBA1'])
+        self.planner.register_delivery('gcid/WBA1')
+        self.planner.register_delivery('gcid/WBA1')
+        # A topic outside the plan prevents nothing
+        self.planner.register_delivery('gcid/WBA9')
+        self.assertEqual(self.planner.prevented_duplicates, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the storage of the OAuth2 tokens (obfuscation and restore at start)."""
+
+import unittest
+from datetime import datetime, timedelta
+
+from tests.support import new_plugin, logged, plugin
+
+# Long enough that a wrong key stream does not give valid UTF-8 by chance
+_TOKEN = 'eyJhbGciOiJSUzI1NiJ9.' + 'x' * 800 + '.signature'
+
+
+def _tokens() -> dict:
+    expires_at = (datetime.now() + timedelta(hours=1)).isoformat()
+    return {
+        'refresh_token': {'token': _TOKEN, 'expires_at': expires_at},
+        'access_token': {'token': _TOKEN + 'a', 'expires_at': expires_at},
+        'id_token': {'token': _TOKEN + 'i', 'expires_at': expires_at},
+        'gcid': 'gcid',
+    }
+
+
+class ObfuscationTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.bmw = new_plugin()
+        self.auth = self.bmw.auth_handler
+
+    def test_round_trip(self) -> None:
+        obfuscated = self.auth._obfuscate(_TOKEN)
+        self.assertTrue(obfuscated.startswith(plugin._TOKEN_OBFUSCATION_PREFIX))
+        self.assertNotIn(_TOKEN, obfuscated)
+        self.assertEqual(self.auth._deobfuscate(obfuscated), _TOKEN)
+
+    def test_plain_token_is_returned_unchanged(self) -> None:
+        self.assertEqual(self.auth._deobfuscate(_TOKEN), _TOKEN)
+
+    def test_other_client_id_does_not_restore_the_token(self) -> None:
+        obfuscated = self.auth._obfuscate(_TOKEN)
+        plugin.AuthenticationData.client_id = 'client-b'
+        self.assertIsNone(self.auth._deobfuscate(obfuscated))
+
+    def test_corrupt_value_is_not_restored(self) -> None:
+        self.assertIsNone(self.auth._deobfuscate(plugin._TOKEN_OBFUSCATION_PREFIX + 'not*base64'))
+
+
+class LoadTokensTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.bmw = new_plugin()
+        self.bmw.tokens = _tokens()
+        self.bmw.auth_handler._save_tokens_selective()
+
+    def test_tokens_are_restored(self) -> None:
+        self.bmw.tokens = {}
+        self.assertTrue(self.bmw.auth_handler._load_tokens())
+        self.assertEqual(self.bmw.tokens['refresh_token']['token'], _TOKEN)
+        self.assertEqual(self.bmw.tokens['id_token']['token'], _TOKEN + 'i')
+
+    def test_changed_client_id_needs_new_authentication(self) -> None:
+        plugin.AuthenticationData.client_id = 'client-b'
+        self.assertFalse(self.bmw.auth_handler._load_tokens())
+
+    def test_moved_plugin_folder_needs_new_authentication(self) -> None:
+        plugin.Parameters['HomeFolder'] = '/elsewhere/'
+        self.assertFalse(self.bmw.auth_handler._load_tokens())
+        self.assertEqual(self.bmw.tokens, {})
+        self.assertTrue(any('could not be restored' in message for message in logged('Status')))
+
+    def test_start_with_changed_client_id(self) -> None:
+        stored = plugin.get_config_item_db(key='tokens')
+        bmw = new_plugin(Mode1='client-b')
+        plugin.set_config_item_db(key='tokens', value=stored)
+        bmw.onStart()
+        self.assertFalse(bmw.warmStart)
+        self.assertNotEqual(plugin.AuthenticationData.state_machine, plugin.Authenticate.DONE)
+        bmw.Stop = True
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the typed converters of the streaming key values (ValueConverter)."""
+
+import unittest
+
+from tests.support import plugin
+
+ValueConverter = plugin.ValueConverter
+
+
+class IntegerTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.convert = ValueConverter(int)
+
+    def test_conversion(self) -> None:
+        self.assertEqual(self.convert('1000'), 1000)
+        self.assertEqual(self.convert(1000), 1000)
+        self.assertEqual(self.convert('12.0'), 12)
+        self.assertEqual(self.convert(12.0), 12)
+
+    def test_fraction_is_rejected(self) -> None:
+        for value in ('12.5', 12.5):
+            with self.assertRaises(ValueError):
+                self.convert(value)
+
+    def test_invalid_values_are_rejected(self) -> None:
+        for value in ('abc', True, [1]):
+            with self.assertRaises(ValueError):
+                self.convert(value)
+
+    def test_missing_value_stays_none(self) -> None:
+        self.assertIsNone(self.convert(None))
+
+
+class FloatTest(unittest.TestCase):
+
+    def test_conversion(self) -> None:
+        convert = ValueConverter(float)
+        self.assertEqual(convert('50.85'), 50.85)
+        self.assertEqual(convert(4), 4.0)
+        for value in ('north', False):
+            with self.assertRaises(ValueError):
+                convert(value)
+
+
+class BooleanTest(unittest.TestCase):
+
+    def test_conversion(self) -> None:
+        convert = ValueConverter(bool)
+        self.assertIs(convert('true'), True)
+        self.assertIs(convert('FALSE'), False)
+        self.assertIs(convert(True), True)
+        for value in ('yes', 1):
+            with self.assertRaises(ValueError):
+                convert(value)
+
+
+class EnumerationTest(unittest.TestCase):
+
+    def test_allowed_values(self) -> None:
+        convert = ValueConverter(plugin._GROUP_VALUES['Doors'])
+        self.assertEqual(convert('OPEN'), 'OPEN')
+        # Booleans as string are converted before the membership check
+        self.assertIs(convert('true'), True)
+
+    def test_other_values_are_rejected(self) -> None:
+        convert = ValueConverter(plugin._GROUP_VALUES['Windows'])
+        for value in ('AJAR', ['OPEN']):
+            with self.assertRaises(ValueError):
+                convert(value)
+
+
+class GroupConvertersTest(unittest.TestCase):
+
+    def test_every_device_group_has_a_converter(self) -> None:
+        index = plugin.StreamingKeyIndex({group: f'vehicle.{group}' for group in plugin._DEVICE_GROUPS})
+        self.assertEqual(set(index.converters), set(plugin._DEVICE_GROUPS))
+
+
+if __name__ == '__main__':
+    unittest.main()
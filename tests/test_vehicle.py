@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the vehicle shard: merge of received values in source timestamp order and cap of the retained keys."""
+
+import sys
+import unittest
+from typing import Any, Dict
+
+from tests.support import new_plugin, plugin, VIN
+
+_MILEAGE = 'vehicle.vehicle.travelledDistance'
+
+
+def entry(value: Any, timestamp: str = None, unit: str = None) -> Dict[str, Any]:
+    """Returns a CarData entry as received via MQTT or the API."""
+    result: Dict[str, Any] = {'value': value}
+    if timestamp is not None:
+        result['timestamp'] = timestamp
+    if unit is not None:
+        result['unit'] = unit
+    return result
+
+
+class MergeTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        new_plugin()
+        self.vehicle = plugin.Vehicle(VIN, 'BMW', 'BMW')
+        self.vehicle.configure({'Mileage': _MILEAGE, 'Doors': ['vehicle.cabin.door.*.isOpen']})
+        self.values: Dict[str, plugin.TelemetryRecord] = {}
+
+    def test_newer_value_is_accepted_as_typed_record(self) -> None:
+        accepted = self.vehicle.merge(self.values, {_MILEAGE: entry('1000', '2025-01-01T10:00:00Z', 'km')})
+        self.assertEqual(list(accepted), [_MILEAGE])
+        self.assertEqual(self.values[_MILEAGE].value, 1000)
+        self.assertEqual(self.vehicle.unit_of(_MILEAGE, 'mi'), 'km')
+        self.vehicle.merge(self.values, {_MILEAGE: entry('1010', '2025-01-01T11:00:00Z', 'km')})
+        self.assertEqual(self.values[_MILEAGE].value, 1010)
+
+    def test_older_value_is_discarded(self) -> None:
+        self.vehicle.merge(self.values, {_MILEAGE: entry('1010', '2025-01-01T11:00:00Z')})
+        accepted = self.vehicle.merge(self.values, {_MILEAGE: entry('1000', '2025-01-01T10:00:00Z')})
+        self.assertEqual(accepted, {})
+        self.assertEqual(self.values[_MILEAGE].value, 1010)
+        self.assertEqual(self.vehicle.discarded_older, 1)
+
+    def test_redelivery_is_discarded_as_duplicate(self) -> None:
+        self.vehicle.merge(self.values, {_MILEAGE: entry('1000', '2025-01-01T10:00:00Z')})
+        self.vehicle.merge(self.values, {_MILEAGE: entry('1000', '2025-01-01T10:00:00Z')})
+        # Same moment in another format (eg. API response after MQTT)
+        self.vehicle.merge(self.values, {_MILEAGE: entry('1000', '2025-01-01T10:00:00.000Z')})
+        self.assertEqual(self.vehicle.discarded_duplicates, 2)
+
+    def test_value_without_timestamp_is_always_accepted(self) -> None:
+        self.vehicle.merge(self.values, {_MILEAGE: entry('1010', '2025-01-01T11:00:00Z')})
+        accepted = self.vehicle.merge(self.values, {_MILEAGE: entry('1000')})
+        self.assertIn(_MILEAGE, accepted)
+        self.assertEqual(self.values[_MILEAGE].value, 1000)
+
+    def test_value_without_timestamp_keeps_merge_order(self) -> None:
+        self.vehicle.merge(self.values, {_MILEAGE: entry('1010', '2025-01-01T11:00:00Z')})
+        self.vehicle.merge(self.values, {_MILEAGE: entry('1020')})
+        accepted = self.vehicle.merge(self.values, {_MILEAGE: entry('1000', '2025-01-01T10:00:00Z')})
+        self.assertEqual(accepted, {})
+        self.assertEqual(self.values[_MILEAGE].value, 1020)
+
+    def test_unit_is_kept_when_value_is_consumed(self) -> None:
+        self.vehicle.merge(self.values, {_MILEAGE: entry('1000', '2025-01-01T10:00:00Z', 'mi')})
+        self.values.clear()
+        self.vehicle.merge(self.values, {_MILEAGE: entry('1010', '2025-01-01T11:00:00Z')})
+        self.assertEqual(self.vehicle.unit_of(_MILEAGE, 'km'), 'mi')
+        self.assertEqual(self.vehicle.unit_of('vehicle.isMoving', 'km'), 'km')
+
+    def test_wildcard_key_is_accepted(self) -> None:
+        key = 'vehicle.cabin.door.row1.driver.isOpen'
+        self.vehicle.merge(self.values, {key: entry('true', '2025-01-01T10:00:00Z')})
+        self.assertIs(self.values[key].value, True)
+
+    def test_key_not_configured_is_dropped(self) -> None:
+        accepted = self.vehicle.merge(self.values, {'vehicle.unknown': entry('1', '2025-01-01T10:00:00Z')})
+        self.assertEqual(accepted, {})
+        self.assertEqual(self.values, {})
+        self.assertEqual(self.vehicle.dropped_keys, 1)
+
+    def test_invalid_value_is_rejected(self) -> None:
+        accepted = self.vehicle.merge(self.values, {_MILEAGE: entry('12.5', '2025-01-01T10:00:00Z')})
+        self.assertEqual(accepted, {})
+        self.assertEqual(self.vehicle.rejected_values, {'Mileage': 1})
+        # The rejected value does not block a later valid value with the same timestamp
+        self.vehicle.merge(self.values, {_MILEAGE: entry('12', '2025-01-01T10:00:00Z')})
+        self.assertEqual(self.values[_MILEAGE].value, 12)
+
+    def test_stalest_key_timestamp(self) -> None:
+        self.vehicle.merge(self.values, {_MILEAGE: entry('1000', '2025-01-01T10:00:00Z'),
+                                         'vehicle.cabin.door.row1.driver.isOpen': entry('false', '2025-01-01T09:00:00Z')})
+        self.assertEqual(self.vehicle.stalest_key_timestamp, plugin.Vehicle.parse_timestamp('2025-01-01T09:00:00Z'))
+
+    def test_configured_key_not_received_is_stale(self) -> None:
+        self.vehicle.merge(self.values, {'vehicle.cabin.door.row1.driver.isOpen': entry('false', '2025-01-01T09:00:00Z')})
+        self.assertEqual(self.vehicle.stalest_key_timestamp, 0)
+
+    def test_wildcard_group_not_received_is_stale(self) -> None:
+        self.vehicle.merge(self.values, {_MILEAGE: entry('1000', '2025-01-01T10:00:00Z')})
+        self.assertEqual(self.vehicle.stalest_key_timestamp, 0)
+
+
+class FreshnessTest(unittest.TestCase):
+    """Skipping of due API calls while the streamed values of all configured keys are fresh."""
+
+    def setUp(self) -> None:
+        self.bmw = new_plugin()
+        self.vehicle = plugin.Vehicle(VIN, 'BMW', 'BMW')
+        self.vehicle.configure({'Mileage': _MILEAGE, 'Driving': 'vehicle.isMoving', 'Doors': ['vehicle.cabin.door.*.isOpen']})
+        self.bmw.vehicles = {VIN: self.vehicle}
+        self.values: Dict[str, plugin.TelemetryRecord] = {}
+        self.now = plugin.Vehicle.parse_timestamp('2025-01-01T12:00:00Z')
+        self.polling = plugin.PollingHandler(self.bmw, clock=lambda: self.now)
+        self.polling.min_interval_sec = 3600
+
+    def receive(self, key: str, value: str) -> None:
+        self.vehicle.merge(self.values, {key: entry(value, '2025-01-01T11:30:00Z')})
+
+    def test_call_is_deferred_while_all_configured_keys_are_fresh(self) -> None:
+        self.receive(_MILEAGE, '1000')
+        self.receive('vehicle.isMoving', 'false')
+        self.receive('vehicle.cabin.door.row1.driver.isOpen', 'false')
+        self.assertTrue(self.polling.defer_while_fresh(self.bmw.stalest_key_timestamp()))
+        # Deferred to the moment the stalest key goes stale
+        self.assertEqual(self.polling.next_call_time.timestamp(), self.now + 1800)
+
+    def test_call_is_not_deferred_when_a_configured_key_is_missing(self) -> None:
+        self.receive(_MILEAGE, '1000')
+        self.receive('vehicle.cabin.door.row1.driver.isOpen', 'false')
+        self.assertFalse(self.polling.defer_while_fresh(self.bmw.stalest_key_timestamp()))
+        self.assertEqual(self.polling.calls_skipped_fresh, 0)
+
+    def test_call_is_not_deferred_when_an_evicted_key_is_missing(self) -> None:
+        self.vehicle.MAX_RETAINED_KEYS = 2
+        self.receive(_MILEAGE, '1000')
+        self.receive('vehicle.isMoving', 'false')
+        self.receive('vehicle.cabin.door.row1.driver.isOpen', 'false')
+        self.assertFalse(self.polling.defer_while_fresh(self.bmw.stalest_key_timestamp()))
+
+
+class RetainedKeysTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        new_plugin()
+        self.vehicle = plugin.Vehicle(VIN, 'BMW', 'BMW')
+        self.vehicle.configure({'Doors': ['vehicle.cabin.door.*.isOpen']})
+        self.vehicle.MAX_RETAINED_KEYS = 3
+        self.values: Dict[str, plugin.TelemetryRecord] = {}
+
+    def receive(self, door: int, minute: int) -> None:
+        self.vehicle.merge(self.values, {f'vehicle.cabin.door.d{door}.isOpen': entry('false', f'2025-01-01T10:{minute:02d}:00Z')})
+
+    def test_least_recently_updated_keys_are_evicted(self) -> None:
+        for door in range(3):
+            self.receive(door, door)
+        # Door 0 is updated again: door 1 is now the least recently updated key
+        self.receive(0, 10)
+        self.receive(3, 11)
+        self.assertEqual(sorted(self.values), ['vehicle.cabin.door.d0.isOpen', 'vehicle.cabin.door.d2.isOpen', 'vehicle.cabin.door.d3.isOpen'])
+        self.assertEqual(self.vehicle.evicted_keys, 1)
+        self.assertEqual(len(self.vehicle.latest), 3)
+
+    def test_consumed_values_keep_their_timestamp_within_the_cap(self) -> None:
+        self.receive(0, 0)
+        # Values are consumed by the device update; the timestamp still orders a redelivery
+        self.values.clear()
+        self.receive(0, 0)
+        self.assertEqual(self.values, {})
+        self.assertEqual(self.vehicle.discarded_duplicates, 1)
+
+    def test_memory_is_reported(self) -> None:
+        self.receive(0, 0)
+        consumed: int = self.vehicle.memory_bytes({})
+        self.assertGreater(consumed, 0)
+        # Pending values share the retained records: only their dictionary adds memory
+        self.assertEqual(self.vehicle.memory_bytes(self.values) - consumed, sys.getsizeof(self.values) - sys.getsizeof({}))
+
+
+if __name__ == '__main__':
+    unittest.main()
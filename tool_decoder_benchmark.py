@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+TOOL to compare the JSON decoders (PayloadDecoder) of the plugin on CarData payloads offline.
+
+Every installed backend (orjson, ujson, standard library) decodes the same payloads: the MQTT messages (VIN and
+CarData keys extracted) and the telematic data responses of the API. The legacy path (decoding the bytes to str
+before json.loads) is included as reference. Payloads are read from a recording (one JSON payload per line,
+optionally gzip or lzma compressed); without recording, payloads are generated from the keys in
+Bmw_keys_streaming.json.
+
+Usage: python3 tool_decoder_benchmark.py [--recording FILE] [--repeat 5] [--number 2000]
+
+Author: Filip Demaertelaere
+Version: 5.1.2
+License: MIT
+"""
+
+import argparse
+import gzip
+import json
+import lzma
+import random
+import sys
+import timeit
+from typing import Callable, Dict, List, Tuple
+
+import tool_domoticz_stub
+tool_domoticz_stub.install()
+import plugin
+
+_VIN = 'WBASIMULATED00000'
+# Keys of a telematic data response that are not in the configuration file (the container holds more keys)
+_EXTRA_API_KEYS = 120
+
+
+def _entry(key: str, rnd: random.Random) -> Dict[str, str]:
+    """Returns a CarData entry with a plausible value for the key."""
+    if 'isOpen' in key or 'isMoving' in key:
+        value = rnd.choice(['true', 'false'])
+    elif 'status' in key.lower():
+        value = rnd.choice(['CLOSED', 'OPEN', 'LOCKED', 'NOCHARGING'])
+    elif 'latitude' in key or 'longitude' in key:
+        value = f'{rnd.uniform(-90, 90):.6f}'
+    else:
+        value = str(rnd.randint(0, 250000))
+    return {'value': value, 'unit': 'km', 'timestamp': f'2025-01-01T{rnd.randint(0, 23):02d}:{rnd.randint(0, 59):02d}:00.000Z'}
+
+
+def generated_payloads(seed: int) -> Tuple[List[bytes], List[bytes]]:
+    """Generates MQTT payloads (one key and all keys of a vehicle) and telematic data responses from the configuration file."""
+    rnd = random.Random(seed)
+    with open(plugin._STREAMING_KEY_FILE) as json_file:
+        streaming_keys: Dict[str, Dict] = json.load(json_file)
+    keys: List[str] = sorted({key for vehicle in streaming_keys.values() for value in vehicle.values()
+                              for key in ([value] if isinstance(value, str) else value)})
+    mqtt_payloads: List[bytes] = [json.dumps({'vin': _VIN, 'entityId': '', 'topic': key, 'timestamp': '', 'data': {key: _entry(key, rnd)}}).encode()
+                                  for key in keys]
+    mqtt_payloads.append(json.dumps({'vin': _VIN, 'data': {key: _entry(key, rnd) for key in keys}}).encode())
+    extra: List[str] = [f'vehicle.generated.key{index}.value' for index in range(_EXTRA_API_KEYS)]
+    api_payloads: List[bytes] = [json.dumps({'telematicData': {key: _entry(key, rnd) for key in keys + extra}}).encode()]
+    return mqtt_payloads, api_payloads
+
+
+def recorded_payloads(filename: str) -> Tuple[List[bytes], List[bytes]]:
+    """Reads the payloads of a recording (telematic data responses are recognised by the 'telematicData' key)."""
+    opener: Callable = gzip.open if '.gz' in filename else lzma.open if '.xz' in filename else open
+    mqtt_payloads: List[bytes] = []
+    api_payloads: List[bytes] = []
+    with opener(filename, 'rb') as recording:
+        try:
+            for line in recording:
+                # Incomplete last line of a recording of a plugin that was not stopped
+                if not line.endswith(b'\n'):
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                # Lines of the plugin recorder hold the payload next to the arrival time and the topic
+                record = json.loads(line)
+                if isinstance(record, dict) and 'payload64' in record:
+                    # Not UTF-8 (no JSON to decode)
+                    continue
+                payload: bytes = record['payload'].encode() if isinstance(record, dict) and 'payload' in record else line
+                (api_payloads if b'"telematicData"' in payload else mqtt_payloads).append(payload)
+        except EOFError:
+            print(f'{filename}: truncated recording; read up to the last complete payload.', file=sys.stderr)
+    return mqtt_payloads, api_payloads
+
+
+def legacy_decode(payload: bytes) -> Tuple[str, Dict]:
+    """Decoding as done before the PayloadDecoder (bytes to str, then json.loads)."""
+    data = json.loads(payload.decode())
+    return data.get('vin'), data.get('data', {})
+
+
+def measure(function: Callable[[bytes], object], payloads: List[bytes], repeat: int, number: int) -> float:
+    """Returns the best time per payload (microseconds)."""
+    if not payloads:
+        return 0.0
+    runs: int = max(1, number // len(payloads))
+    best: float = min(timeit.repeat(lambda: [function(payload) for payload in payloads], repeat=repeat, number=runs))
+    return best / (runs * len(payloads)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare the JSON decoders of the plugin on CarData payloads.')
+    parser.add_argument('--recording', help='recorded payloads (one per line; .gz and .xz are decompressed)')
+    parser.add_argument('--repeat', type=int, default=5, help='number of measurements (the best one is reported)')
+    parser.add_argument('--number', type=int, default=2000, help='payloads decoded per measurement')
+    parser.add_argument('--seed', type=int, default=1, help='seed of the generated payloads')
+    args = parser.parse_args()
+
+    mqtt_payloads, api_payloads = recorded_payloads(args.recording) if args.recording else generated_payloads(args.seed)
+    mqtt_size: float = sum(map(len, mqtt_payloads)) / max(1, len(mqtt_payloads))
+    api_size: float = sum(map(len, api_payloads)) / max(1, len(api_payloads))
+    print(f'{len(mqtt_payloads)} MQTT payloads (avg {mqtt_size:.0f} bytes); {len(api_payloads)} API responses (avg {api_size:.0f} bytes)')
+
+    print(f'{"decoder":<16} {"MQTT (us)":>10} {"MQTT (MB/s)":>11} {"API (us)":>10} {"API (MB/s)":>10}')
+    candidates: Dict[str, Tuple[Callable[[bytes], object], Callable[[bytes], object]]] = {'legacy (str)': (legacy_decode, lambda payload: json.loads(payload.decode()))}
+    for backend in plugin.PayloadDecoder.available():
+        decoder = plugin.PayloadDecoder(backend)
+        candidates[backend] = (decoder.decode_message, decoder.loads)
+    for name, (decode_message, loads) in candidates.items():
+        mqtt_us: float = measure(decode_message, mqtt_payloads, args.repeat, args.number)
+        api_us: float = measure(loads, api_payloads, args.repeat, args.number)
+        print(f'{name:<16} {mqtt_us:>10.2f} {mqtt_size / max(mqtt_us, 1e-9):>11.1f} {api_us:>10.2f} {api_size / max(api_us, 1e-9):>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Minimal stand-in for the DomoticzEx module, used by the offline tools (simulator, benchmark, replay)
+to load plugin.py outside of Domoticz.
+
+Author: Filip Demaertelaere
+Version: 5.1.2
+License: MIT
+"""
+
+import sys
+import types
+from typing import Any, Dict, List, Tuple
+
+
+class StubUnit:
+    """Domoticz unit keeping its values in memory."""
+
+    def __init__(self, DeviceID: str = '', Unit: int = 0, Name: str = '', Used: int = 1, Options: Dict[str, str] = None, Image: int = 0, **kwargs: Any) -> None:
+        self.DeviceID = DeviceID
+        self.Unit = Unit
+        self.Name = Name
+        self.Used = Used
+        self.Options = Options or {}
+        self.Image = Image
+        self.nValue = 0
+        self.sValue = ''
+        self.BatteryLevel = 255
+        self.SignalLevel = 12
+        self.LastLevel = 0
+        self.LastUpdate = '1970-01-01 00:00:00'
+        self.updates = 0
+        self.touches = 0
+
+    def Create(self) -> None:
+        device = _devices.setdefault(self.DeviceID, StubDevice(self.DeviceID))
+        device.Units[self.Unit] = self
+
+    def Update(self, Log: bool = False, UpdateProperties: bool = False, UpdateOptions: bool = False) -> None:
+        self.updates += 1
+
+    def Touch(self) -> None:
+        self.touches += 1
+
+
+class StubDevice:
+    """Domoticz device (collection of units)."""
+
+    def __init__(self, DeviceID: str) -> None:
+        self.DeviceID = DeviceID
+        self.Units: Dict[int, StubUnit] = {}
+        self.TimedOut = 0
+
+
+class StubConnection:
+    """Domoticz connection that records the requests instead of sending them."""
+
+    def __init__(self, Name: str = '', **kwargs: Any) -> None:
+        self.Name = Name
+        self.sent: List[Dict[str, Any]] = []
+        self._connected = False
+
+    def Connected(self) -> bool:
+        return self._connected
+
+    def Connecting(self) -> bool:
+        return False
+
+    def Connect(self) -> None:
+        self._connected = True
+
+    def Disconnect(self) -> None:
+        self._connected = False
+
+    def Send(self, message: Dict[str, Any]) -> None:
+        self.sent.append(message)
+
+
+class StubImage:
+    """Domoticz image."""
+
+    def __init__(self, filename: str) -> None:
+        self.Filename = filename
+        self.ID = 0
+
+    def Create(self) -> None:
+        pass
+
+
+_devices: Dict[str, StubDevice] = {}
+_configuration: Dict[str, Any] = {}
+_heartbeat: List[int] = [10]
+messages: List[Tuple[str, str]] = []
+
+
+def _log(level: str, echo: bool) -> Any:
+    def write(message: str) -> None:
+        messages.append((level, message))
+        if echo:
+            print(f'{level}: {message}')
+    return write
+
+
+def _configuration_store(value: Dict[str, Any] = None) -> Dict[str, Any]:
+    if value is not None:
+        _configuration.clear()
+        _configuration.update(value)
+    return dict(_configuration)
+
+
+def _heartbeat_interval(value: int = None) -> int:
+    if value is not None:
+        _heartbeat[0] = value
+    return _heartbeat[0]
+
+
+def install(echo: bool = False) -> types.ModuleType:
+    """Registers the stub as DomoticzEx module; must be called before importing plugin.py."""
+    module = types.ModuleType('DomoticzEx')
+    module.Debug = _log('Debug', echo)
+    module.Status = _log('Status', echo)
+    module.Error = _log('Error', echo)
+    module.Log = _log('Log', echo)
+    module.Debugging = lambda level: None
+    module.Heartbeat = _heartbeat_interval
+    module.Configuration = _configuration_store
+    module.Connection = StubConnection
+    module.Unit = StubUnit
+    module.Image = StubImage
+    module.Devices = _devices
+    sys.modules['DomoticzEx'] = module
+    return module
+
+
+def attach(plugin: types.ModuleType, parameters: Dict[str, str], settings: Dict[str, str] = None) -> None:
+    """Injects the globals Domoticz provides to a plugin (Parameters, Devices, Settings, Images)."""
+    plugin.Parameters = parameters
+    plugin.Devices = _devices
+    plugin.Settings = settings or {'Location': '0;0'}
+    plugin.Images = {'Bmw': StubImage('Bmw.zip')}
@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+TOOL to simulate the smart polling of the BMW CarData API (PollingHandler) offline.
+
+The PollingHandler of the plugin is driven with a simulated clock and synthetic MQTT activity
+profiles. The tool reports the quota utilisation, the number of API rate limit errors (429) avoided
+compared to naive polling at a fixed interval (--naive-interval; the default of 15 minutes gives 96 calls
+per day, beyond the quota of 50), the share of API calls wasted because MQTT delivered fresh data within
+15 minutes, the (worst-case) staleness of the data and the freshness gained per call: the reduction of the
+average staleness (in minutes, compared to MQTT alone) per API call a day.
+The even policy spreads the calls over the quota; the adaptive policy also moves calls out of the
+periods in which MQTT activity is predicted from the arrival history.
+
+Usage: python3 tool_quota_simulator.py [--days 1000] [--profile all] [--policy all] [--min-interval 30] [--naive-interval 15] [--seed 1]
+
+Author: Filip Demaertelaere
+Version: 5.1.2
+License: MIT
+"""
+
+import argparse
+import bisect
+import random
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import tool_domoticz_stub
+tool_domoticz_stub.install()
+import plugin
+
+# Heartbeat interval of the API scheduling in the plugin (runAgainAPI)
+_API_CHECK_SEC = 300
+_DAY = 86400
+_VIN = 'WBASIMULATED00000'
+# An API call is wasted when MQTT delivers fresh data shortly after it
+_WASTED_WITHIN_SEC = 900
+
+# Activity during a day: list of (start second of the day, duration in seconds, seconds between messages)
+Activity = List[Tuple[int, int, int]]
+
+
+def _hm(hours: int, minutes: int = 0) -> int:
+    return hours * 3600 + minutes * 60
+
+
+def commuter(day: int, rnd: random.Random) -> Activity:
+    """Drives to work and back on weekdays (with some jitter), one trip on Saturday."""
+    weekday = day % 7
+    if weekday < 5:
+        return [(_hm(7, 30) + rnd.randint(-900, 900), 2700, 30),
+                (_hm(17, 15) + rnd.randint(-1800, 1800), 2700, 30)]
+    if weekday == 5:
+        return [(_hm(10) + rnd.randint(0, 3 * 3600), 3600, 30)]
+    return []
+
+
+def parked(day: int, rnd: random.Random) -> Activity:
+    """Parked for a week: nothing is streamed except a short wake-up now and then."""
+    if day % 7 == 6:
+        return [(_hm(12) + rnd.randint(0, 3600), 120, 60)]
+    return []
+
+
+def charging_overnight(day: int, rnd: random.Random) -> Activity:
+    """Commutes and charges every night (state of charge streamed every 5 minutes)."""
+    return commuter(day, rnd) + [(_hm(22) + rnd.randint(0, 1800), 7 * 3600, 300)]
+
+
+PROFILES: Dict[str, Callable[[int, random.Random], Activity]] = {
+    'commuter': commuter,
+    'parked': parked,
+    'charging': charging_overnight,
+}
+
+
+def mqtt_messages(profile: Callable[[int, random.Random], Activity], start: float, days: int, seed: int) -> Iterator[float]:
+    """Generates the (sorted) arrival times of the MQTT messages of a profile."""
+    rnd = random.Random(seed)
+    for day in range(days):
+        times: List[float] = []
+        for begin, duration, interval in profile(day, rnd):
+            times.extend(start + day * _DAY + begin + offset for offset in range(0, duration, interval))
+        yield from sorted(times)
+
+
+class SimulatedClock:
+    """Clock injected into the PollingHandler."""
+
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class QuotaWindow:
+    """Sliding 24h window as counted by the BMW CarData API (to detect rate limit errors)."""
+
+    def __init__(self, quota: int) -> None:
+        self.quota = quota
+        self.calls: deque = deque()
+
+    def call(self, now: float) -> bool:
+        """Registers a call; returns False if the API would answer with a 429."""
+        while self.calls and self.calls[0] <= now - _DAY:
+            self.calls.popleft()
+        if len(self.calls) >= self.quota:
+            return False
+        self.calls.append(now)
+        return True
+
+
+class Staleness:
+    """Keeps track of the age of the most recent data."""
+
+    def __init__(self, start: float) -> None:
+        self.start = start
+        self.last_refresh = start
+        self.worst = 0.0
+        self.area = 0.0
+
+    def refresh(self, now: float) -> None:
+        gap = now - self.last_refresh
+        self.worst = max(self.worst, gap)
+        self.area += gap * gap / 2
+        self.last_refresh = now
+
+    def average(self, end: float) -> float:
+        return (self.area + (end - self.last_refresh) ** 2 / 2) / max(1.0, end - self.start)
+
+
+def mqtt_only_staleness(messages: List[float], start: float, days: int) -> float:
+    """Returns the average staleness (seconds) when only MQTT refreshes the data (no API calls)."""
+    staleness = Staleness(start)
+    for message in messages:
+        staleness.refresh(message)
+    return staleness.average(start + days * _DAY)
+
+
+POLICIES: Dict[str, bool] = {
+    'even': False,
+    'adaptive': True,
+}
+
+
+def polling_handler(clock: SimulatedClock, adaptive: bool) -> plugin.PollingHandler:
+    """Creates the PollingHandler of the plugin with the simulated clock and the given policy."""
+    handler = plugin.PollingHandler(None, clock=clock)
+    handler.adaptive = adaptive
+    return handler
+
+
+def simulate_naive(start: float, days: int, interval_sec: int, quota: int) -> int:
+    """Polls at a fixed interval (ignoring the quota) and returns the number of 429 errors."""
+    window = QuotaWindow(quota)
+    errors = 0
+    now = start
+    while now < start + days * _DAY:
+        if not window.call(now):
+            errors += 1
+        now += interval_sec
+    return errors
+
+
+def simulate(messages: List[float], start: float, days: int, min_interval_sec: int, handler_factory: Callable[[SimulatedClock], plugin.PollingHandler]) -> Dict[str, float]:
+    """Runs the PollingHandler over the MQTT messages and returns the statistics."""
+    clock = SimulatedClock(start)
+    handler = handler_factory(clock)
+    handler.min_interval_sec = min_interval_sec
+    handler.load_state(force_cold=True)
+
+    window = QuotaWindow(handler.DAILY_QUOTA)
+    staleness = Staleness(start)
+    end = start + days * _DAY
+    calls = errors = wasted = 0
+    index = 0
+    check = start
+
+    # Event-driven: jump to the next MQTT message or the next API check of the heartbeat
+    while check < end:
+        while index < len(messages) and messages[index] < check:
+            clock.now = messages[index]
+            staleness.refresh(clock.now)
+            handler.register_mqtt_update({_VIN})
+            index += 1
+        clock.now = check
+        handler.update_possible_budget()
+        if datetime.fromtimestamp(clock.now) >= handler.next_call_time:
+            calls += 1
+            handler.register_api_call()
+            if window.call(clock.now):
+                staleness.refresh(clock.now)
+                following = bisect.bisect_left(messages, clock.now)
+                if following < len(messages) and messages[following] - clock.now <= _WASTED_WITHIN_SEC:
+                    wasted += 1
+            else:
+                errors += 1
+                handler.set_quota_exhausted()
+        check += _API_CHECK_SEC
+
+    return {
+        'calls': calls,
+        'utilisation': calls / (days * handler.DAILY_QUOTA),
+        'errors': errors,
+        'wasted': wasted,
+        'worst_staleness_h': staleness.worst / 3600,
+        'average_staleness_h': staleness.average(end) / 3600,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Simulate the BMW CarData API smart polling.')
+    parser.add_argument('--days', type=int, default=1000, help='number of simulated days')
+    parser.add_argument('--profile', choices=['all', *PROFILES], default='all', help='MQTT activity profile')
+    parser.add_argument('--policy', choices=['all', *POLICIES], default='all', help='polling policy')
+    parser.add_argument('--min-interval', type=int, default=30, help='minimum update interval in minutes (Mode5)')
+    parser.add_argument('--naive-interval', type=int, default=15, help='interval in minutes of the naive polling the 429s are compared with')
+    parser.add_argument('--seed', type=int, default=1, help='seed of the random activity jitter')
+    args = parser.parse_args()
+
+    # Start on a Monday at midnight (local time)
+    start = datetime(2024, 1, 1).timestamp()
+    min_interval_sec = args.min_interval * 60
+    profiles = PROFILES if args.profile == 'all' else {args.profile: PROFILES[args.profile]}
+    policies = POLICIES if args.policy == 'all' else {args.policy: POLICIES[args.policy]}
+
+    print(f'{"profile":<10} {"policy":<8} {"calls/day":>9} {"quota used":>10} {"429s":>5} {"429s avoided":>12} {"wasted calls":>12} {"worst stale (h)":>15} {"avg stale (h)":>13} {"fresh min/call":>14} {"runtime (s)":>11}')
+    for name, profile in profiles.items():
+        messages = list(mqtt_messages(profile, start, args.days, args.seed))
+        naive_errors = simulate_naive(start, args.days, args.naive_interval * 60, plugin.PollingHandler.DAILY_QUOTA)
+        mqtt_only_h = mqtt_only_staleness(messages, start, args.days) / 3600
+        for policy, adaptive in policies.items():
+            started = time.perf_counter()
+            stats = simulate(messages, start, args.days, min_interval_sec, lambda clock: polling_handler(clock, adaptive))
+            runtime = time.perf_counter() - started
+            calls_per_day = stats['calls'] / args.days
+            fresh_per_call = (mqtt_only_h - stats['average_staleness_h']) * 60 / max(calls_per_day, 1e-9)
+            print(f'{name:<10} {policy:<8} {calls_per_day:>9.1f} {stats["utilisation"]:>10.1%} {stats["errors"]:>5} '
+                  f'{naive_errors - stats["errors"]:>12} {stats["wasted"] / max(1, stats["calls"]):>12.1%} {stats["worst_staleness_h"]:>15.2f} {stats["average_staleness_h"]:>13.2f} {fresh_per_call:>14.2f} {runtime:>11.2f}')
+
+
+if __name__ == '__main__':
+    main()
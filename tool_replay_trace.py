@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+TOOL to replay a trace of recorded CarData MQTT messages through the plugin offline.
+
+The trace is recorded by the plugin when the file mqtt_record.txt is present in the plugin folder (see README).
+The messages are fed to the MQTT message callback of the plugin at their recorded receive time on a simulated clock,
+and the data pipeline of the heartbeat (ingest queue, merge, coalescing window, update_devices) runs on a simulated
+heartbeat tick of _HEARTBEAT_SEC, against the stub DomoticzEx module. The arrival-to-device latency is therefore
+the one of the plugin in Domoticz. The replay runs at the recorded pace (--speed 1), N times faster (--speed N) or
+as fast as possible (--speed 0); the simulated results do not depend on the speed. The tool reports the throughput,
+the processing time of the message callback and of the heartbeat, the latency and the final state of the devices.
+
+Usage: python3 tool_replay_trace.py mqtt_trace.jsonl.gz.1 mqtt_trace.jsonl.gz [--speed 0] [--window-ms 500] [--home .]
+
+Author: Filip Demaertelaere
+Version: 5.1.2
+License: MIT
+"""
+
+import argparse
+import base64
+import gzip
+import json
+import lzma
+import os
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, Iterator, List, Set
+
+import tool_domoticz_stub
+tool_domoticz_stub.install()
+import plugin
+
+
+class ReplayedMessage:
+    """MQTT message as handed over by paho to the message callback."""
+
+    def __init__(self, topic: str, payload: bytes) -> None:
+        self.topic = topic
+        self.payload = payload
+
+
+class SimulatedClock:
+    """Clock of the data pipeline of the plugin, set to the recorded receive times and the heartbeat ticks."""
+
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def read_trace(filenames: List[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Yields the records of the trace files (in the given order; .gz and .xz are decompressed). A trace of a plugin
+    that was not stopped (eg. Domoticz killed) ends with a truncated block: it is read up to the last complete record.
+    """
+    for filename in filenames:
+        opener: Callable = gzip.open if '.gz' in filename else lzma.open if '.xz' in filename else open
+        with opener(filename, 'rb') as trace:
+            try:
+                for line in trace:
+                    # Incomplete last record
+                    if not line.endswith(b'\n'):
+                        break
+                    if line.strip():
+                        yield json.loads(line)
+            except EOFError:
+                print(f'{filename}: truncated trace (plugin not stopped); replayed up to the last complete record.', file=sys.stderr)
+
+
+def payload_of(record: Dict[str, Any]) -> bytes:
+    """Returns the raw payload of a record."""
+    if 'payload64' in record:
+        return base64.b64decode(record['payload64'])
+    return record['payload'].encode('utf-8')
+
+
+def vins_of(filenames: List[str]) -> List[str]:
+    """Returns the VINs of the messages in the trace (in order of appearance)."""
+    decoder = plugin.PayloadDecoder()
+    vins: Dict[str, None] = {}
+    for record in read_trace(filenames):
+        try:
+            vin, _ = decoder.decode_message(payload_of(record))
+        except ValueError:
+            continue
+        if vin:
+            vins[vin] = None
+    return list(vins)
+
+
+def start_plugin(vins: List[str], home: str, window_ms: int, clock: SimulatedClock) -> Any:
+    """Starts the plugin with the simulated clock against the stub DomoticzEx module (no connection leaves the machine)."""
+    tool_domoticz_stub.attach(plugin, {
+        'Mode1': 'replay', 'Mode2': ','.join(vins), 'Mode3': str(window_ms), 'Mode4': '0', 'Mode5': '30', 'Mode6': '0',
+        'HomeFolder': home, 'Name': 'BMW',
+    })
+    bmw = plugin._plugin = plugin.BasePlugin(clock=clock)
+    # The replay must not be recorded itself
+    bmw._check_recording = lambda: None
+    bmw.onStart()
+    return bmw
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered: List[float] = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def summary(values: List[float], scale: float, unit: str) -> str:
+    return (f'median={statistics.median(values) * scale:.1f}{unit}; p95={percentile(values, 0.95) * scale:.1f}{unit}; '
+            f'max={max(values) * scale:.1f}{unit}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Replay recorded CarData MQTT messages through the plugin.')
+    parser.add_argument('trace', nargs='+', help='trace file(s), oldest first (eg. mqtt_trace.jsonl.gz.1 mqtt_trace.jsonl.gz)')
+    parser.add_argument('--speed', type=float, default=1.0, help='replay speed: 1 = recorded pace, N = N times faster, 0 = as fast as possible')
+    parser.add_argument('--window-ms', type=int, default=plugin._DEVICE_UPDATE_WINDOW_MS, help='device update coalescing window (Mode3)')
+    parser.add_argument('--home', default=os.path.dirname(os.path.realpath(__file__)), help=f'folder with {plugin._STREAMING_KEY_FILE}')
+    parser.add_argument('--vin', action='append', help='VIN of the plugin configuration (default: all VINs in the trace)')
+    args = parser.parse_args()
+
+    vins: List[str] = args.vin or vins_of(args.trace)
+    if not vins:
+        parser.error('no VIN found in the trace; use --vin')
+    records: Iterator[Dict[str, Any]] = read_trace(args.trace)
+    first: Dict[str, Any] = next(records, None)
+    if first is None:
+        parser.error('no records in the trace')
+
+    clock = SimulatedClock(first['t'])
+    bmw = start_plugin(vins, os.path.join(args.home, ''), args.window_ms, clock)
+    handler = bmw.mqtt_handler
+
+    callback_time: List[float] = []
+    heartbeat_time: List[float] = []
+    next_tick: float = first['t'] + plugin._HEARTBEAT_SEC
+
+    def heartbeat() -> None:
+        """Runs the data pipeline of the heartbeat at the next tick."""
+        nonlocal next_tick
+        clock.now = next_tick
+        busy: bool = bool(handler.ingest_queue.depth or bmw.deviceUpdatePending)
+        started: float = time.perf_counter()
+        bmw.process_received_data()
+        if busy:
+            heartbeat_time.append(time.perf_counter() - started)
+        next_tick += plugin._HEARTBEAT_SEC
+
+    replay_started: float = time.monotonic()
+    for record in (first, *records):
+        while next_tick <= record['t']:
+            heartbeat()
+        # Keep the recorded pace (scaled)
+        if args.speed > 0:
+            delay: float = replay_started + (record['t'] - first['t']) / args.speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+        clock.now = record['t']
+        started: float = time.perf_counter()
+        handler.onMqttMessage(None, None, ReplayedMessage(record.get('topic', ''), payload_of(record)))
+        callback_time.append(time.perf_counter() - started)
+    # Heartbeats until the last data reached the devices
+    while handler.ingest_queue.depth or bmw.deviceUpdatePending:
+        heartbeat()
+    duration: float = time.monotonic() - replay_started
+
+    print(f'Replayed {len(callback_time)} messages of {len(vins)} vehicle(s) ({clock.now - first["t"]:.0f}s recorded) in {duration:.2f}s '
+          f'({len(callback_time) / max(duration, 1e-9):.0f} messages/s; speed={args.speed or "max"}).')
+    print(f'Message callback (decode and enqueue) per message: {summary(callback_time, 1e6, "us")}.')
+    if heartbeat_time:
+        print(f'Heartbeat with data (ingest, merge and device update) over {len(heartbeat_time)} ticks: {summary(heartbeat_time, 1e6, "us")}.')
+    latency: List[float] = list(bmw.deviceUpdateLatency)
+    if latency:
+        print(f'Arrival-to-device latency (last {len(latency)}; heartbeat {plugin._HEARTBEAT_SEC}s, window {args.window_ms}ms): {summary(latency, 1000, "ms")}.')
+    print(f'Ingest queue: {handler.ingest_queue.stats}.')
+    print(f'Telemetry: {bmw.memory_report()}.')
+    for vin, vehicle in bmw.vehicles.items():
+        print(f'{vin}: merge discarded {vehicle.discarded_older} older and {vehicle.discarded_duplicates} duplicate values; rejected: {vehicle.rejected_values}.')
+
+    print('\nFinal device state:')
+    used: Set[str] = {vehicle.device_id for vehicle in bmw.vehicles.values()}
+    for device_id in sorted(device_id for device_id in tool_domoticz_stub._devices if device_id in used):
+        for unit_id, unit in sorted(tool_domoticz_stub._devices[device_id].Units.items()):
+            print(f'  {device_id:<30} {unit_id:>3} {unit.Name:<45} nValue={unit.nValue:<4} sValue={unit.sValue!r:<20} updates={unit.updates}')
+    errors: List[str] = [message for level, message in tool_domoticz_stub.messages if level == 'Error']
+    if errors:
+        print(f'\n{len(errors)} error(s) logged; last: {errors[-1]}')
+
+
+if __name__ == '__main__':
+    main()